@@ -5,6 +5,9 @@ USE exam_security;
 SET NAMES utf8mb4;
 
 -- Drop existing tables (order matters for FKs)
+DROP TABLE IF EXISTS sync_tombstones;
+DROP TABLE IF EXISTS idempotency_keys;
+DROP TABLE IF EXISTS exam_stats;
 DROP TABLE IF EXISTS violations;
 DROP TABLE IF EXISTS checkins;
 DROP TABLE IF EXISTS student_reference_photos;
@@ -67,6 +70,7 @@ CREATE TABLE exams (
     created_by INT,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    KEY idx_exams_start_at (start_at, id),
     FOREIGN KEY (room_id) REFERENCES rooms(id) ON DELETE SET NULL,
     FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -129,6 +133,7 @@ CREATE TABLE student_reference_photos (
     id INT AUTO_INCREMENT PRIMARY KEY,
     student_id INT NOT NULL,
     image_path VARCHAR(255) NOT NULL,
+    embedding BLOB NULL,
     embedding_hash VARCHAR(255),
     meta_data JSON NULL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -147,12 +152,17 @@ CREATE TABLE checkins (
     is_face_match TINYINT(1) NOT NULL DEFAULT 0,
     is_seat_ok TINYINT(1) NOT NULL DEFAULT 0,
     decision_status ENUM('pending', 'approved', 'denied') NOT NULL DEFAULT 'pending',
+    verification_status VARCHAR(20) NOT NULL DEFAULT 'completed',
+    verification_reason VARCHAR(100),
     photo_path VARCHAR(255),
     checked_in_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     notes TEXT,
     UNIQUE KEY uq_checkins_exam_student (exam_id, student_id),
+    KEY idx_checkins_exam_checked_in (exam_id, checked_in_at, id),
+    KEY idx_checkins_checked_in (checked_in_at, id),
+    KEY idx_checkins_exam_updated (exam_id, updated_at, id),
     FOREIGN KEY (exam_id, student_id) REFERENCES exam_students(exam_id, student_id) ON DELETE CASCADE,
     FOREIGN KEY (seat_assignment_id) REFERENCES seat_assignments(id) ON DELETE SET NULL,
     FOREIGN KEY (seating_plan_id) REFERENCES seating_plans(id) ON DELETE SET NULL
@@ -168,6 +178,48 @@ CREATE TABLE violations (
     evidence_image_path VARCHAR(255),
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    KEY idx_violations_exam_created (exam_id, created_at, id),
+    KEY idx_violations_created (created_at, id),
+    KEY idx_violations_exam_updated (exam_id, updated_at, id),
     FOREIGN KEY (exam_id, student_id) REFERENCES exam_students(exam_id, student_id) ON DELETE CASCADE,
     FOREIGN KEY (checkin_id) REFERENCES checkins(id) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Per-exam report counters maintained alongside checkins/violations
+CREATE TABLE exam_stats (
+    exam_id INT PRIMARY KEY,
+    total_checkins INT NOT NULL DEFAULT 0,
+    face_mismatches INT NOT NULL DEFAULT 0,
+    seat_mismatches INT NOT NULL DEFAULT 0,
+    approved INT NOT NULL DEFAULT 0,
+    pending INT NOT NULL DEFAULT 0,
+    violations_count INT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (exam_id) REFERENCES exams(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Stored responses for POSTs retried with an Idempotency-Key header
+CREATE TABLE idempotency_keys (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    endpoint VARCHAR(128) NOT NULL,
+    `key` VARCHAR(255) NOT NULL,
+    request_hash VARCHAR(64) NOT NULL,
+    status_code INT NULL,
+    response_body TEXT NULL,
+    created_at DATETIME NOT NULL,
+    expires_at DATETIME NOT NULL,
+    UNIQUE KEY uq_idempotency_keys_scope (user_id, endpoint, `key`),
+    INDEX idx_idempotency_keys_expires (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Deleted check-ins/violations, reported to delta sync clients (?since=)
+CREATE TABLE sync_tombstones (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    exam_id INT NOT NULL,
+    entity VARCHAR(20) NOT NULL,
+    entity_id INT NOT NULL,
+    deleted_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_sync_tombstones_exam_entity (exam_id, entity, deleted_at, id),
+    FOREIGN KEY (exam_id) REFERENCES exams(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
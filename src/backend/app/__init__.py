@@ -1,3 +1,5 @@
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Type
 
@@ -16,7 +18,10 @@ def create_app(config_object: Type[Config] = Config) -> Flask:
 
     _ensure_upload_dir(app)
     init_extensions(app)
+    _init_ml(app)
+    _init_metrics(app)
     _register_routes(app)
+    _register_commands(app)
 
     return app
 
@@ -26,6 +31,59 @@ def _ensure_upload_dir(app: Flask) -> None:
     upload_path.mkdir(parents=True, exist_ok=True)
 
 
+def _init_ml(app: Flask) -> None:
+    from .ml.executor import EncodingExecutor  # noqa: WPS433 (import inside function)
+    from .ml.quality import QualityThresholds  # noqa: WPS433
+    from .services import ml_service  # noqa: WPS433
+
+    # Settings added with the pool fall back to Config's defaults, so config objects
+    # that do not subclass Config (e.g. in tests) keep working
+    ml_service.configure_reference_cache(_setting(app, "ML_EMBEDDING_CACHE_MAX_BYTES"))
+
+    app.checkin_jobs = ThreadPoolExecutor(
+        max_workers=_setting(app, "CHECKIN_ASYNC_WORKERS"),
+        thread_name_prefix="checkin-verify",
+    )
+    # Finish running verifications on exit; anything still queued is picked up by
+    # "flask checkins recover-verifications"
+    atexit.register(app.checkin_jobs.shutdown, wait=True, cancel_futures=True)
+
+    if _setting(app, "ML_PROVIDER") == "face_recognition":
+        # Only the real provider encodes faces; the fake one needs no worker processes
+        app.ml_executor = EncodingExecutor(
+            max_workers=_setting(app, "ML_POOL_WORKERS"),
+            max_pending=_setting(app, "ML_POOL_MAX_PENDING"),
+            timeout=_setting(app, "ML_JOB_TIMEOUT"),
+        )
+        atexit.register(app.ml_executor.shutdown)
+
+        app.ml_client = ml_service.FaceRecognitionService(
+            tolerance=_setting(app, "ML_FACE_TOLERANCE"),
+            index_max_age=_setting(app, "ML_EXAM_INDEX_MAX_AGE"),
+            executor=app.ml_executor,
+            quality=QualityThresholds(
+                min_brightness=_setting(app, "ML_QUALITY_MIN_BRIGHTNESS"),
+                min_sharpness=_setting(app, "ML_QUALITY_MIN_SHARPNESS"),
+                min_face_size=_setting(app, "ML_QUALITY_MIN_FACE_SIZE"),
+                detect_max_dimension=_setting(app, "ML_QUALITY_DETECT_MAX_DIMENSION"),
+            )
+            if _setting(app, "ML_QUALITY_GATE")
+            else None,
+        )
+
+
+def _setting(app: Flask, key: str):
+    return app.config.get(key, getattr(Config, key))
+
+
+def _init_metrics(app: Flask) -> None:
+    from .common import metrics  # noqa: WPS433 (import inside function)
+    from .extensions import db  # noqa: WPS433
+
+    with app.app_context():
+        metrics.instrument_app(app, db.engine)
+
+
 def _register_routes(app: Flask) -> None:
     try:
         from . import routes  # noqa: WPS433 (import inside function)
@@ -34,3 +92,9 @@ def _register_routes(app: Flask) -> None:
 
     if hasattr(routes, "register_routes"):
         routes.register_routes(app)
+
+
+def _register_commands(app: Flask) -> None:
+    from .cli import register_commands  # noqa: WPS433 (import inside function)
+
+    register_commands(app)
@@ -1,24 +1,32 @@
+import json
+import time
 from http import HTTPStatus
 from pathlib import Path
 
-from flask import Blueprint, current_app, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, url_for
 from sqlalchemy.exc import IntegrityError
 
-from ..common.decorators import require_roles
+from ..common import metrics, pagination
+from ..common.decorators import idempotent, require_roles
+from ..common.exceptions import MLServiceUnavailable
 from ..extensions import db
-from ..models import Exam, SeatAssignment, SeatingPlan, Student
-from ..services import checkin_service, ml_service
+from ..models import Checkin, Exam
+from ..schemas.checkin import validate_checkin_batch_payload
+from ..services import checkin_context, checkin_service, exam_events, ml_service
 
 proctor_checkins_bp = Blueprint("proctor_checkins", __name__, url_prefix="/api/proctor")
 
 
 @proctor_checkins_bp.route("/checkins", methods=["POST"])
 @require_roles("proctor", "admin")
+@idempotent
 def create_checkin():
     exam_id = request.form.get("exam_id")
     student_id = request.form.get("student_id")
     entered_seat_code = request.form.get("entered_seat_code") or ""
     photo = request.files.get("photo")
+    async_mode = _truthy(request.form.get("async") or request.args.get("async"))
+    debug = _truthy(request.form.get("debug") or request.args.get("debug"))
 
     if not exam_id or not student_id or not photo:
         return (
@@ -32,41 +40,208 @@ def create_checkin():
     except (ValueError, TypeError):
         return jsonify({"message": "exam_id and student_id must be integers."}), HTTPStatus.BAD_REQUEST
 
-    exam = Exam.query.get(exam_id_int)
-    student = Student.query.get(student_id_int)
-    if not exam or not student:
-        return jsonify({"message": "Exam or student not found."}), HTTPStatus.NOT_FOUND
-
-    seating_plan = SeatingPlan.query.filter_by(exam_id=exam.id).first()
-    seat_assignment = None
-    if seating_plan:
-        seat_assignment = SeatAssignment.query.filter_by(exam_id=exam.id, student_id=student.id).first()
+    context = checkin_context.get_checkin_context(exam_id_int, max_age=current_app.config["CHECKIN_CONTEXT_MAX_AGE"])
+    if context is None:
+        return jsonify({"message": "Exam not found."}), HTTPStatus.NOT_FOUND
 
     upload_folder = Path(current_app.config["UPLOAD_FOLDER"]).resolve()
     ml_client = getattr(current_app, "ml_client", None) or ml_service.FakeMLService()
+    timer = metrics.StageTimer()
 
     try:
         checkin = checkin_service.process_checkin(
-            exam=exam,
-            student=student,
-            seating_plan=seating_plan,
-            seat_assignment=seat_assignment,
+            context=context,
+            student_id=student_id_int,
             entered_seat_code=entered_seat_code,
             photo=photo,
             upload_folder=upload_folder,
             ml_client=ml_client,
+            defer_verification=async_mode,
+            timer=timer,
         )
     except ValueError as exc:
         return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
+    except MLServiceUnavailable as exc:
+        return jsonify({"message": f"{exc} Please retry."}), HTTPStatus.SERVICE_UNAVAILABLE
     except IntegrityError:
         db.session.rollback()
         return jsonify({"message": "Constraint error creating check-in."}), HTTPStatus.BAD_REQUEST
 
-    return jsonify(checkin.to_dict()), HTTPStatus.CREATED
+    extra = {"debug": {"timings_ms": timer.as_milliseconds()}} if debug else {}
+    if async_mode:
+        return (
+            jsonify(
+                {
+                    "job_id": checkin.id,
+                    "status": checkin.verification_status,
+                    "status_url": url_for("proctor_checkins.checkin_verification", checkin_id=checkin.id),
+                    "checkin": checkin.to_dict(),
+                    **extra,
+                }
+            ),
+            HTTPStatus.ACCEPTED,
+        )
+
+    return jsonify({**checkin.to_dict(), **extra}), HTTPStatus.CREATED
+
+
+@proctor_checkins_bp.route("/checkins/batch", methods=["POST"])
+@require_roles("proctor", "admin")
+def create_checkin_batch():
+    """
+    Sync check-ins queued offline. Multipart body: a "metadata" JSON field
+    {exam_id, items: [{client_id, student_id, photo, entered_seat_code?, captured_at?}]}
+    plus one file per item under the field named by its "photo" key.
+    """
+    try:
+        metadata = json.loads(request.form.get("metadata") or "")
+    except ValueError:
+        return jsonify({"message": "metadata must be a JSON object."}), HTTPStatus.BAD_REQUEST
+
+    validated, errors = validate_checkin_batch_payload(metadata, current_app.config["CHECKIN_BATCH_MAX_ITEMS"])
+    for idx, item in enumerate(validated.get("items", []), start=1):
+        item["photo"] = request.files.get(item["photo"])
+        if not item["photo"]:
+            errors.append({"index": idx, "field": "photo", "message": "No uploaded file under this field"})
+    if errors:
+        return jsonify({"errors": errors}), HTTPStatus.BAD_REQUEST
+
+    context = checkin_context.get_checkin_context(
+        validated["exam_id"], max_age=current_app.config["CHECKIN_CONTEXT_MAX_AGE"]
+    )
+    if context is None:
+        return jsonify({"message": "Exam not found."}), HTTPStatus.NOT_FOUND
+
+    upload_folder = Path(current_app.config["UPLOAD_FOLDER"]).resolve()
+    ml_client = getattr(current_app, "ml_client", None) or ml_service.FakeMLService()
+    try:
+        results = checkin_service.process_checkin_batch(context, validated["items"], upload_folder, ml_client)
+    except MLServiceUnavailable as exc:
+        return jsonify({"message": f"{exc} Please retry."}), HTTPStatus.SERVICE_UNAVAILABLE
+
+    totals = {status: 0 for status in ("created", "duplicate", "rejected")}
+    for result in results:
+        totals[result["status"]] += 1
+    return jsonify({"exam_id": context.exam_id, "results": results, **totals})
+
+
+@proctor_checkins_bp.route("/checkins/identify", methods=["POST"])
+@require_roles("proctor", "admin")
+def identify_student():
+    exam_id = request.form.get("exam_id")
+    photo = request.files.get("photo")
+    if not exam_id or not photo:
+        return jsonify({"message": "exam_id and photo are required."}), HTTPStatus.BAD_REQUEST
+
+    try:
+        exam_id_int = int(exam_id)
+        top_k = int(request.form.get("top_k") or 5)
+    except (ValueError, TypeError):
+        return jsonify({"message": "exam_id and top_k must be integers."}), HTTPStatus.BAD_REQUEST
+    top_k = max(1, min(top_k, 20))
+
+    exam = Exam.query.get(exam_id_int)
+    if not exam:
+        return jsonify({"message": "Exam not found."}), HTTPStatus.NOT_FOUND
+
+    ml_client = getattr(current_app, "ml_client", None) or ml_service.FakeMLService()
+    try:
+        result = checkin_service.identify_student(exam, photo, ml_client, top_k=top_k)
+    except ValueError as exc:
+        return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
+    except MLServiceUnavailable as exc:
+        return jsonify({"message": f"{exc} Please retry."}), HTTPStatus.SERVICE_UNAVAILABLE
+
+    return jsonify({"exam_id": exam.id, **result})
+
+
+@proctor_checkins_bp.route("/checkins/<int:checkin_id>/verification", methods=["GET"])
+@require_roles("proctor", "admin")
+def checkin_verification(checkin_id: int):
+    """Status of an asynchronous check-in. ?wait=<seconds> long-polls until it leaves "queued"."""
+    wait = min(request.args.get("wait", default=0, type=float), current_app.config["CHECKIN_STATUS_MAX_WAIT"])
+    deadline = time.monotonic() + max(wait, 0)
+
+    checkin = Checkin.query.get(checkin_id)
+    if not checkin:
+        return jsonify({"message": "Checkin not found."}), HTTPStatus.NOT_FOUND
+    while checkin.verification_status == "queued" and time.monotonic() < deadline:
+        time.sleep(0.25)
+        db.session.rollback()  # end the read snapshot so the worker's commit becomes visible
+
+    return jsonify({"job_id": checkin.id, "status": checkin.verification_status, "checkin": checkin.to_dict()})
 
 
 @proctor_checkins_bp.route("/exams/<int:exam_id>/checkins", methods=["GET"])
 @require_roles("proctor", "admin")
 def list_checkins(exam_id: int):
-    checkins = checkin_service.list_checkins(exam_id)
-    return jsonify({"items": [c.to_dict() for c in checkins]})
+    """
+    Full (optionally paged) list, or with ?since=<watermark> only the changes after
+    it. Changed rows can be sent again on a later sync; clients upsert them by id.
+    """
+    try:
+        limit, cursor = pagination.page_args(request.args)
+        if "since" in request.args:
+            delta = checkin_service.checkin_changes(
+                exam_id, request.args["since"], limit, margin=current_app.config["SYNC_SAFETY_MARGIN_SECONDS"]
+            )
+            return jsonify(delta.to_dict())
+        checkins = checkin_service.list_checkins(exam_id, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
+    return jsonify({"items": [c.to_dict() for c in checkins], "next_cursor": checkins.next_cursor})
+
+
+@proctor_checkins_bp.route("/exams/<int:exam_id>/events", methods=["GET"])
+@require_roles("proctor", "admin")
+def exam_event_stream(exam_id: int):
+    """
+    Server-sent events for an exam: checkin.created/updated and
+    violation.created/updated/deleted as they are committed. Send Last-Event-ID
+    (or ?last_event_id=) when reconnecting to receive what was missed; a "reset"
+    event means the client has to resync its lists with ?since=<watermark> instead.
+
+    The broker is in-process: a stream only carries writes handled by the same
+    process, so serve the API from a single worker process (threads are fine).
+    """
+    if not Exam.query.get(exam_id):
+        return jsonify({"message": "Exam not found."}), HTTPStatus.NOT_FOUND
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    subscription = exam_events.broker.subscribe(exam_id, last_event_id)
+    stream = _event_stream(
+        subscription,
+        heartbeat=current_app.config["EVENTS_HEARTBEAT_SECONDS"],
+        max_seconds=current_app.config["EVENTS_STREAM_MAX_SECONDS"],
+    )
+    return Response(
+        stream,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+RESET_EVENT = 'event: reset\ndata: {"message": "Events were missed; resync with ?since=<watermark>."}\n\n'
+
+
+def _event_stream(subscription: exam_events.Subscription, heartbeat: float, max_seconds: float):
+    # Streams are closed after max_seconds so workers are not held forever; the
+    # browser's EventSource reconnects on its own with Last-Event-ID.
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield "retry: 2000\n\n"
+        while True:
+            if subscription.reset:
+                yield RESET_EVENT
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            event = subscription.get(timeout=min(heartbeat, remaining))
+            yield exam_events.format_sse(event) if event else ": keep-alive\n\n"
+    finally:
+        exam_events.broker.unsubscribe(subscription)
+
+
+def _truthy(value) -> bool:
+    return str(value).lower() in ("true", "1", "yes") if value is not None else False
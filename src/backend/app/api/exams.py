@@ -1,11 +1,12 @@
 from http import HTTPStatus
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request, url_for
 from sqlalchemy.exc import IntegrityError
 
+from ..common import pagination
 from ..common.decorators import require_roles
 from ..schemas.exam import validate_exam_payload, validate_room_payload
-from ..services import exam_service, student_service
+from ..services import embedding_service, exam_service, ml_service, student_service
 
 admin_exams_bp = Blueprint("admin_exams", __name__, url_prefix="/api/admin/exams")
 proctor_exams_bp = Blueprint("proctor_exams", __name__, url_prefix="/api/proctor/exams")
@@ -16,8 +17,12 @@ admin_rooms_bp = Blueprint("admin_rooms", __name__, url_prefix="/api/admin/rooms
 @admin_exams_bp.route("", methods=["GET"])
 @require_roles("admin")
 def admin_list_exams():
-    exams = exam_service.list_exams()
-    return jsonify({"items": [exam_service.exam_to_dict(e) for e in exams]})
+    try:
+        limit, cursor = pagination.page_args(request.args)
+        exams = exam_service.list_exams(limit=limit, cursor=cursor)
+    except ValueError as exc:
+        return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
+    return jsonify({"items": [exam_service.exam_to_dict(e) for e in exams], "next_cursor": exams.next_cursor})
 
 
 @admin_exams_bp.route("", methods=["POST"])
@@ -76,8 +81,15 @@ def admin_get_roster(exam_id: int):
     exam = exam_service.get_exam(exam_id)
     if not exam:
         return jsonify({"message": "Exam not found."}), HTTPStatus.NOT_FOUND
-    roster = student_service.list_exam_roster(exam.id)
-    return jsonify({"items": [es.to_dict() for es in roster]})
+    try:
+        limit, cursor = pagination.page_args(request.args)
+        roster = student_service.list_exam_roster(exam.id, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
+    photos = student_service.photos_by_student(es.student_id for es in roster)
+    return jsonify(
+        {"items": [es.to_dict(photos=photos[es.student_id]) for es in roster], "next_cursor": roster.next_cursor}
+    )
 
 
 @admin_exams_bp.route("/<int:exam_id>/roster", methods=["POST"])
@@ -122,17 +134,48 @@ def admin_import_roster(exam_id: int):
     created, errors = student_service.import_roster_from_csv(exam, file_storage)
     if errors:
         return jsonify({"errors": errors, "message": "Import failed"}), HTTPStatus.BAD_REQUEST
+    photos = student_service.photos_by_student(es.student_id for es in created)
     return (
         jsonify(
             {
                 "imported": len(created),
-                "items": [es.to_dict() for es in created],
+                "items": [es.to_dict(photos=photos[es.student_id]) for es in created],
             }
         ),
         HTTPStatus.CREATED,
     )
 
 
+@admin_exams_bp.route("/<int:exam_id>/warmup", methods=["POST"])
+@require_roles("admin")
+def admin_warm_up_exam(exam_id: int):
+    """
+    Start encoding the roster's reference photos in the background (a full roster can
+    take minutes) and return 202; poll status_url for the report. The
+    "flask exams warmup" command does the same synchronously.
+    """
+    exam = exam_service.get_exam(exam_id)
+    if not exam:
+        return jsonify({"message": "Exam not found."}), HTTPStatus.NOT_FOUND
+
+    payload = request.get_json(silent=True) or {}
+    ml_client = getattr(current_app, "ml_client", None) or ml_service.FakeMLService()
+    status = embedding_service.submit_warm_up(
+        current_app._get_current_object(), exam.id, ml_client, force=bool(payload.get("force"))
+    )
+    status_url = url_for("admin_exams.admin_warm_up_status", exam_id=exam.id)
+    return jsonify({**status, "status_url": status_url}), HTTPStatus.ACCEPTED, {"Location": status_url}
+
+
+@admin_exams_bp.route("/<int:exam_id>/warmup", methods=["GET"])
+@require_roles("admin")
+def admin_warm_up_status(exam_id: int):
+    status = embedding_service.warm_up_status(exam_id)
+    if status is None:
+        return jsonify({"message": "No warm-up has been started for this exam."}), HTTPStatus.NOT_FOUND
+    return jsonify(status)
+
+
 # Admin Rooms CRUD
 @admin_rooms_bp.route("", methods=["GET"])
 @require_roles("admin")
@@ -195,8 +238,12 @@ def admin_delete_room(room_id: int):
 @proctor_exams_bp.route("", methods=["GET"])
 @require_roles("proctor", "admin")
 def proctor_list_exams():
-    exams = exam_service.list_exams()
-    return jsonify({"items": [exam_service.exam_to_dict(e) for e in exams]})
+    try:
+        limit, cursor = pagination.page_args(request.args)
+        exams = exam_service.list_exams(limit=limit, cursor=cursor)
+    except ValueError as exc:
+        return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
+    return jsonify({"items": [exam_service.exam_to_dict(e) for e in exams], "next_cursor": exams.next_cursor})
 
 
 @proctor_exams_bp.route("/<int:exam_id>", methods=["GET"])
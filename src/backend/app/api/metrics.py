@@ -0,0 +1,30 @@
+import hmac
+
+from flask import Blueprint, Response, current_app, request
+
+from ..common import metrics
+from ..common.decorators import require_roles
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """
+    Prometheus exposition. Scrapers authenticate with "Authorization: Bearer
+    <METRICS_TOKEN>"; without it (or with no token configured) an admin JWT is required.
+    """
+    token = current_app.config.get("METRICS_TOKEN")
+    supplied = request.headers.get("Authorization", "")
+    if token and hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+        return _exposition()
+    return _admin_exposition()
+
+
+@require_roles("admin")
+def _admin_exposition():
+    return _exposition()
+
+
+def _exposition() -> Response:
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4")
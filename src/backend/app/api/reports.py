@@ -1,7 +1,9 @@
+from datetime import datetime
 from http import HTTPStatus
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 
+from ..common import pagination, streaming
 from ..common.decorators import require_roles
 from ..services import report_service
 
@@ -16,32 +18,100 @@ def summary():
     return jsonify(data)
 
 
+@admin_reports_bp.route("/summaries", methods=["GET"])
+@require_roles("admin")
+def summaries():
+    """Per-exam summaries for ?exam_ids=1,2,3 and/or ?from=YYYY-MM-DD&to=YYYY-MM-DD (exam start date)."""
+    try:
+        exam_ids = [int(value) for value in (request.args.get("exam_ids") or "").split(",") if value.strip()]
+        start_date = _parse_date(request.args.get("from"))
+        end_date = _parse_date(request.args.get("to"))
+    except ValueError:
+        return (
+            jsonify({"message": "exam_ids must be integers and from/to dates in YYYY-MM-DD format."}),
+            HTTPStatus.BAD_REQUEST,
+        )
+
+    items = report_service.get_summaries(exam_ids=exam_ids or None, start_date=start_date, end_date=end_date)
+    return jsonify({"items": items})
+
+
 @admin_reports_bp.route("/checkins", methods=["GET"])
 @require_roles("admin")
 def report_checkins():
     exam_id = request.args.get("exam_id", type=int)
-    face_match = request.args.get("face_match")
-    seat_ok = request.args.get("seat_ok")
+    face_match_bool = _to_bool(request.args.get("face_match"))
+    seat_ok_bool = _to_bool(request.args.get("seat_ok"))
 
-    def to_bool(value):
-        if value is None:
-            return None
-        return str(value).lower() in ("true", "1", "yes")
+    try:
+        limit, cursor = pagination.page_args(request.args)
+        checkins = report_service.list_checkins(
+            exam_id=exam_id,
+            face_match=face_match_bool,
+            seat_ok=seat_ok_bool,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
+    return jsonify({"items": [c.to_dict() for c in checkins], "next_cursor": checkins.next_cursor})
 
-    face_match_bool = to_bool(face_match) if face_match is not None else None
-    seat_ok_bool = to_bool(seat_ok) if seat_ok is not None else None
 
-    checkins = report_service.list_checkins(
-        exam_id=exam_id,
-        face_match=face_match_bool,
-        seat_ok=seat_ok_bool,
+@admin_reports_bp.route("/checkins/export", methods=["GET"])
+@require_roles("admin")
+def export_checkins():
+    """Stream check-ins as ?format=csv (default) or ndjson, with the /checkins filters."""
+    export_format = (request.args.get("format") or "csv").lower()
+    if export_format not in streaming.EXPORT_FORMATS:
+        return jsonify({"message": "format must be csv or ndjson."}), HTTPStatus.BAD_REQUEST
+
+    rows = report_service.iter_checkin_rows(
+        exam_id=request.args.get("exam_id", type=int),
+        face_match=_to_bool(request.args.get("face_match")),
+        seat_ok=_to_bool(request.args.get("seat_ok")),
     )
-    return jsonify({"items": [c.to_dict() for c in checkins]})
+    return _export_response("checkins", export_format, report_service.CHECKIN_EXPORT_COLUMNS, rows)
+
+
+@admin_reports_bp.route("/violations/export", methods=["GET"])
+@require_roles("admin")
+def export_violations():
+    """Stream violations as ?format=csv (default) or ndjson."""
+    export_format = (request.args.get("format") or "csv").lower()
+    if export_format not in streaming.EXPORT_FORMATS:
+        return jsonify({"message": "format must be csv or ndjson."}), HTTPStatus.BAD_REQUEST
+
+    rows = report_service.iter_violation_rows(exam_id=request.args.get("exam_id", type=int))
+    return _export_response("violations", export_format, report_service.VIOLATION_EXPORT_COLUMNS, rows)
 
 
 @admin_reports_bp.route("/violations", methods=["GET"])
 @require_roles("admin")
 def report_violations():
     exam_id = request.args.get("exam_id", type=int)
-    violations = report_service.list_violations(exam_id=exam_id)
-    return jsonify({"items": [v.to_dict() for v in violations]})
+    try:
+        limit, cursor = pagination.page_args(request.args)
+        violations = report_service.list_violations(exam_id=exam_id, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
+    return jsonify({"items": [v.to_dict() for v in violations], "next_cursor": violations.next_cursor})
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _to_bool(value):
+    if value is None:
+        return None
+    return str(value).lower() in ("true", "1", "yes")
+
+
+def _export_response(name, export_format, columns, rows):
+    return Response(
+        stream_with_context(streaming.export_chunks(export_format, columns, rows)),
+        mimetype=streaming.EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f"attachment; filename={name}.{export_format}"},
+    )
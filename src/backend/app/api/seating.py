@@ -3,12 +3,13 @@ from http import HTTPStatus
 from flask import Blueprint, jsonify, request
 from sqlalchemy.exc import IntegrityError
 
+from ..common import pagination
 from ..common.decorators import require_roles
 from ..schemas.seating import (
     validate_seat_assignments_payload,
     validate_seating_plan_payload,
 )
-from ..services import exam_service, seating_service
+from ..services import exam_service, seating_service, student_service
 
 seating_bp = Blueprint("seating", __name__)
 
@@ -65,7 +66,8 @@ def assign_seats(exam_id: int):
     except IntegrityError:
         return jsonify({"message": "Constraint error assigning seats."}), HTTPStatus.BAD_REQUEST
 
-    return jsonify({"items": [sa.to_dict() for sa in saved]}), HTTPStatus.CREATED
+    photos = student_service.photos_by_student(sa.student_id for sa in saved)
+    return jsonify({"items": [sa.to_dict(photos=photos[sa.student_id]) for sa in saved]}), HTTPStatus.CREATED
 
 
 @seating_bp.route("/api/admin/exams/<int:exam_id>/seat-assignments", methods=["GET"])
@@ -74,5 +76,15 @@ def list_seat_assignments(exam_id: int):
     exam = exam_service.get_exam(exam_id)
     if not exam:
         return jsonify({"message": "Exam not found."}), HTTPStatus.NOT_FOUND
-    assignments = seating_service.list_seat_assignments(exam_id)
-    return jsonify({"items": [sa.to_dict() for sa in assignments]})
+    try:
+        limit, cursor = pagination.page_args(request.args)
+        assignments = seating_service.list_seat_assignments(exam_id, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
+    photos = student_service.photos_by_student(sa.student_id for sa in assignments)
+    return jsonify(
+        {
+            "items": [sa.to_dict(photos=photos[sa.student_id]) for sa in assignments],
+            "next_cursor": assignments.next_cursor,
+        }
+    )
@@ -1,11 +1,12 @@
 from http import HTTPStatus
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from sqlalchemy.exc import IntegrityError
 
+from ..common import pagination
 from ..common.decorators import require_roles
 from ..schemas.student import validate_student_payload
-from ..services import student_service
+from ..services import ml_service, student_service
 
 admin_students_bp = Blueprint("admin_students", __name__, url_prefix="/api/admin/students")
 
@@ -28,8 +29,13 @@ def create_student():
 @require_roles("admin")
 def list_students():
     search = request.args.get("search")
-    students = student_service.list_students(search)
-    return jsonify({"items": [s.to_dict() for s in students]})
+    try:
+        limit, cursor = pagination.page_args(request.args)
+        students = student_service.list_students(search, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
+    photos = student_service.photos_by_student(s.id for s in students)
+    return jsonify({"items": [s.to_dict(photos=photos[s.id]) for s in students], "next_cursor": students.next_cursor})
 
 
 @admin_students_bp.route("/<int:student_id>", methods=["GET"])
@@ -90,8 +96,12 @@ def upload_student_photo(student_id):
     if not file:
         return jsonify({"message": "No photo file provided."}), HTTPStatus.BAD_REQUEST
 
+    ml_client = getattr(current_app, "ml_client", None) or ml_service.FakeMLService()
+
     try:
-        path = student_service.add_student_photo(student, file)
+        path = student_service.add_student_photo(student, file, ml_client=ml_client)
         return jsonify({"message": "Photo uploaded.", "path": path}), HTTPStatus.OK
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
     except Exception as e:
         return jsonify({"message": f"Upload failed: {str(e)}"}), HTTPStatus.INTERNAL_SERVER_ERROR
@@ -4,7 +4,8 @@ from pathlib import Path
 from flask import Blueprint, current_app, jsonify, request
 from sqlalchemy.exc import IntegrityError
 
-from ..common.decorators import require_roles
+from ..common import pagination
+from ..common.decorators import idempotent, require_roles
 from ..extensions import db
 from ..models import Checkin, Exam, Student
 from ..services import violation_service
@@ -15,6 +16,7 @@ admin_violations_bp = Blueprint("admin_violations", __name__, url_prefix="/api/a
 
 @proctor_violations_bp.route("/violations", methods=["POST"])
 @require_roles("proctor", "admin")
+@idempotent
 def create_violation():
     exam_id = request.form.get("exam_id")
     student_id = request.form.get("student_id")
@@ -56,6 +58,8 @@ def create_violation():
             upload_folder=upload_folder,
             checkin=checkin,
         )
+    except ValueError as exc:
+        return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
     except IntegrityError:
         db.session.rollback()
         return jsonify({"message": "Constraint error creating violation."}), HTTPStatus.BAD_REQUEST
@@ -66,16 +70,33 @@ def create_violation():
 @proctor_violations_bp.route("/exams/<int:exam_id>/violations", methods=["GET"])
 @require_roles("proctor", "admin")
 def list_exam_violations(exam_id: int):
-    violations = violation_service.list_violations_by_exam(exam_id)
-    return jsonify({"items": [v.to_dict() for v in violations]})
+    """
+    Full (optionally paged) list, or with ?since=<watermark> only the changes after
+    it. Changed rows can be sent again on a later sync; clients upsert them by id.
+    """
+    try:
+        limit, cursor = pagination.page_args(request.args)
+        if "since" in request.args:
+            delta = violation_service.violation_changes(
+                exam_id, request.args["since"], limit, margin=current_app.config["SYNC_SAFETY_MARGIN_SECONDS"]
+            )
+            return jsonify(delta.to_dict())
+        violations = violation_service.list_violations_by_exam(exam_id, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
+    return jsonify({"items": [v.to_dict() for v in violations], "next_cursor": violations.next_cursor})
 
 
 @admin_violations_bp.route("/violations", methods=["GET"])
 @require_roles("admin")
 def list_violations():
     exam_id = request.args.get("exam_id", type=int)
-    violations = violation_service.list_violations_filtered(exam_id=exam_id)
-    return jsonify({"items": [v.to_dict() for v in violations]})
+    try:
+        limit, cursor = pagination.page_args(request.args)
+        violations = violation_service.list_violations_filtered(exam_id=exam_id, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
+    return jsonify({"items": [v.to_dict() for v in violations], "next_cursor": violations.next_cursor})
 
 
 @proctor_violations_bp.route("/violations/<int:violation_id>", methods=["PUT"])
@@ -135,6 +156,8 @@ def update_violation(violation_id: int):
             evidence_image=evidence,
             upload_folder=upload_folder,
         )
+    except ValueError as exc:
+        return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
     except IntegrityError:
         db.session.rollback()
         return jsonify({"message": "Constraint error updating violation."}), HTTPStatus.BAD_REQUEST
@@ -0,0 +1,124 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+import click
+from flask import Flask, current_app
+from flask.cli import AppGroup
+
+from .common.exceptions import MLServiceUnavailable
+from .services import checkin_service, embedding_service, idempotency_service, ml_service, stats_service
+
+
+def register_commands(app: Flask) -> None:
+    app.cli.add_command(exams_cli)
+    app.cli.add_command(checkins_cli)
+    app.cli.add_command(embeddings_cli)
+    app.cli.add_command(reports_cli)
+    app.cli.add_command(idempotency_cli)
+
+
+def _ml_client() -> ml_service.MLService:
+    return getattr(current_app, "ml_client", None) or ml_service.FakeMLService()
+
+
+exams_cli = AppGroup("exams", help="Exam day operations.")
+checkins_cli = AppGroup("checkins", help="Check-in maintenance.")
+embeddings_cli = AppGroup("embeddings", help="Reference photo face embeddings.")
+reports_cli = AppGroup("reports", help="Report counters.")
+idempotency_cli = AppGroup("idempotency", help="Stored Idempotency-Key responses.")
+
+
+@exams_cli.command("warmup")
+@click.argument("exam_id", type=int)
+@click.option("--force", is_flag=True, help="Re-encode photos that previously had no usable face.")
+def warmup_command(exam_id: int, force: bool):
+    """Precompute roster embeddings and preload the verification cache."""
+    report = embedding_service.warm_up_exam(exam_id, _ml_client(), force=force)
+    click.echo(json.dumps(report, indent=2))
+
+
+@checkins_cli.command("recover-verifications")
+@click.option(
+    "--older-than",
+    type=float,
+    default=0,
+    show_default=True,
+    help="Only rows queued at least this many seconds ago; use when workers are still running.",
+)
+def recover_verifications_command(older_than: float):
+    """Verify check-ins left queued by a restart (their background job was lost)."""
+    try:
+        report = checkin_service.recover_queued_verifications(_ml_client(), older_than=older_than)
+    except MLServiceUnavailable as exc:
+        raise click.ClickException(str(exc))
+    click.echo(json.dumps(report, indent=2))
+
+
+@embeddings_cli.command("backfill")
+@click.option("--batch-size", default=200, show_default=True, help="Photos encoded and committed per batch.")
+@click.option("--limit", type=int, default=None, help="Stop after this many photos.")
+@click.option(
+    "--checkpoint",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=Path("embedding_backfill.json"),
+    show_default=True,
+    help="File recording the last processed photo id; rerun to resume.",
+)
+@click.option("--restart", is_flag=True, help="Ignore an existing checkpoint and start from the first photo.")
+def backfill_command(batch_size: int, limit: Optional[int], checkpoint: Path, restart: bool):
+    """Encode reference photos that have no embedding yet, using every encoding worker."""
+    state = {"last_id": 0, "processed": 0, "encoded": 0}
+    if checkpoint.exists() and not restart:
+        state.update(json.loads(checkpoint.read_text()))
+        click.echo(f"Resuming after photo id {state['last_id']} ({state['processed']} already processed).")
+
+    started = time.monotonic()
+    processed = 0
+    batches = embedding_service.backfill_embeddings(
+        _ml_client(), batch_size=batch_size, after_id=state["last_id"], limit=limit
+    )
+    try:
+        for progress in batches:
+            processed += progress["batch_size"]
+            state["last_id"] = progress["last_id"]
+            state["processed"] += progress["batch_size"]
+            state["encoded"] += progress["encoded"]
+            _write_checkpoint(checkpoint, state)
+            click.echo(
+                f"id<={progress['last_id']}: {progress['batch_size']} photos, {progress['encoded']} encoded, "
+                f"{progress['no_face']} no face, {progress['multiple_faces']} multiple faces, "
+                f"{progress['missing_file']} missing, "
+                f"{progress['batch_size'] / max(progress['seconds'], 1e-6):.1f} images/s"
+            )
+    except MLServiceUnavailable as exc:
+        raise click.ClickException(f"{exc} Checkpoint left at photo id {state['last_id']}.")
+
+    elapsed = time.monotonic() - started
+    click.echo(
+        f"Done: {processed} photos in {elapsed:.1f}s ({processed / max(elapsed, 1e-6):.1f} images/s); "
+        f"checkpoint at photo id {state['last_id']}."
+    )
+
+
+def _write_checkpoint(path: Path, state: dict) -> None:
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(json.dumps(state))
+    os.replace(tmp_path, path)
+
+
+@reports_cli.command("rebuild-stats")
+@click.option("--exam-id", "exam_ids", type=int, multiple=True, help="Exam to rebuild (repeatable); default all.")
+def rebuild_stats_command(exam_ids):
+    """Recount exam_stats from checkins and violations to repair drift."""
+    rebuilt = stats_service.rebuild(exam_ids or None)
+    click.echo(f"Rebuilt stats for {rebuilt} exams.")
+
+
+@idempotency_cli.command("purge")
+def purge_idempotency_command():
+    """Delete idempotency keys past their TTL."""
+    removed = idempotency_service.purge_expired()
+    click.echo(f"Removed {removed} expired idempotency keys.")
@@ -1,8 +1,13 @@
+import hashlib
 from functools import wraps
 from http import HTTPStatus
 
-from flask import jsonify
-from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+
+from ..services import idempotency_service
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
 
 
 def require_roles(*allowed_roles):
@@ -27,3 +32,73 @@ def require_roles(*allowed_roles):
         return wrapper
 
     return decorator
+
+
+def idempotent(fn):
+    """
+    Honour an Idempotency-Key header on a POST. The first request with a key runs
+    and its response (anything below 500) is stored for IDEMPOTENCY_KEY_TTL seconds;
+    retries with the same key get that response back without running the view. A
+    retry arriving while the first is unfinished gets 409, until the first has held
+    the key for IDEMPOTENCY_LOCK_SECONDS; then the retry runs it again.
+    Place below @require_roles so keys are scoped to the authenticated user.
+    """
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (request.headers.get(IDEMPOTENCY_HEADER) or "").strip()
+        if not key:
+            return fn(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({"message": f"{IDEMPOTENCY_HEADER} must be at most 255 characters."}), HTTPStatus.BAD_REQUEST
+
+        scope = (int(get_jwt_identity()), request.endpoint, key)
+        request_hash = _request_fingerprint()
+        previous = idempotency_service.claim(
+            *scope,
+            request_hash,
+            current_app.config["IDEMPOTENCY_KEY_TTL"],
+            current_app.config["IDEMPOTENCY_LOCK_SECONDS"],
+        )
+        if previous is not None:
+            if previous.request_hash != request_hash:
+                return (
+                    jsonify({"message": f"{IDEMPOTENCY_HEADER} was already used for a different request."}),
+                    HTTPStatus.UNPROCESSABLE_ENTITY,
+                )
+            if previous.status_code is None:
+                return (
+                    jsonify({"message": f"A request with this {IDEMPOTENCY_HEADER} is still in progress."}),
+                    HTTPStatus.CONFLICT,
+                )
+            response = current_app.response_class(
+                previous.response_body, status=previous.status_code, mimetype="application/json"
+            )
+            response.headers["Idempotent-Replayed"] = "true"
+            return response
+
+        try:
+            response = make_response(fn(*args, **kwargs))
+        except Exception:
+            idempotency_service.release(*scope)
+            raise
+        if response.status_code >= 500:
+            idempotency_service.release(*scope)  # transient; let the retry run again
+        else:
+            idempotency_service.complete(*scope, response.status_code, response.get_data(as_text=True))
+        return response
+
+    return wrapper
+
+
+def _request_fingerprint() -> str:
+    """Hash of the path, form fields and uploaded file contents, to spot a key reused for another request."""
+    digest = hashlib.sha256(request.path.encode())
+    for name, value in sorted(request.form.items(multi=True)):
+        digest.update(f"\0{name}={value}".encode())
+    for name, storage in sorted(request.files.items(multi=True), key=lambda item: item[0]):
+        digest.update(f"\0{name}:{storage.filename}:".encode())
+        for chunk in iter(lambda: storage.stream.read(65536), b""):
+            digest.update(chunk)
+        storage.stream.seek(0)
+    return digest.hexdigest()
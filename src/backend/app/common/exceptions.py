@@ -0,0 +1,10 @@
+class MLServiceUnavailable(Exception):
+    """Face verification could not run right now; the caller should retry later."""
+
+
+class MLQueueFullError(MLServiceUnavailable):
+    """The encoding pool already has its maximum number of jobs in flight."""
+
+
+class MLTimeoutError(MLServiceUnavailable):
+    """An encoding job did not finish within the configured timeout."""
@@ -0,0 +1,67 @@
+"""
+Shared normalization for uploaded photos (check-in captures, reference photos,
+violation evidence): apply EXIF orientation, downscale, and re-encode compactly.
+"""
+import io
+from pathlib import Path
+from typing import Optional
+
+from flask import current_app
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+
+
+class NormalizedImage:
+    def __init__(self, data: bytes, extension: str, width: int, height: int):
+        self.data = data
+        self.extension = extension
+        self.width = width
+        self.height = height
+
+
+def normalize_image(data: bytes, max_dimension: int, image_format: str = "JPEG", quality: int = 85) -> NormalizedImage:
+    """Raises ValueError when the bytes are not a decodable image (or exceed Pillow's pixel limit)."""
+    try:
+        with Image.open(io.BytesIO(data)) as original:
+            image = ImageOps.exif_transpose(original)
+            image = image.convert("RGB")
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as exc:
+        raise ValueError("Uploaded file is not a valid image.") from exc
+
+    image.thumbnail((max_dimension, max_dimension))
+    output = io.BytesIO()
+    image.save(output, format=image_format, quality=quality, optimize=True)
+    return NormalizedImage(output.getvalue(), _EXTENSIONS.get(image_format.upper(), ".img"), *image.size)
+
+
+def normalize_upload(data: bytes) -> NormalizedImage:
+    """normalize_image using the app's IMAGE_* settings."""
+    config = current_app.config
+    return normalize_image(
+        data,
+        max_dimension=config["IMAGE_MAX_DIMENSION"],
+        image_format=config["IMAGE_FORMAT"],
+        quality=config["IMAGE_QUALITY"],
+    )
+
+
+def save_upload(
+    normalized: NormalizedImage,
+    original: bytes,
+    directory: Path,
+    stem: str,
+    original_name: Optional[str] = None,
+) -> Path:
+    """
+    Write the normalized image as <stem><ext>. The untouched upload is kept next to
+    it as <stem>.orig<ext> only when IMAGE_KEEP_ORIGINAL is enabled.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{stem}{normalized.extension}"
+    path.write_bytes(normalized.data)
+    if current_app.config["IMAGE_KEEP_ORIGINAL"]:
+        suffix = Path(original_name or "").suffix or ".bin"
+        (directory / f"{stem}.orig{suffix}").write_bytes(original)
+    return path
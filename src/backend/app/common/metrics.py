@@ -0,0 +1,281 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format. Metrics are
+module-level objects registered on `registry`; values live per process, so each
+worker is scraped separately.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(list(zip(self.labelnames, key)))} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge:
+    """A value read at scrape time from a callback (queue depths, pool sizes)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def set_function(self, callback: Callable[[], float]) -> None:
+        self.callback = callback
+
+    def samples(self) -> List[str]:
+        if self.callback is None:
+            return []
+        return [f"{self.name} {_format_value(self.callback())}"]
+
+
+class CounterFunction(Gauge):
+    """A monotonically increasing total kept elsewhere (e.g. cache hit counts), read at scrape time."""
+
+    kind = "counter"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts, sum, count]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(key, list(s[0]), s[1], s[2]) for key, s in sorted(self._series.items())]
+        for key, bucket_counts, total, count in items:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(pairs + [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        """Add a metric; registering a name twice returns the existing metric."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return registry.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, callback: Optional[Callable[[], float]] = None) -> Gauge:
+    return registry.register(Gauge(name, documentation, callback))
+
+
+def counter_function(name: str, documentation: str, callback: Callable[[], float]) -> CounterFunction:
+    return registry.register(CounterFunction(name, documentation, callback))
+
+
+def histogram(
+    name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+) -> Histogram:
+    return registry.register(Histogram(name, documentation, labelnames, buckets))
+
+
+class StageTimer:
+    """Wall time per named stage of one unit of work (seconds, accumulated)."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def update(self, stages: Dict[str, float]) -> None:
+        for name, seconds in stages.items():
+            self.add(name, seconds)
+
+    def as_milliseconds(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()}
+
+    def observe(self, metric: Histogram, **labels: str) -> None:
+        for name, seconds in self.stages.items():
+            metric.observe(seconds, stage=name, **labels)
+
+
+HTTP_REQUESTS = counter(
+    "http_requests_total",
+    "Requests served, by blueprint, endpoint, method and status.",
+    labelnames=("blueprint", "endpoint", "method", "status"),
+)
+HTTP_REQUEST_SECONDS = histogram(
+    "http_request_duration_seconds",
+    "Request latency by blueprint and endpoint.",
+    labelnames=("blueprint", "endpoint", "method"),
+)
+HTTP_UPLOAD_BYTES = counter(
+    "http_upload_bytes_total",
+    "Request body bytes received, by endpoint.",
+    labelnames=("endpoint",),
+)
+SQL_STATEMENTS = counter("sql_statements_total", "SQL statements executed, in and out of requests.")
+SQL_STATEMENTS_PER_REQUEST = histogram(
+    "sql_statements_per_request",
+    "SQL statements executed per request.",
+    labelnames=("endpoint",),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+SQL_SECONDS_PER_REQUEST = histogram(
+    "sql_seconds_per_request",
+    "Time spent in SQL per request.",
+    labelnames=("endpoint",),
+)
+ML_QUEUE_DEPTH = gauge("ml_queue_depth", "Face encoding jobs queued or running.")
+
+
+def instrument_app(app, engine) -> None:
+    """
+    Record request counts/latency, upload bytes and per-request SQL statement
+    counts/time (via engine cursor events) for every request served by app.
+    """
+    from flask import g, has_request_context, request  # noqa: WPS433 (import inside function)
+    from sqlalchemy import event  # noqa: WPS433
+
+    @app.before_request
+    def _start_request_metrics() -> None:
+        g.metrics_started = time.perf_counter()
+        g.sql_statements = 0
+        g.sql_seconds = 0.0
+
+    @app.after_request
+    def _record_request_metrics(response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+        blueprint = request.blueprint or ""
+        endpoint = request.endpoint or "unmatched"
+        HTTP_REQUESTS.inc(
+            blueprint=blueprint, endpoint=endpoint, method=request.method, status=str(response.status_code)
+        )
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started, blueprint=blueprint, endpoint=endpoint, method=request.method
+        )
+        if request.content_length:
+            HTTP_UPLOAD_BYTES.inc(request.content_length, endpoint=endpoint)
+        SQL_STATEMENTS_PER_REQUEST.observe(g.get("sql_statements", 0), endpoint=endpoint)
+        SQL_SECONDS_PER_REQUEST.observe(g.get("sql_seconds", 0.0), endpoint=endpoint)
+        return response
+
+    # The start time rides on the per-statement execution context, so a statement
+    # that raises (and never reaches after_cursor_execute) leaves nothing behind.
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        SQL_STATEMENTS.inc()
+        started = getattr(context, "_metrics_started", None)
+        if has_request_context() and "sql_statements" in g:
+            g.sql_statements += 1
+            if started is not None:
+                g.sql_seconds += time.perf_counter() - started
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    executor = getattr(app, "ml_executor", None)
+    if executor is not None:
+        ML_QUEUE_DEPTH.set_function(lambda: executor.pending)
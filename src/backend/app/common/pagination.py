@@ -0,0 +1,91 @@
+"""
+Keyset (cursor) pagination. A page is read with WHERE (sort keys) > (last row's
+keys) ORDER BY sort keys LIMIT n, so every page costs the same index range scan
+no matter how deep it is. Cursors are opaque base64 tokens of the last row's keys.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# (column, descending)
+SortKey = Tuple[Any, bool]
+
+
+class Page(list):
+    """The rows of one page; next_cursor is None on the last (or an unpaged) page."""
+
+    def __init__(self, items: Iterable = (), next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [{"dt": value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(payload, list) or len(payload) != size:
+            raise ValueError
+        return [
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value for value in payload
+        ]
+    except (ValueError, TypeError, KeyError, binascii.Error, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.") from None
+
+
+def page_args(args: Mapping[str, str]) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Read ?limit= and ?cursor= from request args. Without either the endpoint stays
+    unpaged; a cursor alone uses DEFAULT_PAGE_SIZE and limits are capped at
+    MAX_PAGE_SIZE. Raises ValueError for a non-positive or non-integer limit.
+    """
+    cursor = args.get("cursor") or None
+    raw_limit = args.get("limit")
+    if raw_limit in (None, ""):
+        return (DEFAULT_PAGE_SIZE if cursor else None), cursor
+    try:
+        limit = int(raw_limit)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be a positive integer.") from None
+    if limit < 1:
+        raise ValueError("limit must be a positive integer.")
+    return min(limit, MAX_PAGE_SIZE), cursor
+
+
+def _after(keys: Sequence[SortKey], values: Sequence[Any]):
+    """Rows strictly after values in the keys' ordering, expanded as OR of prefixes."""
+    clauses = []
+    for position, (column, descending) in enumerate(keys):
+        equal_prefix = [keys[i][0] == values[i] for i in range(position)]
+        beyond = column < values[position] if descending else column > values[position]
+        clauses.append(and_(*equal_prefix, beyond))
+    return or_(*clauses)
+
+
+def paginate(query, keys: Sequence[SortKey], limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+    """
+    Order query by keys (which must end in a unique column) and return one page.
+    With no limit the whole ordered result is returned, as the endpoints did before.
+    """
+    query = query.order_by(*[column.desc() if descending else column.asc() for column, descending in keys])
+    if cursor:
+        query = query.filter(_after(keys, decode_cursor(cursor, len(keys))))
+    if limit is None:
+        return Page(query.all())
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return Page(rows)
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(rows, encode_cursor([getattr(last, column.key) for column, _ in keys]))
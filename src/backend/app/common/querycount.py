@@ -0,0 +1,71 @@
+"""
+Count the SQL statements a block of code runs, through SQLAlchemy cursor events.
+Used by the test suite to put a statement budget on endpoints so that lazy loads
+turning a listing into one query per row (N+1) fail instead of slipping through.
+"""
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """More SQL statements ran than the budget allowed."""
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, min_count: int = 2) -> List[Tuple[str, int]]:
+        """
+        Statements whose SQL text ran at least min_count times (only the bound
+        parameters differed), most frequent first - the usual N+1 signature.
+        """
+        counts = Counter(_WHITESPACE.sub(" ", statement).strip() for statement in self.statements)
+        return [(statement, n) for statement, n in counts.most_common() if n >= min_count]
+
+    def report(self, limit: int = 5) -> str:
+        lines = [f"{self.count} SQL statements executed."]
+        for statement, n in self.repeated()[:limit]:
+            lines.append(f"  {n}x {statement[:200]}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def count_queries(target=Engine) -> Iterator[QueryCounter]:
+    """
+    Collect the statements executed on target (an Engine, or the Engine class to
+    watch every engine) by the current thread while the block runs.
+    """
+    counter = QueryCounter()
+    thread_id = threading.get_ident()
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread_id:
+            counter.statements.append(statement)
+
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(target, "before_cursor_execute", _before_cursor_execute)
+
+
+@contextmanager
+def query_budget(max_statements: int, target=Engine) -> Iterator[QueryCounter]:
+    """Raise QueryBudgetExceeded when the block runs more than max_statements statements."""
+    with count_queries(target) as counter:
+        yield counter
+    if counter.count > max_statements:
+        raise QueryBudgetExceeded(f"Query budget of {max_statements} exceeded. {counter.report()}")
@@ -0,0 +1,52 @@
+"""
+Chunked CSV / NDJSON encoders for export endpoints. Rows are consumed lazily so a
+response built from these generators holds only one chunk in memory at a time.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, Sequence
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def csv_chunks(columns: Sequence[str], rows: Iterable[Dict[str, Any]], chunk_rows: int = 500) -> Iterator[str]:
+    """Header line, then CSV text in chunks of chunk_rows rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        writer.writerow([_plain(row.get(column)) for column in columns])
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def ndjson_chunks(columns: Sequence[str], rows: Iterable[Dict[str, Any]], chunk_rows: int = 500) -> Iterator[str]:
+    """One JSON object per line, emitted in chunks of chunk_rows lines."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({column: _plain(row.get(column)) for column in columns}))
+        if len(lines) >= chunk_rows:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def export_chunks(export_format: str, columns: Sequence[str], rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    if export_format == "csv":
+        return csv_chunks(columns, rows)
+    return ndjson_chunks(columns, rows)
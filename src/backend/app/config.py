@@ -41,9 +41,50 @@ class Config:
     JWT_TOKEN_LOCATION = ["headers"]
     JWT_HEADER_TYPE = "Bearer"
 
+    # GET /metrics: scrapers send "Authorization: Bearer <METRICS_TOKEN>"; admins may use their JWT
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
     UPLOAD_FOLDER = os.getenv(
         "UPLOAD_FOLDER", str(BASE_DIR / "uploads")
     )
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB uploads
 
+    # Uploaded photos are re-oriented, downscaled and re-encoded before storage/face work
+    IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "1280"))  # px, longest side
+    IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "JPEG")
+    IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "85"))
+    IMAGE_KEEP_ORIGINAL = os.getenv("IMAGE_KEEP_ORIGINAL", "false").lower() in ("true", "1", "yes")
+
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*")
+
+    # Face verification ("fake" keeps the always-match stub, "face_recognition" uses dlib)
+    ML_PROVIDER = os.getenv("ML_PROVIDER", "fake")
+    ML_FACE_TOLERANCE = float(os.getenv("ML_FACE_TOLERANCE", "0.6"))
+    ML_EXAM_INDEX_MAX_AGE = float(os.getenv("ML_EXAM_INDEX_MAX_AGE", "300"))  # seconds
+    ML_EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("ML_EMBEDDING_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    ML_POOL_WORKERS = int(os.getenv("ML_POOL_WORKERS", str(os.cpu_count() or 1)))  # 0 = inline
+    ML_POOL_MAX_PENDING = int(os.getenv("ML_POOL_MAX_PENDING", "32"))
+    ML_JOB_TIMEOUT = float(os.getenv("ML_JOB_TIMEOUT", "10"))  # seconds
+
+    # Quality gate rejecting unusable captures before face encoding
+    ML_QUALITY_GATE = os.getenv("ML_QUALITY_GATE", "true").lower() in ("true", "1", "yes")
+    ML_QUALITY_MIN_BRIGHTNESS = float(os.getenv("ML_QUALITY_MIN_BRIGHTNESS", "40"))  # mean gray, 0-255
+    ML_QUALITY_MIN_SHARPNESS = float(os.getenv("ML_QUALITY_MIN_SHARPNESS", "60"))  # Laplacian variance
+    ML_QUALITY_MIN_FACE_SIZE = int(os.getenv("ML_QUALITY_MIN_FACE_SIZE", "64"))  # px
+    ML_QUALITY_DETECT_MAX_DIMENSION = int(os.getenv("ML_QUALITY_DETECT_MAX_DIMENSION", "480"))  # px
+
+    # Background workers that finish asynchronous check-ins (POST /checkins?async=1)
+    CHECKIN_ASYNC_WORKERS = int(os.getenv("CHECKIN_ASYNC_WORKERS", "4"))
+    CHECKIN_STATUS_MAX_WAIT = float(os.getenv("CHECKIN_STATUS_MAX_WAIT", "30"))  # long-poll cap, seconds
+    # Per-exam roster/seat/checked-in cache used by check-in scans; bounds staleness across processes
+    CHECKIN_CONTEXT_MAX_AGE = float(os.getenv("CHECKIN_CONTEXT_MAX_AGE", "60"))  # seconds
+    CHECKIN_BATCH_MAX_ITEMS = int(os.getenv("CHECKIN_BATCH_MAX_ITEMS", "200"))  # items per offline sync upload
+    IDEMPOTENCY_KEY_TTL = float(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))  # seconds a stored response is replayed
+    IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "120"))  # lease on an unfinished request
+    # Exam event streams (server-sent events). Events are brokered in-process, so run the
+    # API as one worker process (e.g. gunicorn -w 1 --threads N); with more, a stream
+    # misses writes handled by the other workers.
+    EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+    EVENTS_STREAM_MAX_SECONDS = float(os.getenv("EVENTS_STREAM_MAX_SECONDS", "300"))  # then the client reconnects
+    # Delta sync (?since=) rereads this many seconds before the watermark to catch late commits
+    SYNC_SAFETY_MARGIN_SECONDS = float(os.getenv("SYNC_SAFETY_MARGIN_SECONDS", "5"))
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .encoding import ImageSource
 
 
 class MLService(ABC):
@@ -10,24 +11,93 @@ class MLService(ABC):
     """
 
     @abstractmethod
-    def verify_student_face(self, student_id: int, uploaded_image_path: Path) -> Dict[str, object]:
+    def verify_student_face(
+        self, student_id: int, image: ImageSource, exam_id: Optional[int] = None
+    ) -> Dict[str, object]:
         """
-        Compare an uploaded face image against the student's reference embedding/photo.
+        Compare an uploaded face image (path, raw bytes or decoded array) against the
+        student's reference embedding/photo. Passing exam_id lets implementations answer from a per-exam roster cache.
 
-        Returns a dict: {match: bool, score: float, reason: str}
+        Returns a dict: {match: bool, score: float, reason: str}, optionally with
+        timings: {stage: seconds} for the decode/detect/encode/distance stages.
         """
         raise NotImplementedError
 
+    def verify_student_faces(
+        self, items: Sequence[Tuple[int, ImageSource]], exam_id: Optional[int] = None
+    ) -> List[Dict[str, object]]:
+        """
+        Batch variant of verify_student_face for (student_id, image) pairs.
+        Results are returned in input order. Implementations should override this
+        to amortize per-call overhead; the default simply loops.
+        """
+        return [self.verify_student_face(student_id, image, exam_id=exam_id) for student_id, image in items]
+
+    def identify_face(self, exam_id: int, image: ImageSource, top_k: int = 5) -> Dict[str, object]:
+        """
+        1:N search of an uploaded face against every reference embedding on the exam roster.
+
+        Returns a dict: {candidates: [{student_id, distance, score, match}], reason: str}
+        with candidates ordered best first.
+        """
+        return {"candidates": [], "reason": "not_supported"}
+
+    def encode_reference_photo(self, image: ImageSource) -> Dict[str, object]:
+        """
+        Compute the reference embedding for a stored photo so verification does not
+        have to re-encode it on every check-in.
+
+        Returns a dict: {embedding: bytes | None, face_count: int, reason: str}
+        """
+        return {"embedding": None, "face_count": 0, "reason": "not_supported"}
+
+    def encode_reference_photos(self, images: Sequence[ImageSource]) -> List[Dict[str, object]]:
+        """Batch variant of encode_reference_photo; results are returned in input order."""
+        return [self.encode_reference_photo(image) for image in images]
+
 
 class FakeMLService(MLService):
     """
     Deterministic fake for tests. Configure thresholds or behaviors via constructor.
     """
 
-    def __init__(self, should_match: bool = True, score: float = 0.95, reason: str = "ok"):
+    def __init__(
+        self,
+        should_match: bool = True,
+        score: float = 0.95,
+        reason: str = "ok",
+        embedding: Optional[bytes] = None,
+        candidates: Optional[List[int]] = None,
+    ):
         self.should_match = should_match
         self.score = score
         self.reason = reason
+        self.embedding = embedding
+        self.candidates = candidates or []
 
-    def verify_student_face(self, student_id: int, uploaded_image_path: Path) -> Dict[str, object]:
+    def verify_student_face(
+        self, student_id: int, image: ImageSource, exam_id: Optional[int] = None
+    ) -> Dict[str, object]:
         return {"match": self.should_match, "score": float(self.score), "reason": self.reason}
+
+    def verify_student_faces(
+        self, items: Sequence[Tuple[int, ImageSource]], exam_id: Optional[int] = None
+    ) -> List[Dict[str, object]]:
+        return [{"match": self.should_match, "score": float(self.score), "reason": self.reason} for _ in items]
+
+    def identify_face(self, exam_id: int, image: ImageSource, top_k: int = 5) -> Dict[str, object]:
+        candidates = [
+            {
+                "student_id": student_id,
+                "distance": 1.0 - float(self.score),
+                "score": float(self.score),
+                "match": self.should_match,
+            }
+            for student_id in self.candidates[:top_k]
+        ]
+        return {"candidates": candidates, "reason": self.reason if candidates else "no_match"}
+
+    def encode_reference_photo(self, image: ImageSource) -> Dict[str, object]:
+        if self.embedding is None:
+            return super().encode_reference_photo(image)
+        return {"embedding": self.embedding, "face_count": 1, "reason": "ok"}
@@ -0,0 +1,113 @@
+"""
+Pure helpers around face_recognition/numpy. Nothing here touches Flask or the
+database so the functions can be reused from worker processes and CLI tools.
+"""
+import hashlib
+import io
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from . import quality
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - library optional
+    np = None  # noqa: N816
+
+try:
+    import face_recognition  # type: ignore
+except Exception:  # pragma: no cover - library optional
+    face_recognition = None  # noqa: N816
+
+EMBEDDING_DTYPE = "float32"
+EMBEDDING_DIM = 128
+
+# A stored file, the raw bytes of an upload, or an already decoded RGB array
+ImageSource = Union[Path, str, bytes, "np.ndarray"]
+
+
+def is_available() -> bool:
+    return face_recognition is not None and np is not None
+
+
+def load_image(source: ImageSource) -> "np.ndarray":
+    """Decode an image source to an RGB array; in-memory uploads never touch the disk."""
+    if np is not None and isinstance(source, np.ndarray):
+        return source
+    if isinstance(source, (bytes, bytearray)):
+        return face_recognition.load_image_file(io.BytesIO(source))
+    return face_recognition.load_image_file(str(source))
+
+
+def encode_image(source: ImageSource) -> List["np.ndarray"]:
+    """Return one float32 embedding per face found in the image."""
+    image = load_image(source)
+    return [enc.astype(EMBEDDING_DTYPE) for enc in face_recognition.face_encodings(image)]
+
+
+def encode_capture(
+    source: ImageSource, thresholds: Optional[quality.QualityThresholds] = None
+) -> Tuple[Optional[str], List["np.ndarray"], Dict[str, float]]:
+    """
+    Encode a live capture behind the quality gate. Returns (reason, embeddings,
+    timings): a rejected frame gives its reason and no embeddings, a usable one
+    gives None and the embedding of the face the gate already located. timings
+    holds the seconds spent in the decode, detect and encode stages.
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    image = load_image(source)
+    timings["decode"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    if thresholds is None:
+        reason, locations = None, face_recognition.face_locations(image)
+    else:
+        reason, locations = quality.assess(image, thresholds)
+    timings["detect"] = time.perf_counter() - started
+    if reason is not None:
+        return reason, [], timings
+
+    started = time.perf_counter()
+    encodings = face_recognition.face_encodings(image, known_face_locations=locations)
+    timings["encode"] = time.perf_counter() - started
+    return None, [enc.astype(EMBEDDING_DTYPE) for enc in encodings], timings
+
+
+def embedding_to_bytes(embedding: "np.ndarray") -> bytes:
+    return np.ascontiguousarray(embedding, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def embedding_from_bytes(blob: bytes) -> "np.ndarray":
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+
+
+def stack_embeddings(embeddings: Sequence["np.ndarray"]) -> "np.ndarray":
+    """Copy individual embeddings into one contiguous (n, EMBEDDING_DIM) matrix."""
+    if not embeddings:
+        return np.empty((0, EMBEDDING_DIM), dtype=EMBEDDING_DTYPE)
+    return np.stack(embeddings).astype(EMBEDDING_DTYPE, copy=False)
+
+
+def embedding_hash(blob: bytes) -> str:
+    return hashlib.sha256(blob).hexdigest()
+
+
+def face_distances(references: Sequence["np.ndarray"], embedding: "np.ndarray") -> "np.ndarray":
+    """Euclidean distance from embedding to every reference row."""
+    matrix = np.asarray(references, dtype=EMBEDDING_DTYPE)
+    return np.linalg.norm(matrix - embedding, axis=1)
+
+
+def min_distances(references: Sequence["np.ndarray"], embeddings: Sequence["np.ndarray"]) -> "np.ndarray":
+    """
+    Closest reference distance for each (reference rows, embedding) pair, computed as
+    one vectorized pass over all rows rather than one face_distance call per pair.
+    """
+    counts = np.fromiter((len(rows) for rows in references), dtype=np.intp, count=len(references))
+    matrix = np.concatenate(references).astype(EMBEDDING_DTYPE, copy=False)
+    probes = np.repeat(np.asarray(embeddings, dtype=EMBEDDING_DTYPE), counts, axis=0)
+    distances = np.linalg.norm(matrix - probes, axis=1)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return np.minimum.reduceat(distances, offsets)
@@ -0,0 +1,85 @@
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Iterable, List, Optional
+
+from ..common.exceptions import MLQueueFullError, MLTimeoutError
+
+
+class EncodingExecutor:
+    """
+    Bounded process pool for CPU-bound face encoding. Request threads submit work
+    and wait on the future, so dlib never holds the GIL of a Flask worker.
+
+    max_workers=0 runs jobs inline in the calling thread (handy for tests/dev).
+    max_pending caps queued + running jobs; extra submissions fail fast with
+    MLQueueFullError instead of piling up behind a slow image.
+    """
+
+    def __init__(self, max_workers: int = 0, max_pending: int = 32, timeout: float = 10.0):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if max_workers > 0:
+            # spawn so workers do not inherit the app's open DB connections
+            self._pool = ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, fn: Callable[..., Any], *args: Any, block: bool = False) -> Future:
+        acquired = self._slots.acquire(timeout=self.timeout) if block else self._slots.acquire(blocking=False)
+        if not acquired:
+            raise MLQueueFullError("Face verification queue is full.")
+        with self._lock:
+            self._pending += 1
+
+        if self._pool is None:
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as exc:
+                future.set_exception(exc)
+        else:
+            try:
+                future = self._pool.submit(fn, *args)
+            except Exception:
+                self._release()
+                raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """Submit one job and wait for its result."""
+        return self._wait(self.submit(fn, *args), timeout)
+
+    def map(self, fn: Callable[..., Any], items: Iterable[Any], timeout: Optional[float] = None) -> List[Any]:
+        """Run fn over items in parallel, preserving order. Waits for free slots instead of failing."""
+        futures = [self.submit(fn, item, block=True) for item in items]
+        return [self._wait(future, timeout) for future in futures]
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _wait(self, future: Future, timeout: Optional[float]) -> Any:
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeoutError:
+            # cancel() only drops a job that has not started; one already running keeps
+            # its worker until it finishes. Its slot is released by the done callback,
+            # not here, so max_pending still counts it and a pile-up of timed-out
+            # encodes fails fast with MLQueueFullError instead of queueing unbounded.
+            future.cancel()
+            raise MLTimeoutError("Face verification timed out.")
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
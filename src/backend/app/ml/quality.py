@@ -0,0 +1,87 @@
+"""
+Cheap checks run on a live capture before the expensive face encoding. A frame
+that is too dark, blurry, faceless or shows a tiny face is rejected with a
+specific reason so the proctor can retake it straight away.
+"""
+import math
+from typing import List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - library optional
+    np = None  # noqa: N816
+
+try:
+    import face_recognition  # type: ignore
+except Exception:  # pragma: no cover - library optional
+    face_recognition = None  # noqa: N816
+
+# (top, right, bottom, left), the face_recognition box convention
+FaceLocation = Tuple[int, int, int, int]
+
+_GRAY_WEIGHTS = (0.299, 0.587, 0.114)
+
+
+class QualityThresholds(NamedTuple):
+    min_brightness: float = 40.0  # mean gray level, 0-255
+    min_sharpness: float = 60.0  # Laplacian variance of the face crop
+    min_face_size: int = 64  # px, shorter side of the face box
+    detect_max_dimension: int = 480  # px, longest side of the frame used for detection
+
+
+class QualityResult(NamedTuple):
+    reason: Optional[str]  # None when the capture is usable
+    locations: List[FaceLocation]  # face boxes in full-image coordinates
+
+
+def to_gray(image: "np.ndarray") -> "np.ndarray":
+    if image.ndim == 2:
+        return image.astype("float32", copy=False)
+    return image[..., :3].astype("float32") @ np.asarray(_GRAY_WEIGHTS, dtype="float32")
+
+
+def laplacian_variance(gray: "np.ndarray") -> float:
+    """Variance of the 4-neighbour Laplacian; low values mean few edges, i.e. blur."""
+    if gray.shape[0] < 3 or gray.shape[1] < 3:
+        return 0.0
+    lap = (
+        gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:] - 4.0 * gray[1:-1, 1:-1]
+    )
+    return float(lap.var())
+
+
+def detect_faces(image: "np.ndarray", max_dimension: int) -> List[FaceLocation]:
+    """HOG face detection on a strided copy of the frame, boxes scaled back up."""
+    height, width = image.shape[:2]
+    step = max(1, math.ceil(max(height, width) / max_dimension))
+    small = np.ascontiguousarray(image[::step, ::step])
+    locations = []
+    for top, right, bottom, left in face_recognition.face_locations(small, model="hog"):
+        locations.append(
+            (max(0, top * step), min(width, right * step), min(height, bottom * step), max(0, left * step))
+        )
+    return locations
+
+
+def assess(image: "np.ndarray", thresholds: QualityThresholds) -> QualityResult:
+    """
+    Run the checks cheapest first and stop at the first failure. The face boxes
+    found here are returned so the encoder does not have to detect them again.
+    """
+    height, width = image.shape[:2]
+    step = max(1, math.ceil(max(height, width) / thresholds.detect_max_dimension))
+    if float(to_gray(image[::step, ::step]).mean()) < thresholds.min_brightness:
+        return QualityResult("too_dark", [])
+
+    locations = detect_faces(image, thresholds.detect_max_dimension)
+    if not locations:
+        return QualityResult("no_face_detected", [])
+    if len(locations) > 1:
+        return QualityResult("multiple_faces_detected", locations)
+
+    top, right, bottom, left = locations[0]
+    if min(bottom - top, right - left) < thresholds.min_face_size:
+        return QualityResult("face_too_small", locations)
+    if laplacian_variance(to_gray(image[top:bottom, left:right])) < thresholds.min_sharpness:
+        return QualityResult("too_blurry", locations)
+    return QualityResult(None, locations)
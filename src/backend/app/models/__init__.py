@@ -3,6 +3,9 @@ from .exam import Exam
 from .room import Room
 from .checkin import Checkin
 from .violation import Violation
+from .report import ExamStats
+from .idempotency import IdempotencyKey
+from .sync import SyncTombstone
 from .seating import Seat, SeatAssignment, SeatingPlan
 from .student import ExamStudent, Student, StudentReferencePhoto
 from .user import Role, User
@@ -21,4 +24,7 @@ __all__ = [
     "Seat",
     "SeatAssignment",
     "Violation",
+    "ExamStats",
+    "IdempotencyKey",
+    "SyncTombstone",
 ]
@@ -1,9 +1,19 @@
 from datetime import datetime
 
 from sqlalchemy import func
+from sqlalchemy.dialects import sqlite
 
 from ..extensions import db
 
+# Column type for timestamps the database fills in. SQLite stores CURRENT_TIMESTAMP as
+# "YYYY-MM-DD HH:MM:SS" text but binds datetimes with microseconds, so a stored value
+# and the same value bound back (a pagination cursor, a sync watermark) would not
+# compare equal; store whole seconds there too, as MySQL's DATETIME does.
+Timestamp = db.DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
 
 class BaseModel(db.Model):
     """Base model that adds id and timestamp fields."""
@@ -11,9 +21,9 @@ class BaseModel(db.Model):
     __abstract__ = True
 
     id = db.Column(db.Integer, primary_key=True)
-    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = db.Column(Timestamp, server_default=func.now(), nullable=False)
     updated_at = db.Column(
-        db.DateTime(timezone=True),
+        Timestamp,
         server_default=func.now(),
         onupdate=func.now(),
         nullable=False,
@@ -1,5 +1,5 @@
 from ..extensions import db
-from .base import BaseModel
+from .base import BaseModel, Timestamp
 
 
 class Checkin(BaseModel):
@@ -13,8 +13,10 @@ class Checkin(BaseModel):
     is_face_match = db.Column(db.Boolean, default=False, nullable=False)
     is_seat_ok = db.Column(db.Boolean, default=False, nullable=False)
     decision_status = db.Column(db.String(20), default="pending", nullable=False)
+    verification_status = db.Column(db.String(20), default="completed", nullable=False)  # queued/completed/failed
+    verification_reason = db.Column(db.String(100))
     photo_path = db.Column(db.String(255))
-    checked_in_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), nullable=False)
+    checked_in_at = db.Column(Timestamp, server_default=db.func.now(), nullable=False)
     notes = db.Column(db.Text)
 
     exam = db.relationship("Exam", lazy="joined")
@@ -22,6 +24,11 @@ class Checkin(BaseModel):
 
     __table_args__ = (
         db.UniqueConstraint("exam_id", "student_id", name="uq_checkins_exam_student"),
+        # keyset pagination on (checked_in_at, id), per exam and across exams
+        db.Index("idx_checkins_exam_checked_in", "exam_id", "checked_in_at", "id"),
+        db.Index("idx_checkins_checked_in", "checked_in_at", "id"),
+        # delta sync on (updated_at, id) per exam
+        db.Index("idx_checkins_exam_updated", "exam_id", "updated_at", "id"),
     )
 
     def to_dict(self) -> dict:
@@ -35,8 +42,11 @@ class Checkin(BaseModel):
             "is_face_match": self.is_face_match,
             "is_seat_ok": self.is_seat_ok,
             "decision_status": self.decision_status,
+            "verification_status": self.verification_status,
+            "verification_reason": self.verification_reason,
             "photo_path": self.photo_path,
             "checked_in_at": self.checked_in_at.isoformat() if self.checked_in_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "notes": self.notes,
             "exam": {"id": self.exam.id, "title": self.exam.title, "code": self.exam.code} if self.exam else None,
             "student": {
@@ -13,3 +13,7 @@ class Exam(BaseModel):
 
     room = db.relationship("Room", back_populates="exams", lazy="joined")
     exam_students = db.relationship("ExamStudent", back_populates="exam", lazy="dynamic", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        db.Index("idx_exams_start_at", "start_at", "id"),
+    )
@@ -0,0 +1,26 @@
+from ..extensions import db
+
+
+class IdempotencyKey(db.Model):
+    """
+    Stored outcome of a POST sent with an Idempotency-Key header, so client retries
+    get the original response back. status_code is NULL while the first request is
+    still running. Rows are dropped after expires_at (see idempotency_service).
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    endpoint = db.Column(db.String(128), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "endpoint", "key", name="uq_idempotency_keys_scope"),
+        db.Index("idx_idempotency_keys_expires", "expires_at"),
+    )
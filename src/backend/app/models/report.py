@@ -0,0 +1,34 @@
+from sqlalchemy import func
+
+from ..extensions import db
+from .base import Timestamp
+
+
+class ExamStats(db.Model):
+    """Per-exam report counters, kept in step with checkins/violations by stats_service."""
+
+    __tablename__ = "exam_stats"
+
+    exam_id = db.Column(db.Integer, db.ForeignKey("exams.id", ondelete="CASCADE"), primary_key=True)
+    total_checkins = db.Column(db.Integer, default=0, nullable=False)
+    face_mismatches = db.Column(db.Integer, default=0, nullable=False)
+    seat_mismatches = db.Column(db.Integer, default=0, nullable=False)
+    approved = db.Column(db.Integer, default=0, nullable=False)
+    pending = db.Column(db.Integer, default=0, nullable=False)
+    violations_count = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(
+        Timestamp,
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            "total_checkins": self.total_checkins,
+            "face_mismatches": self.face_mismatches,
+            "seat_mismatches": self.seat_mismatches,
+            "approved": self.approved,
+            "pending": self.pending,
+            "violations_count": self.violations_count,
+        }
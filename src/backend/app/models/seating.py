@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from ..extensions import db
 from .base import BaseModel
 
@@ -54,12 +56,12 @@ class SeatAssignment(BaseModel):
     seating_plan = db.relationship("SeatingPlan", back_populates="seat_assignments", lazy="joined")
     student = db.relationship("Student", lazy="joined")
 
-    def to_dict(self) -> dict:
+    def to_dict(self, photos: Optional[List["StudentReferencePhoto"]] = None) -> dict:
         return {
             "id": self.id,
             "exam_id": self.exam_id,
             "seating_plan_id": self.seating_plan_id,
             "student_id": self.student_id,
             "seat_code": self.seat_code,
-            "student": self.student.to_dict() if self.student else None,
+            "student": self.student.to_dict(photos=photos) if self.student else None,
         }
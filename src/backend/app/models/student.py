@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from ..extensions import db
 from .base import BaseModel
 
@@ -12,13 +14,14 @@ class Student(BaseModel):
     exam_students = db.relationship("ExamStudent", back_populates="student", lazy="dynamic", cascade="all, delete-orphan")
     photos = db.relationship("StudentReferencePhoto", back_populates="student", lazy="dynamic", cascade="all, delete-orphan")
 
-    def to_dict(self) -> dict:
+    def to_dict(self, photos: Optional[List["StudentReferencePhoto"]] = None) -> dict:
+        """Listings pass photos preloaded in one query (student_service.photos_by_student)."""
         return {
             "id": self.id,
             "student_number": self.student_number,
             "full_name": self.full_name,
             "email": self.email,
-            "photos": [p.to_dict() for p in self.photos.all()],
+            "photos": [p.to_dict() for p in (self.photos.all() if photos is None else photos)],
         }
 
 
@@ -32,12 +35,12 @@ class ExamStudent(db.Model):
     exam = db.relationship("Exam", back_populates="exam_students", lazy="joined")
     student = db.relationship("Student", back_populates="exam_students", lazy="joined")
 
-    def to_dict(self) -> dict:
+    def to_dict(self, photos: Optional[List["StudentReferencePhoto"]] = None) -> dict:
         return {
             "exam_id": self.exam_id,
             "student_id": self.student_id,
             "status": self.status,
-            "student": self.student.to_dict() if self.student else None,
+            "student": self.student.to_dict(photos=photos) if self.student else None,
         }
 
 
@@ -46,6 +49,7 @@ class StudentReferencePhoto(BaseModel):
 
     student_id = db.Column(db.Integer, db.ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
     image_path = db.Column(db.String(255), nullable=False)
+    embedding = db.Column(db.LargeBinary)  # float32 face embedding, see app/ml/encoding.py
     embedding_hash = db.Column(db.String(255))
     meta_data = db.Column(db.JSON)
 
@@ -0,0 +1,18 @@
+from sqlalchemy import func
+
+from ..extensions import db
+from .base import Timestamp
+
+
+class SyncTombstone(db.Model):
+    """A deleted check-in or violation, kept so delta sync (?since=) can report the removal."""
+
+    __tablename__ = "sync_tombstones"
+
+    id = db.Column(db.Integer, primary_key=True)
+    exam_id = db.Column(db.Integer, db.ForeignKey("exams.id", ondelete="CASCADE"), nullable=False)
+    entity = db.Column(db.String(20), nullable=False)  # checkin / violation
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(Timestamp, server_default=func.now(), nullable=False)
+
+    __table_args__ = (db.Index("idx_sync_tombstones_exam_entity", "exam_id", "entity", "deleted_at", "id"),)
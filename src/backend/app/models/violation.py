@@ -15,6 +15,14 @@ class Violation(BaseModel):
     exam = db.relationship("Exam", lazy="joined")
     student = db.relationship("Student", lazy="joined")
 
+    __table_args__ = (
+        # keyset pagination on (created_at, id), per exam and across exams
+        db.Index("idx_violations_exam_created", "exam_id", "created_at", "id"),
+        db.Index("idx_violations_created", "created_at", "id"),
+        # delta sync on (updated_at, id) per exam
+        db.Index("idx_violations_exam_updated", "exam_id", "updated_at", "id"),
+    )
+
     def to_dict(self) -> dict:
         return {
             "id": self.id,
@@ -33,4 +41,5 @@ class Violation(BaseModel):
             if self.student
             else None,
             "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -7,6 +7,7 @@ from .api.reports import admin_reports_bp
 from .api.seating import seating_bp
 from .api.students import admin_students_bp
 from .api.checkins import proctor_checkins_bp
+from .api.metrics import metrics_bp
 from .api.violations import admin_violations_bp, proctor_violations_bp
 
 
@@ -22,3 +23,4 @@ def register_routes(app: Flask) -> None:
     app.register_blueprint(proctor_violations_bp)
     app.register_blueprint(admin_violations_bp)
     app.register_blueprint(admin_reports_bp)
+    app.register_blueprint(metrics_bp)
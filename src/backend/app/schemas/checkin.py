@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+
+def validate_checkin_batch_payload(data: Any, max_items: int) -> Tuple[Dict[str, Any], List[dict]]:
+    """
+    Expect the batch metadata of an offline sync upload:
+    {exam_id, items: [{client_id, student_id, photo, entered_seat_code?, captured_at?}]}
+    where photo names the multipart file field holding the capture.
+    Returns (validated, errors)
+    """
+    errors: List[dict] = []
+    validated: Dict[str, Any] = {}
+
+    if not isinstance(data, dict):
+        return validated, [{"message": "metadata must be a JSON object."}]
+
+    try:
+        exam_id = int(data.get("exam_id"))
+        if exam_id <= 0:
+            raise ValueError
+    except (ValueError, TypeError):
+        return validated, [{"field": "exam_id", "message": "exam_id must be a positive integer"}]
+
+    items = data.get("items")
+    if not isinstance(items, list) or not items:
+        return validated, [{"field": "items", "message": "items must be a non-empty list."}]
+    if len(items) > max_items:
+        return validated, [{"field": "items", "message": f"A batch may hold at most {max_items} items."}]
+
+    seen_clients = set()
+    seen_photos = set()
+    cleaned: List[Dict[str, Any]] = []
+    for idx, item in enumerate(items, start=1):
+        if not isinstance(item, dict):
+            errors.append({"index": idx, "message": "Each item must be an object."})
+            continue
+
+        client_id = str(item.get("client_id") or "").strip()
+        if not client_id:
+            errors.append({"index": idx, "field": "client_id", "message": "client_id is required"})
+            continue
+        if client_id in seen_clients:
+            errors.append({"index": idx, "field": "client_id", "message": "Duplicate client_id in payload"})
+            continue
+
+        try:
+            student_id = int(item.get("student_id"))
+            if student_id <= 0:
+                raise ValueError
+        except (ValueError, TypeError):
+            errors.append({"index": idx, "field": "student_id", "message": "student_id must be a positive integer"})
+            continue
+
+        photo_field = str(item.get("photo") or "").strip()
+        if not photo_field:
+            errors.append({"index": idx, "field": "photo", "message": "photo must name an uploaded file field"})
+            continue
+        if photo_field in seen_photos:
+            errors.append({"index": idx, "field": "photo", "message": "Duplicate photo field in payload"})
+            continue
+
+        captured_at = None
+        if item.get("captured_at"):
+            try:
+                captured_at = datetime.fromisoformat(str(item["captured_at"]))
+            except ValueError:
+                errors.append({"index": idx, "field": "captured_at", "message": "captured_at must be an ISO datetime"})
+                continue
+
+        seen_clients.add(client_id)
+        seen_photos.add(photo_field)
+        cleaned.append(
+            {
+                "client_id": client_id,
+                "student_id": student_id,
+                "photo": photo_field,
+                "entered_seat_code": str(item.get("entered_seat_code") or ""),
+                "captured_at": captured_at,
+            }
+        )
+
+    validated["exam_id"] = exam_id
+    validated["items"] = cleaned
+    return validated, errors
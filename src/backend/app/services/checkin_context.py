@@ -0,0 +1,136 @@
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from ..extensions import db
+from ..models import Checkin, Exam, ExamStudent, SeatAssignment, SeatingPlan
+
+
+class CheckinContext:
+    """
+    Everything a check-in scan looks up before its insert, for one exam: the exam,
+    its seating plan, the roster, student -> seat assignment and the set of students
+    already checked in. Built with a handful of queries and then read from memory;
+    seating and roster writes drop it (see invalidate_checkin_context).
+    """
+
+    def __init__(
+        self,
+        exam_id: int,
+        seating_plan_id: Optional[int],
+        roster: Set[int],
+        seats: Dict[int, Tuple[int, str]],
+        checked_in: Set[int],
+    ):
+        self.exam_id = exam_id
+        self.seating_plan_id = seating_plan_id
+        self.roster = roster
+        self.seats = seats  # student_id -> (seat_assignment_id, seat_code)
+        self.checked_in = checked_in
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, exam_id: int) -> Optional["CheckinContext"]:
+        if db.session.query(Exam.id).filter(Exam.id == exam_id).first() is None:
+            return None
+        plan = db.session.query(SeatingPlan.id).filter(SeatingPlan.exam_id == exam_id).first()
+        roster = {sid for (sid,) in db.session.query(ExamStudent.student_id).filter(ExamStudent.exam_id == exam_id)}
+        seats = {
+            student_id: (assignment_id, seat_code)
+            for assignment_id, student_id, seat_code in db.session.query(
+                SeatAssignment.id, SeatAssignment.student_id, SeatAssignment.seat_code
+            ).filter(SeatAssignment.exam_id == exam_id)
+        }
+        checked_in = {sid for (sid,) in db.session.query(Checkin.student_id).filter(Checkin.exam_id == exam_id)}
+        return cls(exam_id, plan.id if plan else None, roster, seats, checked_in)
+
+    def on_roster(self, student_id: int) -> bool:
+        """
+        Roster membership. Other workers' roster changes do not invalidate this
+        process's copy, so a miss is re-checked against the database (picking up the
+        student's seat too) before the student is treated as not enrolled.
+        """
+        if student_id in self.roster:
+            return True
+        enrolled = (
+            db.session.query(ExamStudent.student_id)
+            .filter(ExamStudent.exam_id == self.exam_id, ExamStudent.student_id == student_id)
+            .first()
+        )
+        if enrolled is None:
+            return False
+        seat = (
+            db.session.query(SeatAssignment.id, SeatAssignment.seat_code)
+            .filter(SeatAssignment.exam_id == self.exam_id, SeatAssignment.student_id == student_id)
+            .first()
+        )
+        with self._lock:
+            self.roster.add(student_id)
+            if seat is not None:
+                self.seats[student_id] = (seat.id, seat.seat_code)
+        return True
+
+    def seat_for(self, student_id: int, entered_seat_code: str = "") -> Tuple[Optional[int], Optional[str]]:
+        """
+        (seat_assignment_id, seat_code) when the exam has a plan and the student a seat.
+        Reseating on another worker does not invalidate this process's copy, so when the
+        cached seat disagrees with entered_seat_code the assignment is read again before
+        the scan is judged out of seat.
+        """
+        seat = self.seats.get(student_id, (None, None)) if self.seating_plan_id is not None else (None, None)
+        entered = (entered_seat_code or "").strip().upper()
+        if entered and (seat[1] or "").strip().upper() != entered:
+            seat = self._reload_seat(student_id)
+        return seat
+
+    def _reload_seat(self, student_id: int) -> Tuple[Optional[int], Optional[str]]:
+        plan = db.session.query(SeatingPlan.id).filter(SeatingPlan.exam_id == self.exam_id).first()
+        assignment = (
+            db.session.query(SeatAssignment.id, SeatAssignment.seat_code)
+            .filter(SeatAssignment.exam_id == self.exam_id, SeatAssignment.student_id == student_id)
+            .first()
+        )
+        with self._lock:
+            self.seating_plan_id = plan.id if plan else None
+            if assignment is None:
+                self.seats.pop(student_id, None)
+            else:
+                self.seats[student_id] = (assignment.id, assignment.seat_code)
+        if plan is None or assignment is None:
+            return None, None
+        return assignment.id, assignment.seat_code
+
+    def is_checked_in(self, student_id: int) -> bool:
+        return student_id in self.checked_in
+
+    def mark_checked_in(self, student_id: int) -> None:
+        with self._lock:
+            self.checked_in.add(student_id)
+
+
+_contexts: Dict[int, CheckinContext] = {}
+_contexts_lock = threading.Lock()
+
+
+def get_checkin_context(exam_id: int, max_age: Optional[float] = None) -> Optional[CheckinContext]:
+    """Cached context for an exam, rebuilt when older than max_age; None if the exam does not exist."""
+    with _contexts_lock:
+        context = _contexts.get(exam_id)
+    if context is not None and (max_age is None or time.monotonic() - context.built_at <= max_age):
+        return context
+
+    context = CheckinContext.build(exam_id)
+    if context is not None:
+        with _contexts_lock:
+            _contexts[exam_id] = context
+    return context
+
+
+def invalidate_checkin_context(exam_id: Optional[int] = None) -> None:
+    """Drop the cached context for one exam (seating or roster changed) or for all exams."""
+    with _contexts_lock:
+        if exam_id is None:
+            _contexts.clear()
+        else:
+            _contexts.pop(exam_id, None)
@@ -1,67 +1,382 @@
+import time
+import uuid
+from datetime import timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
+from flask import Flask, current_app
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from werkzeug.datastructures import FileStorage
 
+from ..common import images, metrics, pagination
+from ..common.exceptions import MLServiceUnavailable
 from ..extensions import db
-from ..models import Checkin, Exam, SeatAssignment, SeatingPlan, Student
-from ..services import ml_service, seating_service
+from ..models import Checkin, Exam, Student
+from ..services import exam_events, ml_service, seating_service, stats_service, sync_service
+from ..services.checkin_context import CheckinContext
+
+CHECKIN_STAGE_SECONDS = metrics.histogram(
+    "checkin_stage_seconds",
+    "Time spent per check-in pipeline stage.",
+    labelnames=("stage",),
+)
+CHECKIN_BATCH_STAGE_SECONDS = metrics.histogram(
+    "checkin_batch_stage_seconds",
+    "Time spent per stage of an offline check-in batch.",
+    labelnames=("stage",),
+)
+CHECKIN_BATCH_ITEMS = metrics.counter(
+    "checkin_batch_items_total",
+    "Offline check-in batch items, by outcome.",
+    labelnames=("status",),
+)
 
 
 def process_checkin(
-    exam: Exam,
-    student: Student,
-    seating_plan: Optional[SeatingPlan],
-    seat_assignment: Optional[SeatAssignment],
+    context: CheckinContext,
+    student_id: int,
     entered_seat_code: str,
     photo: FileStorage,
     upload_folder: Path,
     ml_client: ml_service.MLService,
+    defer_verification: bool = False,
+    timer: Optional[metrics.StageTimer] = None,
 ) -> Checkin:
-    # Prevent duplicate check-in
-    existing = Checkin.query.filter_by(exam_id=exam.id, student_id=student.id).first()
-    if existing:
+    """
+    Record a check-in. Roster, seat and duplicate lookups are answered by the exam's
+    CheckinContext, so the only statements are the insert and its counters. With
+    defer_verification the row is written as pending with verification_status
+    "queued" and face matching is handed to the background job pool (see
+    complete_verification). Per-stage timings are collected on timer (pass one to
+    read them back) and observed on CHECKIN_STAGE_SECONDS.
+    """
+    timer = timer or metrics.StageTimer()
+    started = time.perf_counter()
+    exam_id = context.exam_id
+
+    if not context.on_roster(student_id):
+        raise ValueError("Student is not on the roster for this exam.")
+    # Prevent duplicate check-in (the unique constraint still guards other processes)
+    if context.is_checked_in(student_id):
         raise ValueError("Student already checked in for this exam.")
 
     entered_seat_code_norm = (entered_seat_code or "").strip().upper()
 
-    # Save uploaded photo
-    upload_folder = Path(upload_folder)
-    upload_folder.mkdir(parents=True, exist_ok=True)
-    safe_name = Path(photo.filename).name
-    filename = f"checkin_exam{exam.id}_student{student.id}_{safe_name}"
-    photo_path = upload_folder / filename
-    photo.save(photo_path)
+    # Keep the upload in memory: it is normalized (oriented, downscaled) once, the ML
+    # service decodes those bytes directly and the file is written after verification.
+    with timer.stage("decode"):
+        original = photo.read()
+        normalized = images.normalize_upload(original)
+
+    # Face verification (may wait on the encoding pool)
+    face_result: Dict[str, object] = {"match": False, "reason": None}
+    if not defer_verification:
+        face_result = ml_client.verify_student_face(student_id, normalized.data, exam_id=exam_id)
+        timer.update(face_result.get("timings") or {})
+
+    # Persist the capture
+    with timer.stage("file_write"):
+        photo_path = images.save_upload(
+            normalized,
+            original,
+            upload_folder,
+            _capture_stem(upload_folder, exam_id, student_id, photo.filename, normalized.extension),
+            original_name=photo.filename,
+        )
+
+    checkin = _new_checkin(
+        context,
+        student_id,
+        entered_seat_code_norm,
+        face_result,
+        photo_path,
+        verification_status="queued" if defer_verification else "completed",
+    )
+    with timer.stage("db_write"):
+        try:
+            db.session.add(checkin)
+            stats_service.record_checkin(checkin)  # its UPDATE autoflushes the insert
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            photo_path.unlink(missing_ok=True)
+            if Checkin.query.filter_by(exam_id=exam_id, student_id=student_id).first() is None:
+                raise
+            context.mark_checked_in(student_id)
+            raise ValueError("Student already checked in for this exam.")
+    context.mark_checked_in(student_id)
+    exam_events.publish(exam_id, "checkin.created", checkin.to_dict())
+
+    if defer_verification:
+        submit_verification(current_app._get_current_object(), checkin.id, ml_client, image=normalized.data)
+
+    timer.add("total", time.perf_counter() - started)
+    timer.observe(CHECKIN_STAGE_SECONDS)
+    return checkin
+
+
+def process_checkin_batch(
+    context: CheckinContext,
+    items: List[Dict[str, Any]],
+    upload_folder: Path,
+    ml_client: ml_service.MLService,
+    timer: Optional[metrics.StageTimer] = None,
+) -> List[Dict[str, object]]:
+    """
+    Record check-ins queued on a proctor device while offline. Items carry
+    client_id, student_id, entered_seat_code, photo (a FileStorage) and an optional
+    captured_at used as checked_in_at. All captures are verified with one
+    verify_student_faces call, each row is inserted in its own savepoint so a
+    duplicate caught by uq_checkins_exam_student only skips that item, and the
+    batch (with its stats deltas) is committed once.
+
+    Returns one result per item, in input order: {client_id, status, message?, checkin?}
+    where status is "created", "duplicate" or "rejected".
+    """
+    timer = timer or metrics.StageTimer()
+    started = time.perf_counter()
+    exam_id = context.exam_id
+    results: List[Dict[str, object]] = [{"client_id": item["client_id"]} for item in items]
+
+    accepted = []  # (position, original bytes, normalized image)
+    claimed = set()
+    with timer.stage("decode"):
+        for pos, item in enumerate(items):
+            student_id = item["student_id"]
+            if not context.on_roster(student_id):
+                results[pos].update(status="rejected", message="Student is not on the roster for this exam.")
+                continue
+            if context.is_checked_in(student_id) or student_id in claimed:
+                results[pos].update(status="duplicate", message="Student already checked in for this exam.")
+                continue
+            original = item["photo"].read()
+            try:
+                normalized = images.normalize_upload(original)
+            except ValueError as exc:
+                results[pos].update(status="rejected", message=str(exc))
+                continue
+            claimed.add(student_id)
+            accepted.append((pos, original, normalized))
+
+    # One call for the whole batch: references are loaded once and the captures are
+    # spread over the encoding pool
+    face_results: List[Dict[str, object]] = []
+    if accepted:
+        with timer.stage("verify"):
+            face_results = ml_client.verify_student_faces(
+                [(items[pos]["student_id"], normalized.data) for pos, _, normalized in accepted], exam_id=exam_id
+            )
+
+    created = []
+    counts: Dict[str, int] = {}
+    for (pos, original, normalized), face_result in zip(accepted, face_results):
+        item = items[pos]
+        with timer.stage("file_write"):
+            photo_path = images.save_upload(
+                normalized,
+                original,
+                upload_folder,
+                _capture_stem(
+                    upload_folder, exam_id, item["student_id"], item["photo"].filename, normalized.extension
+                ),
+                original_name=item["photo"].filename,
+            )
+        checkin = _new_checkin(
+            context, item["student_id"], (item["entered_seat_code"] or "").strip().upper(), face_result, photo_path
+        )
+        if item.get("captured_at"):
+            checkin.checked_in_at = item["captured_at"]
+
+        with timer.stage("db_write"):
+            try:
+                with db.session.begin_nested():
+                    db.session.add(checkin)
+            except IntegrityError:
+                # Checked in from another device since the context was built
+                photo_path.unlink(missing_ok=True)
+                context.mark_checked_in(item["student_id"])
+                results[pos].update(status="duplicate", message="Student already checked in for this exam.")
+                continue
+        created.append((pos, checkin))
+        for name, value in stats_service.checkin_counts(checkin).items():
+            counts[name] = counts.get(name, 0) + value
+
+    if created:
+        with timer.stage("db_write"):
+            stats_service.apply_deltas(exam_id, counts)
+            created_ids = [checkin.id for _, checkin in created]
+            db.session.commit()
+            # Reload every committed row (with exam and student) in one query, instead of
+            # one refresh per row when each is serialized below
+            Checkin.query.filter(Checkin.id.in_(created_ids)).execution_options(populate_existing=True).all()
+    for pos, checkin in created:
+        context.mark_checked_in(checkin.student_id)
+        results[pos].update(status="created", checkin=checkin.to_dict())
+        exam_events.publish(exam_id, "checkin.created", results[pos]["checkin"])
+
+    for result in results:
+        CHECKIN_BATCH_ITEMS.inc(status=result["status"])
+    timer.add("total", time.perf_counter() - started)
+    timer.observe(CHECKIN_BATCH_STAGE_SECONDS)
+    return results
+
+
+def complete_verification(
+    checkin_id: int, ml_client: ml_service.MLService, image: Optional[bytes] = None
+) -> Optional[Checkin]:
+    """
+    Run face verification for a queued check-in and record the decision. Pass the
+    upload bytes when still in memory; otherwise the stored photo is read back.
+    """
+    checkin = Checkin.query.get(checkin_id)
+    if not checkin or checkin.verification_status != "queued":
+        return checkin
+
+    timer = metrics.StageTimer()
+    try:
+        face_result = ml_client.verify_student_face(
+            checkin.student_id, image if image is not None else Path(checkin.photo_path), exam_id=checkin.exam_id
+        )
+    except MLServiceUnavailable as exc:
+        checkin.verification_status = "failed"
+        checkin.verification_reason = str(exc)
+    else:
+        timer.update(face_result.get("timings") or {})
+        counted = stats_service.checkin_counts(checkin)
+        checkin.is_face_match = bool(face_result.get("match"))
+        checkin.decision_status = _decision_status(checkin.is_face_match, checkin.is_seat_ok)
+        checkin.verification_status = "completed"
+        checkin.verification_reason = face_result.get("reason")
+        stats_service.record_checkin_change(checkin.exam_id, counted, checkin)
+    with timer.stage("db_write"):
+        db.session.commit()
+    exam_events.publish(checkin.exam_id, "checkin.updated", checkin.to_dict())
+    timer.observe(CHECKIN_STAGE_SECONDS)
+    return checkin
+
 
-    # Face verification
-    face_result = ml_client.verify_student_face(student.id, photo_path)
+def recover_queued_verifications(ml_client: ml_service.MLService, older_than: float = 0) -> Dict[str, int]:
+    """
+    Finish check-ins left in verification_status "queued", e.g. by a restart that
+    dropped the background job pool, reading each capture back from disk. Only rows
+    created at least older_than seconds ago (by the database clock) are taken, so
+    jobs still in flight on running workers are left alone.
+    """
+    query = db.session.query(Checkin.id).filter(Checkin.verification_status == "queued")
+    if older_than > 0:
+        cutoff = db.session.scalar(select(func.now())) - timedelta(seconds=older_than)
+        query = query.filter(Checkin.created_at <= cutoff)
+    checkin_ids = [checkin_id for (checkin_id,) in query.order_by(Checkin.id)]
+
+    report = {"queued": len(checkin_ids), "completed": 0, "failed": 0, "errors": 0}
+    for checkin_id in checkin_ids:
+        try:
+            checkin = complete_verification(checkin_id, ml_client)
+        except MLServiceUnavailable:
+            db.session.rollback()
+            raise
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception("Recovering verification failed for check-in %s", checkin_id)
+            report["errors"] += 1
+            continue
+        if checkin is not None and checkin.verification_status in report:
+            report[checkin.verification_status] += 1
+    return report
+
+
+def submit_verification(
+    app: Flask, checkin_id: int, ml_client: ml_service.MLService, image: Optional[bytes] = None
+) -> None:
+    """Finish a deferred check-in on the app's background job pool."""
+    app.checkin_jobs.submit(_run_verification, app, checkin_id, ml_client, image)
+
+
+def _run_verification(
+    app: Flask, checkin_id: int, ml_client: ml_service.MLService, image: Optional[bytes]
+) -> None:
+    with app.app_context():
+        try:
+            complete_verification(checkin_id, ml_client, image=image)
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("Background verification failed for check-in %s", checkin_id)
+        finally:
+            db.session.remove()
+
+
+def identify_student(
+    exam: Exam,
+    photo: FileStorage,
+    ml_client: ml_service.MLService,
+    top_k: int = 5,
+) -> Dict[str, object]:
+    """Find the most likely roster students for a capture, without a prior student pick."""
+    result = ml_client.identify_face(exam.id, images.normalize_upload(photo.read()).data, top_k=top_k)
+
+    candidates = result.get("candidates") or []
+    student_ids = [candidate["student_id"] for candidate in candidates]
+    students = {s.id: s for s in Student.query.filter(Student.id.in_(student_ids))} if student_ids else {}
+    for candidate in candidates:
+        student = students.get(candidate["student_id"])
+        candidate["student"] = (
+            {"id": student.id, "full_name": student.full_name, "student_number": student.student_number}
+            if student
+            else None
+        )
+    return {"reason": result.get("reason"), "candidates": candidates}
+
+
+def _capture_stem(upload_folder: Path, exam_id: int, student_id: int, filename: str, extension: str) -> str:
+    # A duplicate attempt must not overwrite (and then unlink) the accepted check-in's photo
+    stem = f"checkin_exam{exam_id}_student{student_id}_{Path(filename).stem}"
+    if (Path(upload_folder) / f"{stem}{extension}").exists():
+        stem = f"{stem}_{uuid.uuid4().hex[:8]}"
+    return stem
+
+
+def _new_checkin(
+    context: CheckinContext,
+    student_id: int,
+    entered_seat_code_norm: str,
+    face_result: Dict[str, object],
+    photo_path: Path,
+    verification_status: str = "completed",
+) -> Checkin:
     is_face_match = bool(face_result.get("match"))
 
     # Seating compliance
-    assigned_code = seat_assignment.seat_code if seat_assignment else None
+    seat_assignment_id, assigned_code = context.seat_for(student_id, entered_seat_code_norm)
     is_seat_ok = seating_service.check_seat_compliance(assigned_code or "", entered_seat_code_norm)
 
-    decision_status = "approved" if is_face_match and is_seat_ok else "pending"
-
-    checkin = Checkin(
-        exam_id=exam.id,
-        student_id=student.id,
-        seating_plan_id=seating_plan.id if seating_plan else None,
-        seat_assignment_id=seat_assignment.id if seat_assignment else None,
+    return Checkin(
+        exam_id=context.exam_id,
+        student_id=student_id,
+        seating_plan_id=context.seating_plan_id,
+        seat_assignment_id=seat_assignment_id,
         seat_code_entered=entered_seat_code_norm,
         is_face_match=is_face_match,
         is_seat_ok=is_seat_ok,
-        decision_status=decision_status,
+        decision_status=_decision_status(is_face_match, is_seat_ok),
+        verification_status=verification_status,
+        verification_reason=face_result.get("reason"),
         photo_path=str(photo_path),
     )
-    db.session.add(checkin)
-    db.session.commit()
-    return checkin
 
 
-def list_checkins(exam_id: int) -> List[Checkin]:
-    return (
-        Checkin.query.filter(Checkin.exam_id == exam_id)
-        .order_by(Checkin.checked_in_at.desc())
-        .all()
-    )
+def _decision_status(is_face_match: bool, is_seat_ok: bool) -> str:
+    return "approved" if is_face_match and is_seat_ok else "pending"
+
+
+CHECKIN_ORDER = ((Checkin.checked_in_at, True), (Checkin.id, True))
+
+
+def list_checkins(exam_id: int, limit: Optional[int] = None, cursor: Optional[str] = None) -> pagination.Page:
+    return pagination.paginate(Checkin.query.filter(Checkin.exam_id == exam_id), CHECKIN_ORDER, limit, cursor)
+
+
+def checkin_changes(
+    exam_id: int, since: str, limit: Optional[int] = None, margin: float = 0
+) -> sync_service.Delta:
+    return sync_service.changes_since(Checkin, "checkin", exam_id, since, limit, margin)
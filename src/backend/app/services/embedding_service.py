@@ -0,0 +1,197 @@
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from flask import Flask, current_app
+from sqlalchemy import update
+
+from ..common.exceptions import MLServiceUnavailable
+from ..extensions import db
+from ..models import StudentReferencePhoto
+from ..services import ml_service, student_service
+
+
+def reference_photo_path(image_path: str) -> Path:
+    """Absolute path of a stored reference photo (see student_service.add_student_photo)."""
+    return Path(current_app.config["UPLOAD_FOLDER"]) / "reference" / Path(image_path).name
+
+
+def needs_embedding(photo: StudentReferencePhoto) -> bool:
+    """True for photos that were never run through a face encoder."""
+    return photo.embedding is None and "embedding_reason" not in (photo.meta_data or {})
+
+
+def compute_embeddings(
+    photos: Sequence[StudentReferencePhoto], ml_client: ml_service.MLService
+) -> Dict[int, Dict[str, object]]:
+    """
+    Encode photos in one batch call (spread over the encoding pool) and apply the
+    results to the rows. Photos whose file is gone are reported as missing_file.
+    The caller commits.
+    """
+    results: Dict[int, Dict[str, object]] = {}
+    present: List[StudentReferencePhoto] = []
+    for photo in photos:
+        if reference_photo_path(photo.image_path).is_file():
+            present.append(photo)
+        else:
+            results[photo.id] = {"embedding": None, "face_count": 0, "reason": "missing_file"}
+
+    encoded = ml_client.encode_reference_photos([reference_photo_path(photo.image_path) for photo in present])
+    for photo, result in zip(present, encoded):
+        ml_service.apply_reference_embedding(photo, result)
+        results[photo.id] = result
+    return results
+
+
+def warm_up_exam(exam_id: int, ml_client: ml_service.MLService, force: bool = False) -> Dict[str, object]:
+    """
+    Compute missing reference embeddings for an exam roster, preload the exam's
+    verification index and report which students are not ready for check-in.
+    """
+    roster_ids = [es.student_id for es in student_service.list_exam_roster(exam_id)]
+    photos = (
+        StudentReferencePhoto.query.filter(StudentReferencePhoto.student_id.in_(roster_ids))
+        .order_by(StudentReferencePhoto.id.asc())
+        .all()
+        if roster_ids
+        else []
+    )
+
+    pending = [photo for photo in photos if photo.embedding is None and (force or needs_embedding(photo))]
+    results = compute_embeddings(pending, ml_client) if pending else {}
+    if pending:
+        db.session.commit()
+
+    photos_by_student: Dict[int, List[StudentReferencePhoto]] = {}
+    for photo in photos:
+        photos_by_student.setdefault(photo.student_id, []).append(photo)
+
+    ml_service.invalidate_exam_index(exam_id)
+    index = ml_service.get_exam_index(exam_id)
+
+    missing_files = [pid for pid, result in results.items() if result.get("reason") == "missing_file"]
+
+    def face_count(photo: StudentReferencePhoto) -> int:
+        return int((photo.meta_data or {}).get("face_count", -1))
+
+    return {
+        "exam_id": exam_id,
+        "roster_size": len(roster_ids),
+        "students_ready": len(index.rows),
+        "coverage": round(len(index.rows) / len(roster_ids), 4) if roster_ids else 1.0,
+        "embeddings_computed": sum(1 for result in results.values() if result.get("embedding")),
+        "students_without_photos": [sid for sid in roster_ids if sid not in photos_by_student],
+        "students_without_embedding": [
+            sid for sid in roster_ids if sid in photos_by_student and sid not in index.rows
+        ],
+        "photos_no_face": [p.id for p in photos if p.embedding is None and face_count(p) == 0],
+        "photos_multiple_faces": [p.id for p in photos if p.embedding is None and face_count(p) > 1],
+        "photos_missing_file": missing_files,
+        "photos_not_encoded": [
+            p.id for p in photos if p.embedding is None and face_count(p) < 0 and p.id not in missing_files
+        ],
+    }
+
+
+_warm_ups: Dict[int, Dict[str, object]] = {}
+_warm_ups_lock = threading.Lock()
+
+
+def submit_warm_up(app: Flask, exam_id: int, ml_client: ml_service.MLService, force: bool = False) -> Dict[str, object]:
+    """
+    Run warm_up_exam on the app's background job pool and return the exam's warm-up
+    status (see warm_up_status). A warm-up already queued or running is not repeated.
+    """
+    with _warm_ups_lock:
+        status = _warm_ups.get(exam_id)
+        if status is not None and status["state"] in ("queued", "running"):
+            return dict(status)
+        status = {"exam_id": exam_id, "state": "queued", "report": None, "error": None}
+        _warm_ups[exam_id] = status
+    app.checkin_jobs.submit(_run_warm_up, app, exam_id, ml_client, force)
+    return dict(status)
+
+
+def warm_up_status(exam_id: int) -> Optional[Dict[str, object]]:
+    """{exam_id, state (queued/running/completed/failed), report, error} of the last warm-up in this process."""
+    with _warm_ups_lock:
+        status = _warm_ups.get(exam_id)
+        return dict(status) if status is not None else None
+
+
+def _set_warm_up(exam_id: int, **changes: object) -> None:
+    with _warm_ups_lock:
+        _warm_ups[exam_id].update(changes)
+
+
+def _run_warm_up(app: Flask, exam_id: int, ml_client: ml_service.MLService, force: bool) -> None:
+    _set_warm_up(exam_id, state="running")
+    with app.app_context():
+        try:
+            report = warm_up_exam(exam_id, ml_client, force=force)
+        except Exception as exc:
+            db.session.rollback()
+            app.logger.exception("Warm-up failed for exam %s", exam_id)
+            _set_warm_up(exam_id, state="failed", error=str(exc))
+        else:
+            _set_warm_up(exam_id, state="completed", report=report)
+        finally:
+            db.session.remove()
+
+
+def backfill_embeddings(
+    ml_client: ml_service.MLService,
+    batch_size: int = 200,
+    after_id: int = 0,
+    limit: Optional[int] = None,
+) -> Iterator[Dict[str, object]]:
+    """
+    Encode every reference photo without an embedding, in photo id order, yielding
+    one progress dict per committed batch. Resume by passing the last yielded
+    last_id as after_id. Encoding runs outside any transaction and each batch is
+    written with a single executemany UPDATE, so row locks are held only briefly.
+    """
+    processed = 0
+    while limit is None or processed < limit:
+        size = batch_size if limit is None else min(batch_size, limit - processed)
+        rows = (
+            db.session.query(StudentReferencePhoto.id, StudentReferencePhoto.image_path, StudentReferencePhoto.meta_data)
+            .filter(StudentReferencePhoto.id > after_id, StudentReferencePhoto.embedding.is_(None))
+            .order_by(StudentReferencePhoto.id.asc())
+            .limit(size)
+            .all()
+        )
+        db.session.rollback()  # release the read snapshot before the slow encoding step
+        if not rows:
+            return
+
+        started = time.monotonic()
+        present = [row for row in rows if reference_photo_path(row.image_path).is_file()]
+        encoded = ml_client.encode_reference_photos([reference_photo_path(row.image_path) for row in present])
+        unavailable = next((r["reason"] for r in encoded if r.get("reason") in ml_service.UNENCODED_REASONS), None)
+        if unavailable:
+            # Do not advance past photos we could not actually try
+            raise MLServiceUnavailable(f"Face encoder unavailable ({unavailable}).")
+
+        updates = [
+            {"id": row.id, **ml_service.reference_embedding_values(result, row.meta_data)}
+            for row, result in zip(present, encoded)
+        ]
+        if updates:
+            db.session.execute(update(StudentReferencePhoto), updates)
+            db.session.commit()
+            ml_service.invalidate_exam_index()
+
+        after_id = rows[-1].id
+        processed += len(rows)
+        yield {
+            "last_id": after_id,
+            "batch_size": len(rows),
+            "encoded": sum(1 for result in encoded if result.get("embedding")),
+            "no_face": sum(1 for result in encoded if result.get("reason") == "no_face_detected"),
+            "multiple_faces": sum(1 for result in encoded if result.get("reason") == "multiple_faces_detected"),
+            "missing_file": len(rows) - len(present),
+            "seconds": time.monotonic() - started,
+        }
@@ -0,0 +1,125 @@
+import json
+import queue
+import threading
+import uuid
+from collections import deque
+from typing import Deque, Dict, NamedTuple, Optional, Set
+
+from ..common import metrics
+
+
+class Event(NamedTuple):
+    id: str  # "<broker epoch>:<seq>", as sent to clients
+    seq: int
+    exam_id: int
+    type: str
+    data: dict
+
+
+class Subscription:
+    """One listener on an exam's events; reset is set when it fell too far behind to replay."""
+
+    def __init__(self, exam_id: int, max_pending: int):
+        self.exam_id = exam_id
+        self.events: "queue.Queue[Event]" = queue.Queue(maxsize=max_pending)
+        self.reset = False
+
+    def get(self, timeout: float) -> Optional[Event]:
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def offer(self, event: Event) -> None:
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            self.reset = True
+
+
+class ExamEventBroker:
+    """
+    In-process pub/sub of check-in and violation changes, keyed by exam. Services
+    publish after their commit; event streams subscribe. The last history_size
+    events per exam are kept so a reconnecting client (Last-Event-ID) misses
+    nothing. Only writes handled by this process are seen, so the API must run as a
+    single worker process for streams to be complete; event ids carry a per-broker
+    epoch so an id from before a restart, or from another worker, makes the client
+    resync.
+    """
+
+    def __init__(self, history_size: int = 256, max_pending: int = 1000):
+        self.history_size = history_size
+        self.max_pending = max_pending
+        self.epoch = uuid.uuid4().hex
+        self._last_seq = 0
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._history: Dict[int, Deque[Event]] = {}
+        self._dropped: Dict[int, int] = {}  # exam_id -> seq of the newest event evicted from history
+
+    def publish(self, exam_id: int, event_type: str, data: dict) -> Event:
+        with self._lock:
+            self._last_seq += 1
+            event = Event(f"{self.epoch}:{self._last_seq}", self._last_seq, exam_id, event_type, data)
+            history = self._history.setdefault(exam_id, deque(maxlen=self.history_size))
+            if len(history) == self.history_size:
+                self._dropped[exam_id] = history[0].seq
+            history.append(event)
+            subscribers = list(self._subscribers.get(exam_id, ()))
+        for subscription in subscribers:
+            subscription.offer(event)
+        return event
+
+    def subscribe(self, exam_id: int, last_event_id: Optional[str] = None) -> Subscription:
+        """
+        Start listening on an exam. With last_event_id, events published after it are
+        queued first; if some were already dropped from history, or the id was not
+        issued by this broker, the subscription starts with reset set so the client
+        reloads instead.
+        """
+        subscription = Subscription(exam_id, self.max_pending)
+        with self._lock:
+            if last_event_id:
+                last_seq = self._own_seq(last_event_id)
+                if last_seq is None or self._dropped.get(exam_id, 0) > last_seq:
+                    subscription.reset = True
+                else:
+                    for event in self._history.get(exam_id, ()):
+                        if event.seq > last_seq:
+                            subscription.offer(event)
+            self._subscribers.setdefault(exam_id, set()).add(subscription)
+        return subscription
+
+    def _own_seq(self, event_id: str) -> Optional[int]:
+        epoch, _, seq = event_id.rpartition(":")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self._last_seq:
+            return None
+        return int(seq)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.exam_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.exam_id]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+broker = ExamEventBroker()
+
+EVENT_SUBSCRIBERS = metrics.gauge(
+    "exam_event_subscribers", "Open exam event streams.", callback=broker.subscriber_count
+)
+
+
+def publish(exam_id: int, event_type: str, data: dict) -> Event:
+    return broker.publish(exam_id, event_type, data)
+
+
+def format_sse(event: Event) -> str:
+    return f"id: {event.id}\nevent: {event.type}\ndata: {json.dumps(event.data)}\n\n"
@@ -2,8 +2,11 @@ from typing import List, Optional
 
 from sqlalchemy.exc import IntegrityError
 
+from ..common import pagination
 from ..extensions import db
 from ..models import Exam, Room
+from ..services import ml_service
+from ..services.checkin_context import invalidate_checkin_context
 
 
 def exam_to_dict(exam: Exam) -> dict:
@@ -27,8 +30,11 @@ def room_to_dict(room: Room) -> dict:
 
 
 # Exams
-def list_exams() -> List[Exam]:
-    return Exam.query.order_by(Exam.start_at.asc()).all()
+EXAM_ORDER = ((Exam.start_at, False), (Exam.id, False))
+
+
+def list_exams(limit: Optional[int] = None, cursor: Optional[str] = None) -> pagination.Page:
+    return pagination.paginate(Exam.query, EXAM_ORDER, limit, cursor)
 
 
 def get_exam(exam_id: int) -> Optional[Exam]:
@@ -59,8 +65,11 @@ def update_exam(exam: Exam, validated: dict) -> Exam:
 
 
 def delete_exam(exam: Exam) -> None:
+    exam_id = exam.id
     db.session.delete(exam)
     _commit()
+    ml_service.invalidate_exam_index(exam_id)
+    invalidate_checkin_context(exam_id)
 
 
 # Rooms
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..models import IdempotencyKey
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def claim(
+    user_id: int, endpoint: str, key: str, request_hash: str, ttl: float, lock_seconds: float
+) -> Optional[IdempotencyKey]:
+    """
+    Reserve key for a new request and commit the reservation. Returns None when the
+    caller now owns the key, or the live row of an earlier request with the same key
+    (completed: replay it; status_code NULL: still running). Expired rows are reused,
+    and so is an unfinished claim older than lock_seconds (its worker died mid-request).
+    """
+    now = _utcnow()
+    existing = IdempotencyKey.query.filter_by(user_id=user_id, endpoint=endpoint, key=key).first()
+    if existing is not None:
+        if existing.expires_at > now:
+            if (
+                existing.status_code is None
+                and existing.request_hash == request_hash
+                and existing.created_at <= now - timedelta(seconds=lock_seconds)
+            ):
+                return _take_over(existing, now, ttl)
+            return existing
+        db.session.delete(existing)
+        db.session.flush()
+
+    db.session.add(
+        IdempotencyKey(
+            user_id=user_id,
+            endpoint=endpoint,
+            key=key,
+            request_hash=request_hash,
+            created_at=now,
+            expires_at=now + timedelta(seconds=ttl),
+        )
+    )
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another retry claimed it first
+        db.session.rollback()
+        return IdempotencyKey.query.filter_by(user_id=user_id, endpoint=endpoint, key=key).first()
+    return None
+
+
+def _take_over(stale: IdempotencyKey, now: datetime, ttl: float) -> Optional[IdempotencyKey]:
+    """Renew the lease on an abandoned claim; only one of several concurrent retries wins it."""
+    taken = IdempotencyKey.query.filter(
+        IdempotencyKey.id == stale.id,
+        IdempotencyKey.status_code.is_(None),
+        IdempotencyKey.created_at == stale.created_at,
+    ).update({"created_at": now, "expires_at": now + timedelta(seconds=ttl)}, synchronize_session=False)
+    db.session.commit()
+    if taken:
+        return None
+    return IdempotencyKey.query.filter_by(id=stale.id).first()
+
+
+def complete(user_id: int, endpoint: str, key: str, status_code: int, response_body: str) -> None:
+    """Record the response for a claimed key so later retries replay it."""
+    db.session.rollback()  # discard anything the view left uncommitted
+    IdempotencyKey.query.filter_by(user_id=user_id, endpoint=endpoint, key=key).update(
+        {"status_code": status_code, "response_body": response_body}, synchronize_session=False
+    )
+    db.session.commit()
+
+
+def release(user_id: int, endpoint: str, key: str) -> None:
+    """Drop a claim whose request failed transiently, so a retry runs it again."""
+    db.session.rollback()
+    IdempotencyKey.query.filter_by(user_id=user_id, endpoint=endpoint, key=key).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def purge_expired() -> int:
+    """Delete expired keys; returns how many were removed."""
+    removed = IdempotencyKey.query.filter(IdempotencyKey.expires_at <= _utcnow()).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
@@ -1,14 +1,240 @@
-from pathlib import Path
-from typing import Dict
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
-try:
-    import face_recognition  # type: ignore
-except Exception:  # pragma: no cover - library optional
-    face_recognition = None  # noqa: N816
+from sqlalchemy import and_
 
+from ..common import metrics
 from ..extensions import db
-from ..models import Student
+from ..ml import encoding
 from ..ml.client import FakeMLService, MLService
+from ..ml.executor import EncodingExecutor
+from ..ml.quality import QualityThresholds
+from ..models import ExamStudent, StudentReferencePhoto
+
+UNENCODED_REASONS = ("not_supported", "ml_library_unavailable")
+
+# Blobs fetched per query when filling reference cache misses
+_BLOB_FETCH_CHUNK = 500
+
+
+class ReferenceEmbeddingCache:
+    """
+    Process-wide LRU of decoded reference embeddings keyed by StudentReferencePhoto.id.
+    Entries carry the row's embedding_hash so a re-encoded photo is never served stale.
+    The cache is bounded by the bytes held in embedding arrays, not by entry count.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, Tuple[Optional[str], object]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, photo_id: int, embedding_hash: Optional[str] = None):
+        with self._lock:
+            entry = self._entries.get(photo_id)
+            if entry is None or (embedding_hash is not None and entry[0] != embedding_hash):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(photo_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, photo_id: int, embedding_hash: Optional[str], embedding) -> None:
+        with self._lock:
+            previous = self._entries.pop(photo_id, None)
+            if previous is not None:
+                self._bytes -= previous[1].nbytes
+            if embedding.nbytes > self.max_bytes:
+                return
+            self._entries[photo_id] = (embedding_hash, embedding)
+            self._bytes += embedding.nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def discard(self, photo_id: int) -> None:
+        with self._lock:
+            entry = self._entries.pop(photo_id, None)
+            if entry is not None:
+                self._bytes -= entry[1].nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+reference_cache = ReferenceEmbeddingCache()
+
+REFERENCE_CACHE_HITS = metrics.counter_function(
+    "ml_reference_cache_hits_total", "Reference embedding cache hits.", lambda: reference_cache.hits
+)
+REFERENCE_CACHE_MISSES = metrics.counter_function(
+    "ml_reference_cache_misses_total", "Reference embedding cache misses.", lambda: reference_cache.misses
+)
+REFERENCE_CACHE_EVICTIONS = metrics.counter_function(
+    "ml_reference_cache_evictions_total",
+    "Reference embeddings evicted to stay under the byte budget.",
+    lambda: reference_cache.evictions,
+)
+REFERENCE_CACHE_ENTRIES = metrics.gauge(
+    "ml_reference_cache_entries", "Reference embeddings held in the cache.", lambda: reference_cache.stats()["entries"]
+)
+REFERENCE_CACHE_BYTES = metrics.gauge(
+    "ml_reference_cache_bytes", "Bytes of embedding arrays held in the cache.", lambda: reference_cache.stats()["bytes"]
+)
+REFERENCE_CACHE_MAX_BYTES = metrics.gauge(
+    "ml_reference_cache_max_bytes", "Byte budget of the reference embedding cache.", lambda: reference_cache.max_bytes
+)
+
+
+def configure_reference_cache(max_bytes: int) -> None:
+    """Resize the shared cache (called from create_app); shrinking evicts on the next put."""
+    reference_cache.max_bytes = max_bytes
+
+
+def load_reference_embeddings(photos: Sequence[Tuple[int, Optional[str]]]) -> Dict[int, object]:
+    """
+    Decoded embeddings for (photo_id, embedding_hash) pairs. Cache hits skip the
+    database entirely; misses are fetched in chunked IN queries and cached.
+    """
+    embeddings: Dict[int, object] = {}
+    missing: List[int] = []
+    for photo_id, embedding_hash in photos:
+        cached = reference_cache.get(photo_id, embedding_hash)
+        if cached is None:
+            missing.append(photo_id)
+        else:
+            embeddings[photo_id] = cached
+
+    for offset in range(0, len(missing), _BLOB_FETCH_CHUNK):
+        chunk = missing[offset:offset + _BLOB_FETCH_CHUNK]
+        rows = db.session.query(
+            StudentReferencePhoto.id, StudentReferencePhoto.embedding_hash, StudentReferencePhoto.embedding
+        ).filter(StudentReferencePhoto.id.in_(chunk), StudentReferencePhoto.embedding.isnot(None))
+        for photo_id, embedding_hash, blob in rows:
+            embedding = encoding.embedding_from_bytes(blob)
+            reference_cache.put(photo_id, embedding_hash, embedding)
+            embeddings[photo_id] = embedding
+    return embeddings
+
+
+class ExamEmbeddingIndex:
+    """
+    Reference embeddings for one exam roster held as a single contiguous matrix.
+    Rows are grouped by student so each student maps to a slice of the matrix.
+    """
+
+    def __init__(self, exam_id: int, roster: List[int], row_student_ids: List[int], embeddings: list):
+        self.exam_id = exam_id
+        self.roster = frozenset(roster)
+        self.matrix = encoding.stack_embeddings(embeddings)
+        self.rows: Dict[int, slice] = {}
+        start = 0
+        for idx in range(1, len(row_student_ids) + 1):
+            if idx == len(row_student_ids) or row_student_ids[idx] != row_student_ids[start]:
+                self.rows[row_student_ids[start]] = slice(start, idx)
+                start = idx
+        # Dicts keep insertion order, so these line up with the matrix row groups
+        self._student_ids = list(self.rows)
+        self._starts = [rows.start for rows in self.rows.values()]
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, exam_id: int) -> "ExamEmbeddingIndex":
+        rows = (
+            db.session.query(ExamStudent.student_id, StudentReferencePhoto.id, StudentReferencePhoto.embedding_hash)
+            .outerjoin(
+                StudentReferencePhoto,
+                and_(
+                    StudentReferencePhoto.student_id == ExamStudent.student_id,
+                    StudentReferencePhoto.embedding.isnot(None),
+                ),
+            )
+            .filter(ExamStudent.exam_id == exam_id)
+            .order_by(ExamStudent.student_id.asc(), StudentReferencePhoto.id.asc())
+            .all()
+        )
+        embeddings = load_reference_embeddings(
+            [(photo_id, embedding_hash) for _, photo_id, embedding_hash in rows if photo_id is not None]
+        )
+        with_embedding = [(student_id, photo_id) for student_id, photo_id, _ in rows if photo_id in embeddings]
+        return cls(
+            exam_id,
+            [student_id for student_id, _, _ in rows],
+            [student_id for student_id, _ in with_embedding],
+            [embeddings[photo_id] for _, photo_id in with_embedding],
+        )
+
+    def __contains__(self, student_id: int) -> bool:
+        return student_id in self.roster
+
+    def student_embeddings(self, student_id: int) -> Optional["encoding.np.ndarray"]:
+        rows = self.rows.get(student_id)
+        return self.matrix[rows] if rows is not None else None
+
+    def nearest_students(self, embedding, top_k: int) -> List[Tuple[int, float]]:
+        """Closest roster students to an embedding as (student_id, distance), best first."""
+        if not self._student_ids or top_k <= 0:
+            return []
+        distances = encoding.face_distances(self.matrix, embedding)
+        per_student = encoding.np.minimum.reduceat(distances, self._starts)
+        k = min(top_k, len(per_student))
+        best = encoding.np.argpartition(per_student, k - 1)[:k]
+        best = best[encoding.np.argsort(per_student[best])]
+        return [(self._student_ids[pos], float(per_student[pos])) for pos in best]
+
+
+_exam_indexes: Dict[int, ExamEmbeddingIndex] = {}
+_exam_indexes_lock = threading.Lock()
+
+
+def get_exam_index(exam_id: int, max_age: Optional[float] = None) -> ExamEmbeddingIndex:
+    """Return the cached roster index for an exam, building it on first use."""
+    with _exam_indexes_lock:
+        index = _exam_indexes.get(exam_id)
+    if index is not None and (max_age is None or time.monotonic() - index.built_at <= max_age):
+        return index
+
+    index = ExamEmbeddingIndex.build(exam_id)
+    with _exam_indexes_lock:
+        _exam_indexes[exam_id] = index
+    return index
+
+
+def invalidate_exam_index(exam_id: Optional[int] = None) -> None:
+    """Drop the cached index for one exam (roster changed) or for all exams."""
+    with _exam_indexes_lock:
+        if exam_id is None:
+            _exam_indexes.clear()
+        else:
+            _exam_indexes.pop(exam_id, None)
+
+
+def invalidate_student_embeddings(student_id: int) -> None:
+    """Drop every cached index whose roster contains the student (reference photo changed)."""
+    with _exam_indexes_lock:
+        for exam_id in [eid for eid, index in _exam_indexes.items() if student_id in index]:
+            del _exam_indexes[exam_id]
 
 
 class FaceRecognitionService(MLService):
@@ -20,43 +246,202 @@ class FaceRecognitionService(MLService):
     register it in the app container.
     """
 
-    def __init__(self, tolerance: float = 0.6):
+    def __init__(
+        self,
+        tolerance: float = 0.6,
+        index_max_age: Optional[float] = None,
+        executor: Optional[EncodingExecutor] = None,
+        quality: Optional[QualityThresholds] = None,
+    ):
         self.tolerance = tolerance
+        self.index_max_age = index_max_age
+        self.executor = executor
+        self.quality = quality  # None disables the pre-encoding quality gate
+
+    def verify_student_face(
+        self, student_id: int, image: encoding.ImageSource, exam_id: Optional[int] = None
+    ) -> Dict[str, object]:
+        return self.verify_student_faces([(student_id, image)], exam_id=exam_id)[0]
+
+    def verify_student_faces(
+        self, items: Sequence[Tuple[int, encoding.ImageSource]], exam_id: Optional[int] = None
+    ) -> List[Dict[str, object]]:
+        if not encoding.is_available():
+            return [{"match": False, "score": 0.0, "reason": "ml_library_unavailable"} for _ in items]
 
-    def verify_student_face(self, student_id: int, uploaded_image_path: Path) -> Dict[str, object]:
-        student = Student.query.get(student_id)
-        if not student:
-            return {"match": False, "score": 0.0, "reason": "student_not_found"}
+        references = self._reference_embeddings({student_id for student_id, _ in items}, exam_id)
+        results: List[Optional[Dict[str, object]]] = [None] * len(items)
+        to_encode: List[int] = []
+        for pos, (student_id, _) in enumerate(items):
+            student_references = references.get(student_id)
+            if student_references is None or len(student_references) == 0:
+                results[pos] = {"match": False, "score": 0.0, "reason": "no_reference_embedding"}
+            else:
+                to_encode.append(pos)
 
-        ref_photo = (
-            db.session.query(Student)
-            .filter(Student.id == student_id)
-            .with_entities(Student.id)
-            .first()
-        )  # placeholder; replace with reference photo query when model added
+        encoded = self._encode_captures([items[pos][1] for pos in to_encode])
+        pending: List[int] = []
+        pending_references = []
+        pending_faces = []
+        for pos, (rejected, uploaded_faces, _) in zip(to_encode, encoded):
+            if rejected:
+                results[pos] = {"match": False, "score": 0.0, "reason": rejected}
+            elif len(uploaded_faces) == 0:
+                results[pos] = {"match": False, "score": 0.0, "reason": "no_face_detected"}
+            elif len(uploaded_faces) > 1:
+                results[pos] = {"match": False, "score": 0.0, "reason": "multiple_faces_detected"}
+            else:
+                pending.append(pos)
+                pending_references.append(references[items[pos][0]])
+                pending_faces.append(uploaded_faces[0])
 
-        if face_recognition is None:
-            return {"match": False, "score": 0.0, "reason": "ml_library_unavailable"}
+        distance_seconds = 0.0
+        if pending:
+            started = time.perf_counter()
+            distances = encoding.min_distances(pending_references, pending_faces)
+            distance_seconds = time.perf_counter() - started
+            for pos, distance in zip(pending, distances):
+                results[pos] = self._decide(float(distance))
 
-        # Load uploaded image
-        uploaded_image = face_recognition.load_image_file(str(uploaded_image_path))
-        uploaded_faces = face_recognition.face_encodings(uploaded_image)
+        matched = set(pending)
+        for pos, (_, _, timings) in zip(to_encode, encoded):
+            results[pos]["timings"] = {**timings, "distance": distance_seconds if pos in matched else 0.0}
+        return results
+
+    def identify_face(self, exam_id: int, image: encoding.ImageSource, top_k: int = 5) -> Dict[str, object]:
+        if not encoding.is_available():
+            return {"candidates": [], "reason": "ml_library_unavailable"}
+
+        index = get_exam_index(exam_id, max_age=self.index_max_age)
+        if not index.rows:
+            return {"candidates": [], "reason": "no_reference_embedding"}
+
+        rejected, uploaded_faces, _ = self._encode_captures([image])[0]
+        if rejected:
+            return {"candidates": [], "reason": rejected}
         if len(uploaded_faces) == 0:
-            return {"match": False, "score": 0.0, "reason": "no_face_detected"}
+            return {"candidates": [], "reason": "no_face_detected"}
         if len(uploaded_faces) > 1:
-            return {"match": False, "score": 0.0, "reason": "multiple_faces_detected"}
+            return {"candidates": [], "reason": "multiple_faces_detected"}
 
-        uploaded_embedding = uploaded_faces[0]
+        candidates = [
+            {"student_id": student_id, "distance": distance, "score": 1.0 - distance, "match": distance <= self.tolerance}
+            for student_id, distance in index.nearest_students(uploaded_faces[0], top_k)
+        ]
+        return {"candidates": candidates, "reason": "ok" if candidates[0]["match"] else "no_match"}
 
-        # Here we would load student's reference embeddings; stubbed as same image for illustration.
-        # Replace the following with actual reference embedding retrieval.
-        reference_embedding = uploaded_embedding
+    def _decide(self, distance: float) -> Dict[str, object]:
+        score = 1.0 - distance  # higher is better
+        match = distance <= self.tolerance
+        return {"match": bool(match), "score": score, "reason": "ok" if match else "mismatch"}
 
-        distances = face_recognition.face_distance([reference_embedding], uploaded_embedding)
-        score = 1.0 - float(distances[0])  # higher is better
-        match = distances[0] <= self.tolerance
+    def encode_reference_photo(self, image: encoding.ImageSource) -> Dict[str, object]:
+        return self.encode_reference_photos([image])[0]
 
-        return {"match": bool(match), "score": score, "reason": "ok" if match else "mismatch"}
+    def encode_reference_photos(self, images: Sequence[encoding.ImageSource]) -> List[Dict[str, object]]:
+        if not encoding.is_available():
+            return [{"embedding": None, "face_count": 0, "reason": "ml_library_unavailable"} for _ in images]
+
+        results = []
+        for faces in self._encode(list(images)):
+            if len(faces) == 0:
+                results.append({"embedding": None, "face_count": 0, "reason": "no_face_detected"})
+            elif len(faces) > 1:
+                results.append({"embedding": None, "face_count": len(faces), "reason": "multiple_faces_detected"})
+            else:
+                results.append({"embedding": encoding.embedding_to_bytes(faces[0]), "face_count": 1, "reason": "ok"})
+        return results
+
+    def _encode(self, images: List[encoding.ImageSource]) -> List[list]:
+        """Encode images through the app's process pool when one is configured."""
+        if not images:
+            return []
+        if self.executor is None:
+            return [encoding.encode_image(image) for image in images]
+        if len(images) == 1:
+            return [self.executor.run(encoding.encode_image, images[0])]
+        return self.executor.map(encoding.encode_image, images)
+
+    def _encode_captures(self, images: List[encoding.ImageSource]) -> List[Tuple[Optional[str], list, dict]]:
+        """Like _encode for live captures: each image first goes through the quality gate."""
+        if not images:
+            return []
+        encode = partial(encoding.encode_capture, thresholds=self.quality)
+        if self.executor is None:
+            return [encode(image) for image in images]
+        if len(images) == 1:
+            return [self.executor.run(encode, images[0])]
+        return self.executor.map(encode, images)
+
+    def _reference_embeddings(self, student_ids: Iterable[int], exam_id: Optional[int]) -> Dict[int, object]:
+        # Roster students are answered from the in-memory exam matrix; anyone else
+        # (or callers without an exam) falls back to one query for all of them.
+        references: Dict[int, object] = {}
+        missing = set(student_ids)
+        if exam_id is not None:
+            index = get_exam_index(exam_id, max_age=self.index_max_age)
+            for student_id in [sid for sid in missing if sid in index]:
+                references[student_id] = index.student_embeddings(student_id)
+                missing.discard(student_id)
+
+        if missing:
+            rows = (
+                db.session.query(
+                    StudentReferencePhoto.student_id, StudentReferencePhoto.id, StudentReferencePhoto.embedding_hash
+                )
+                .filter(
+                    StudentReferencePhoto.student_id.in_(missing),
+                    StudentReferencePhoto.embedding.isnot(None),
+                )
+                .order_by(StudentReferencePhoto.id.asc())
+                .all()
+            )
+            embeddings = load_reference_embeddings([(photo_id, embedding_hash) for _, photo_id, embedding_hash in rows])
+            grouped: Dict[int, list] = {}
+            for student_id, photo_id, _ in rows:
+                if photo_id in embeddings:
+                    grouped.setdefault(student_id, []).append(embeddings[photo_id])
+            for student_id, student_embeddings in grouped.items():
+                references[student_id] = encoding.stack_embeddings(student_embeddings)
+        return references
+
+
+def reference_embedding_values(result: Dict[str, object], meta_data: Optional[dict] = None) -> Dict[str, object]:
+    """Column values for a StudentReferencePhoto from an encode_reference_photo result."""
+    blob = result.get("embedding")
+    return {
+        "embedding": blob,
+        "embedding_hash": encoding.embedding_hash(blob) if blob else None,
+        "meta_data": {
+            **(meta_data or {}),
+            "face_count": int(result.get("face_count") or 0),
+            "embedding_reason": result.get("reason"),
+            "embedding_dtype": encoding.EMBEDDING_DTYPE if blob else None,
+        },
+    }
+
+
+def apply_reference_embedding(photo: StudentReferencePhoto, result: Dict[str, object]) -> None:
+    """Copy an encode_reference_photo result onto the photo row (caller commits)."""
+    if result.get("reason") in UNENCODED_REASONS:
+        # Provider could not run; leave the row untouched so a later backfill picks it up
+        return
+    for column, value in reference_embedding_values(result, photo.meta_data).items():
+        setattr(photo, column, value)
 
 
-__all__ = ["MLService", "FakeMLService", "FaceRecognitionService"]
+__all__ = [
+    "MLService",
+    "FakeMLService",
+    "FaceRecognitionService",
+    "ExamEmbeddingIndex",
+    "ReferenceEmbeddingCache",
+    "configure_reference_cache",
+    "load_reference_embeddings",
+    "reference_cache",
+    "apply_reference_embedding",
+    "reference_embedding_values",
+    "get_exam_index",
+    "invalidate_exam_index",
+    "invalidate_student_embeddings",
+]
@@ -1,38 +1,101 @@
-from typing import Dict, List, Optional
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
 
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, select
 
+from ..common import pagination
 from ..extensions import db
-from ..models import Checkin, Violation
+from ..models import Checkin, Exam, ExamStats, Student, Violation
+from ..services import stats_service
+from ..services.checkin_service import CHECKIN_ORDER
+from ..services.violation_service import VIOLATION_ORDER
+
+EXPORT_BATCH_SIZE = 1000
+
+CHECKIN_EXPORT_COLUMNS = (
+    "id",
+    "exam_id",
+    "exam_code",
+    "student_id",
+    "student_number",
+    "student_full_name",
+    "seat_code_entered",
+    "is_face_match",
+    "is_seat_ok",
+    "decision_status",
+    "verification_status",
+    "verification_reason",
+    "checked_in_at",
+    "photo_path",
+    "notes",
+)
+
+VIOLATION_EXPORT_COLUMNS = (
+    "id",
+    "exam_id",
+    "exam_code",
+    "student_id",
+    "student_number",
+    "student_full_name",
+    "checkin_id",
+    "reason",
+    "notes",
+    "evidence_image_path",
+    "created_at",
+)
 
 
 def get_summary(exam_id: Optional[int] = None) -> Dict[str, int]:
-    query = Checkin.query
-    if exam_id:
-        query = query.filter(Checkin.exam_id == exam_id)
+    """Read from the exam_stats counters (one row per exam) rather than recounting."""
+    return stats_service.get_stats(exam_id)
 
-    total_checkins = query.count()
-    face_mismatches = query.filter(Checkin.is_face_match.is_(False)).count()
-    seat_mismatches = query.filter(Checkin.is_seat_ok.is_(False)).count()
 
-    violations_query = Violation.query
-    if exam_id:
-        violations_query = violations_query.filter(Violation.exam_id == exam_id)
-    violations_count = violations_query.count()
+def get_summaries(
+    exam_ids: Optional[Sequence[int]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> List[Dict[str, object]]:
+    """
+    get_summary for many exams in one round trip: exams outer-joined to their
+    exam_stats rows. Dates filter on the exam start (end_date inclusive).
+    """
+    query = (
+        select(
+            Exam.id,
+            Exam.code,
+            Exam.title,
+            Exam.start_at,
+            *[func.coalesce(getattr(ExamStats, name), 0).label(name) for name in stats_service.COUNTERS],
+        )
+        .outerjoin(ExamStats, ExamStats.exam_id == Exam.id)
+        .order_by(Exam.start_at.asc(), Exam.id.asc())
+    )
+    if exam_ids:
+        query = query.where(Exam.id.in_(exam_ids))
+    if start_date:
+        query = query.where(Exam.start_at >= datetime.combine(start_date, time.min))
+    if end_date:
+        query = query.where(Exam.start_at < datetime.combine(end_date + timedelta(days=1), time.min))
 
-    return {
-        "total_checkins": total_checkins,
-        "face_mismatches": face_mismatches,
-        "seat_mismatches": seat_mismatches,
-        "violations_count": violations_count,
-    }
+    return [
+        {
+            "exam_id": row.id,
+            "exam_code": row.code,
+            "exam_title": row.title,
+            "start_at": row.start_at.isoformat() if row.start_at else None,
+            **{name: int(getattr(row, name)) for name in stats_service.COUNTERS},
+        }
+        for row in db.session.execute(query)
+    ]
 
 
 def list_checkins(
     exam_id: Optional[int] = None,
     face_match: Optional[bool] = None,
     seat_ok: Optional[bool] = None,
-) -> List[Checkin]:
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> pagination.Page:
     query = Checkin.query
     if exam_id:
         query = query.filter(Checkin.exam_id == exam_id)
@@ -40,11 +103,82 @@ def list_checkins(
         query = query.filter(Checkin.is_face_match.is_(face_match))
     if seat_ok is not None:
         query = query.filter(Checkin.is_seat_ok.is_(seat_ok))
-    return query.order_by(Checkin.checked_in_at.desc()).all()
+    return pagination.paginate(query, CHECKIN_ORDER, limit, cursor)
 
 
-def list_violations(exam_id: Optional[int] = None) -> List[Violation]:
+def list_violations(
+    exam_id: Optional[int] = None, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> pagination.Page:
     query = Violation.query
     if exam_id:
         query = query.filter(Violation.exam_id == exam_id)
-    return query.order_by(Violation.created_at.desc()).all()
+    return pagination.paginate(query, VIOLATION_ORDER, limit, cursor)
+
+
+def iter_checkin_rows(
+    exam_id: Optional[int] = None,
+    face_match: Optional[bool] = None,
+    seat_ok: Optional[bool] = None,
+) -> Iterator[Dict[str, object]]:
+    """
+    Flat check-in rows for export, read through a server-side cursor in batches
+    of EXPORT_BATCH_SIZE instead of loading every ORM object at once.
+    """
+    query = (
+        select(
+            Checkin.id,
+            Checkin.exam_id,
+            Exam.code.label("exam_code"),
+            Checkin.student_id,
+            Student.student_number,
+            Student.full_name.label("student_full_name"),
+            Checkin.seat_code_entered,
+            Checkin.is_face_match,
+            Checkin.is_seat_ok,
+            Checkin.decision_status,
+            Checkin.verification_status,
+            Checkin.verification_reason,
+            Checkin.checked_in_at,
+            Checkin.photo_path,
+            Checkin.notes,
+        )
+        .join(Exam, Exam.id == Checkin.exam_id)
+        .join(Student, Student.id == Checkin.student_id)
+        .order_by(Checkin.id.asc())
+    )
+    if exam_id:
+        query = query.where(Checkin.exam_id == exam_id)
+    if face_match is not None:
+        query = query.where(Checkin.is_face_match.is_(face_match))
+    if seat_ok is not None:
+        query = query.where(Checkin.is_seat_ok.is_(seat_ok))
+
+    for row in db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE)):
+        yield row._asdict()
+
+
+def iter_violation_rows(exam_id: Optional[int] = None) -> Iterator[Dict[str, object]]:
+    """Flat violation rows for export; see iter_checkin_rows."""
+    query = (
+        select(
+            Violation.id,
+            Violation.exam_id,
+            Exam.code.label("exam_code"),
+            Violation.student_id,
+            Student.student_number,
+            Student.full_name.label("student_full_name"),
+            Violation.checkin_id,
+            Violation.reason,
+            Violation.notes,
+            Violation.evidence_image_path,
+            Violation.created_at,
+        )
+        .join(Exam, Exam.id == Violation.exam_id)
+        .join(Student, Student.id == Violation.student_id)
+        .order_by(Violation.id.asc())
+    )
+    if exam_id:
+        query = query.where(Violation.exam_id == exam_id)
+
+    for row in db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE)):
+        yield row._asdict()
@@ -3,8 +3,10 @@ from typing import Any, Dict, List, Optional, Tuple
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 
+from ..common import pagination
 from ..extensions import db
 from ..models import Exam, ExamStudent, Seat, SeatAssignment, SeatingPlan, Student
+from .checkin_context import invalidate_checkin_context
 
 
 def check_seat_compliance(assigned_seat_code: str, entered_seat_code: str) -> bool:
@@ -43,6 +45,7 @@ def create_seating_plan(exam: Exam, validated: dict) -> SeatingPlan:
         )
 
     _commit()
+    invalidate_checkin_context(exam.id)
     return plan
 
 
@@ -124,11 +127,17 @@ def assign_seats(exam: Exam, plan: SeatingPlan, assignments: List[Dict[str, Any]
         saved.append(assignment)
 
     _commit()
+    invalidate_checkin_context(exam.id)
     return saved
 
 
-def list_seat_assignments(exam_id: int) -> List[SeatAssignment]:
-    return SeatAssignment.query.filter_by(exam_id=exam_id).all()
+SEAT_ASSIGNMENT_ORDER = ((SeatAssignment.seat_code, False), (SeatAssignment.id, False))
+
+
+def list_seat_assignments(
+    exam_id: int, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> pagination.Page:
+    return pagination.paginate(SeatAssignment.query.filter_by(exam_id=exam_id), SEAT_ASSIGNMENT_ORDER, limit, cursor)
 
 
 def _commit() -> None:
@@ -0,0 +1,113 @@
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..models import Checkin, ExamStats, Violation
+
+COUNTERS = ("total_checkins", "face_mismatches", "seat_mismatches", "approved", "pending", "violations_count")
+
+
+def checkin_counts(checkin: Checkin) -> Dict[str, int]:
+    """The counters one check-in contributes to its exam's stats row."""
+    return {
+        "total_checkins": 1,
+        "face_mismatches": int(checkin.is_face_match is False),
+        "seat_mismatches": int(checkin.is_seat_ok is False),
+        "approved": int(checkin.decision_status == "approved"),
+        "pending": int(checkin.decision_status == "pending"),
+    }
+
+
+def record_checkin(checkin: Checkin) -> None:
+    apply_deltas(checkin.exam_id, checkin_counts(checkin))
+
+
+def record_checkin_change(exam_id: int, before: Dict[str, int], checkin: Checkin) -> None:
+    """Adjust counters after a check-in's decision fields changed; before is checkin_counts() taken earlier."""
+    after = checkin_counts(checkin)
+    apply_deltas(exam_id, {name: after[name] - before[name] for name in after})
+
+
+def record_violation(exam_id: int, delta: int = 1) -> None:
+    apply_deltas(exam_id, {"violations_count": delta})
+
+
+def apply_deltas(exam_id: int, deltas: Dict[str, int]) -> None:
+    """
+    Add deltas to the exam's counters with a single atomic UPDATE in the caller's
+    transaction (the caller commits). The row is created on first use.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    statement = (
+        update(ExamStats)
+        .where(ExamStats.exam_id == exam_id)
+        .values({name: getattr(ExamStats, name) + delta for name, delta in deltas.items()})
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.execute(statement).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(ExamStats(exam_id=exam_id, **{name: 0 for name in COUNTERS}))
+    except IntegrityError:
+        pass  # created concurrently; fall through to the increment
+    db.session.execute(statement)
+
+
+def get_stats(exam_id: Optional[int] = None) -> Dict[str, int]:
+    """Counters for one exam (a single primary-key read) or summed over all exams."""
+    if exam_id:
+        row = db.session.get(ExamStats, exam_id)
+        return row.to_dict() if row else {name: 0 for name in COUNTERS}
+
+    totals = db.session.execute(
+        select(*[func.coalesce(func.sum(getattr(ExamStats, name)), 0).label(name) for name in COUNTERS])
+    ).one()
+    return {name: int(getattr(totals, name)) for name in COUNTERS}
+
+
+def rebuild(exam_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recount stats rows from checkins and violations (all exams by default) to
+    repair drift, e.g. after rows were removed by ON DELETE CASCADE. Commits and
+    returns the number of exams rebuilt.
+    """
+    checkin_query = select(
+        Checkin.exam_id,
+        func.count(Checkin.id),
+        func.sum(case((Checkin.is_face_match.is_(False), 1), else_=0)),
+        func.sum(case((Checkin.is_seat_ok.is_(False), 1), else_=0)),
+        func.sum(case((Checkin.decision_status == "approved", 1), else_=0)),
+        func.sum(case((Checkin.decision_status == "pending", 1), else_=0)),
+    ).group_by(Checkin.exam_id)
+    violation_query = select(Violation.exam_id, func.count(Violation.id)).group_by(Violation.exam_id)
+    stats_query = db.session.query(ExamStats)
+
+    if exam_ids is not None:
+        exam_ids = list(exam_ids)
+        if not exam_ids:
+            return 0
+        checkin_query = checkin_query.where(Checkin.exam_id.in_(exam_ids))
+        violation_query = violation_query.where(Violation.exam_id.in_(exam_ids))
+        stats_query = stats_query.filter(ExamStats.exam_id.in_(exam_ids))
+
+    counts: Dict[int, Dict[str, int]] = {}
+    for exam_id, total, face, seat, approved, pending in db.session.execute(checkin_query):
+        counts.setdefault(exam_id, {name: 0 for name in COUNTERS}).update(
+            total_checkins=int(total),
+            face_mismatches=int(face or 0),
+            seat_mismatches=int(seat or 0),
+            approved=int(approved or 0),
+            pending=int(pending or 0),
+        )
+    for exam_id, violations in db.session.execute(violation_query):
+        counts.setdefault(exam_id, {name: 0 for name in COUNTERS})["violations_count"] = int(violations)
+
+    stats_query.delete(synchronize_session=False)
+    db.session.add_all([ExamStats(exam_id=exam_id, **values) for exam_id, values in counts.items()])
+    db.session.commit()
+    return len(counts)
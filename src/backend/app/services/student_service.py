@@ -2,19 +2,28 @@ import csv
 import io
 import os
 import uuid
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from flask import current_app
 from werkzeug.utils import secure_filename
-from sqlalchemy import or_
+from sqlalchemy import and_, or_
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, load_only
 
+from ..common import images, pagination
 from ..extensions import db
-from ..models import Exam, ExamStudent, Student, StudentReferencePhoto
+from ..models import Checkin, Exam, ExamStudent, Student, StudentReferencePhoto, Violation
+from ..services import ml_service, stats_service, sync_service
+from ..services.checkin_context import invalidate_checkin_context
 
 
-def list_students(search: Optional[str] = None) -> List[Student]:
+STUDENT_ORDER = ((Student.student_number, False), (Student.id, False))
+ROSTER_ORDER = ((ExamStudent.student_id, False),)
+
+
+def list_students(
+    search: Optional[str] = None, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> pagination.Page:
     query = Student.query
     if search:
         like = f"%{search.strip()}%"
@@ -24,7 +33,28 @@ def list_students(search: Optional[str] = None) -> List[Student]:
                 Student.student_number.ilike(like),
             )
         )
-    return query.order_by(Student.student_number.asc()).all()
+    return pagination.paginate(query, STUDENT_ORDER, limit, cursor)
+
+
+def photos_by_student(student_ids: Iterable[int]) -> Dict[int, List[StudentReferencePhoto]]:
+    """
+    Reference photos for many students in one query, keyed by student id, so
+    listings do not lazy-load Student.photos per row. Embedding blobs are not loaded.
+    """
+    grouped: Dict[int, List[StudentReferencePhoto]] = {student_id: [] for student_id in student_ids}
+    if not grouped:
+        return grouped
+    photos = (
+        StudentReferencePhoto.query.options(
+            load_only(StudentReferencePhoto.student_id, StudentReferencePhoto.image_path, StudentReferencePhoto.created_at)
+        )
+        .filter(StudentReferencePhoto.student_id.in_(list(grouped)))
+        .order_by(StudentReferencePhoto.id.asc())
+        .all()
+    )
+    for photo in photos:
+        grouped[photo.student_id].append(photo)
+    return grouped
 
 
 def create_student(validated: dict) -> Student:
@@ -47,8 +77,18 @@ def update_student(student: Student, validated: dict) -> Student:
 
 
 def delete_student(student: Student) -> None:
+    # The database cascades the student's check-ins and violations away; recount those
+    # exams and leave tombstones for delta sync
+    affected_exams = _record_cascaded_deletions(Checkin.student_id == student.id, Violation.student_id == student.id)
+    roster_exams = {
+        exam_id for (exam_id,) in db.session.query(ExamStudent.exam_id).filter(ExamStudent.student_id == student.id)
+    }
     db.session.delete(student)
     _commit()
+    ml_service.invalidate_student_embeddings(student.id)
+    for exam_id in roster_exams | affected_exams:
+        invalidate_checkin_context(exam_id)
+    stats_service.rebuild(affected_exams)
 
 
 def get_student_by_id(student_id: int) -> Optional[Student]:
@@ -107,24 +147,30 @@ def import_roster_from_csv(exam: Exam, file_storage) -> Tuple[List[ExamStudent],
         created_records.append(exam_student)
 
     _commit()
+    ml_service.invalidate_exam_index(exam.id)
+    invalidate_checkin_context(exam.id)
     return created_records, []
 
 
-def add_student_photo(student: Student, file_storage) -> str:
-    filename = secure_filename(f"student_{student.id}_{file_storage.filename}")
-    
-    if os.path.exists(os.path.join(current_app.config["UPLOAD_FOLDER"], "reference", filename)):
-        filename = f"{uuid.uuid4().hex[:8]}_{filename}"
+def add_student_photo(student: Student, file_storage, ml_client: Optional[ml_service.MLService] = None) -> str:
+    original = file_storage.read()
+    normalized = images.normalize_upload(original)
+
+    reference_folder = os.path.join(current_app.config["UPLOAD_FOLDER"], "reference")
+    stem = os.path.splitext(secure_filename(f"student_{student.id}_{file_storage.filename}"))[0]
+    if os.path.exists(os.path.join(reference_folder, f"{stem}{normalized.extension}")):
+        stem = f"{uuid.uuid4().hex[:8]}_{stem}"
+
+    absolute_path = images.save_upload(normalized, original, reference_folder, stem, original_name=file_storage.filename)
+    relative_path = os.path.join("uploads", "reference", absolute_path.name)
 
-    relative_path = os.path.join("uploads", "reference", filename)
-    absolute_path = os.path.join(current_app.config["UPLOAD_FOLDER"], "reference", filename)
-    
-    os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
-    file_storage.save(absolute_path)
-    
     ref_photo = StudentReferencePhoto(student_id=student.id, image_path=relative_path)
+    if ml_client is not None:
+        # Encode once here so check-ins only have to encode the live capture
+        ml_service.apply_reference_embedding(ref_photo, ml_client.encode_reference_photo(normalized.data))
     db.session.add(ref_photo)
     _commit()
+    ml_service.invalidate_student_embeddings(student.id)
     return relative_path
 
 
@@ -132,23 +178,37 @@ def add_student_to_exam(exam_id: int, student_id: int) -> ExamStudent:
     exam_student = ExamStudent(exam_id=exam_id, student_id=student_id, status="enrolled")
     db.session.add(exam_student)
     _commit()
+    ml_service.invalidate_exam_index(exam_id)
+    invalidate_checkin_context(exam_id)
     return exam_student
 
 
 def remove_student_from_exam(exam_id: int, student_id: int) -> None:
     exam_student = ExamStudent.query.filter_by(exam_id=exam_id, student_id=student_id).first()
     if exam_student:
+        _record_cascaded_deletions(
+            and_(Checkin.exam_id == exam_id, Checkin.student_id == student_id),
+            and_(Violation.exam_id == exam_id, Violation.student_id == student_id),
+        )
         db.session.delete(exam_student)
         _commit()
+        ml_service.invalidate_exam_index(exam_id)
+        invalidate_checkin_context(exam_id)
+        stats_service.rebuild([exam_id])  # check-ins/violations for the pair are cascaded
 
 
-def list_exam_roster(exam_id: int) -> List[ExamStudent]:
-    return (
-        ExamStudent.query.options(joinedload(ExamStudent.student))
-        .filter(ExamStudent.exam_id == exam_id)
-        .order_by(ExamStudent.student_id.asc())
-        .all()
-    )
+def list_exam_roster(exam_id: int, limit: Optional[int] = None, cursor: Optional[str] = None) -> pagination.Page:
+    query = ExamStudent.query.options(joinedload(ExamStudent.student)).filter(ExamStudent.exam_id == exam_id)
+    return pagination.paginate(query, ROSTER_ORDER, limit, cursor)
+
+
+def _record_cascaded_deletions(checkin_filter, violation_filter) -> Set[int]:
+    """Tombstone the check-ins and violations a delete is about to cascade; returns their exam ids."""
+    checkins = db.session.query(Checkin.exam_id, Checkin.id).filter(checkin_filter).all()
+    violations = db.session.query(Violation.exam_id, Violation.id).filter(violation_filter).all()
+    sync_service.record_deletions("checkin", checkins)
+    sync_service.record_deletions("violation", violations)
+    return {exam_id for exam_id, _ in checkins + violations}
 
 
 def _commit() -> None:
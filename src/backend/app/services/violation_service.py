@@ -3,8 +3,10 @@ from typing import List, Optional
 
 from sqlalchemy.exc import IntegrityError
 
+from ..common import images, pagination
 from ..extensions import db
 from ..models import Checkin, Exam, Student, Violation
+from ..services import exam_events, stats_service, sync_service
 
 
 def get_violation(violation_id: int) -> Optional[Violation]:
@@ -25,10 +27,7 @@ def create_violation(
 
     evidence_path = None
     if evidence_image:
-        safe_name = Path(evidence_image.filename).name
-        filename = f"violation_exam{exam.id}_student{student.id}_{safe_name}"
-        evidence_path = upload_folder / filename
-        evidence_image.save(evidence_path)
+        evidence_path = _save_evidence(evidence_image, upload_folder, exam.id, student.id)
 
     violation = Violation(
         exam_id=exam.id,
@@ -39,23 +38,34 @@ def create_violation(
         evidence_image_path=str(evidence_path) if evidence_path else None,
     )
     db.session.add(violation)
+    stats_service.record_violation(exam.id)
     _commit()
+    exam_events.publish(exam.id, "violation.created", violation.to_dict())
     return violation
 
 
-def list_violations_by_exam(exam_id: int) -> List[Violation]:
-    return (
-        Violation.query.filter(Violation.exam_id == exam_id)
-        .order_by(Violation.created_at.desc())
-        .all()
-    )
+VIOLATION_ORDER = ((Violation.created_at, True), (Violation.id, True))
+
+
+def list_violations_by_exam(
+    exam_id: int, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> pagination.Page:
+    return pagination.paginate(Violation.query.filter(Violation.exam_id == exam_id), VIOLATION_ORDER, limit, cursor)
+
 
+def violation_changes(
+    exam_id: int, since: str, limit: Optional[int] = None, margin: float = 0
+) -> sync_service.Delta:
+    return sync_service.changes_since(Violation, "violation", exam_id, since, limit, margin)
 
-def list_violations_filtered(exam_id: Optional[int] = None) -> List[Violation]:
+
+def list_violations_filtered(
+    exam_id: Optional[int] = None, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> pagination.Page:
     query = Violation.query
     if exam_id:
         query = query.filter(Violation.exam_id == exam_id)
-    return query.order_by(Violation.created_at.desc()).all()
+    return pagination.paginate(query, VIOLATION_ORDER, limit, cursor)
 
 
 def update_violation(
@@ -69,6 +79,12 @@ def update_violation(
     evidence_image=None,
     upload_folder: Optional[Path] = None,
 ) -> Violation:
+    # Decode the new evidence first so an invalid image leaves the row untouched
+    evidence = None
+    if evidence_image and upload_folder:
+        original = evidence_image.read()
+        evidence = (images.normalize_upload(original), original, evidence_image.filename)
+
     if reason is not None:
         violation.reason = reason
 
@@ -78,12 +94,7 @@ def update_violation(
     if set_checkin:
         violation.checkin_id = checkin.id if checkin else None
 
-    if evidence_image and upload_folder:
-        upload_folder = Path(upload_folder)
-        upload_folder.mkdir(parents=True, exist_ok=True)
-        safe_name = Path(evidence_image.filename).name
-        filename = f"violation_exam{violation.exam_id}_student{violation.student_id}_{safe_name}"
-        evidence_path = upload_folder / filename
+    if evidence:
         # Replace existing evidence if present
         if violation.evidence_image_path:
             old_path = Path(violation.evidence_image_path)
@@ -92,10 +103,19 @@ def update_violation(
                     old_path.unlink()
             except OSError:
                 pass
-        evidence_image.save(evidence_path)
-        violation.evidence_image_path = str(evidence_path)
+        normalized, original, filename = evidence
+        violation.evidence_image_path = str(
+            images.save_upload(
+                normalized,
+                original,
+                upload_folder,
+                _evidence_stem(violation.exam_id, violation.student_id, filename),
+                original_name=filename,
+            )
+        )
 
     _commit()
+    exam_events.publish(violation.exam_id, "violation.updated", violation.to_dict())
     return violation
 
 
@@ -107,8 +127,27 @@ def delete_violation(violation: Violation) -> None:
                 path.unlink()
         except OSError:
             pass
+    exam_id, violation_id = violation.exam_id, violation.id
+    stats_service.record_violation(exam_id, -1)
+    sync_service.record_deletions("violation", [(exam_id, violation_id)])
     db.session.delete(violation)
     _commit()
+    exam_events.publish(exam_id, "violation.deleted", {"id": violation_id})
+
+
+def _evidence_stem(exam_id: int, student_id: int, filename: str) -> str:
+    return f"violation_exam{exam_id}_student{student_id}_{Path(filename).stem}"
+
+
+def _save_evidence(evidence_image, upload_folder: Path, exam_id: int, student_id: int) -> Path:
+    original = evidence_image.read()
+    return images.save_upload(
+        images.normalize_upload(original),
+        original,
+        upload_folder,
+        _evidence_stem(exam_id, student_id, evidence_image.filename),
+        original_name=evidence_image.filename,
+    )
 
 
 def _commit() -> None:
@@ -0,0 +1,26 @@
+"""add checkins verification status
+
+Revision ID: 20261018_add_checkins_verification_status
+Revises: 20261018_add_reference_photo_embedding
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_add_checkins_verification_status'
+down_revision = '20261018_add_reference_photo_embedding'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('checkins', sa.Column('verification_status', sa.String(length=20), server_default='completed', nullable=False))
+    op.add_column('checkins', sa.Column('verification_reason', sa.String(length=100), nullable=True))
+
+
+def downgrade():
+    op.drop_column('checkins', 'verification_reason')
+    op.drop_column('checkins', 'verification_status')
@@ -0,0 +1,61 @@
+"""add exam_stats counters table
+
+Revision ID: 20261018_add_exam_stats
+Revises: 20261018_add_checkins_verification_status
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_add_exam_stats'
+down_revision = '20261018_add_checkins_verification_status'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'exam_stats',
+        sa.Column('exam_id', sa.Integer(), sa.ForeignKey('exams.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('total_checkins', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('face_mismatches', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('seat_mismatches', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('approved', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('pending', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('violations_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    # Seed counters for existing exams
+    op.execute(
+        """
+        INSERT INTO exam_stats (exam_id, total_checkins, face_mismatches, seat_mismatches, approved, pending, violations_count)
+        SELECT e.id,
+               COALESCE(c.total_checkins, 0),
+               COALESCE(c.face_mismatches, 0),
+               COALESCE(c.seat_mismatches, 0),
+               COALESCE(c.approved, 0),
+               COALESCE(c.pending, 0),
+               COALESCE(v.violations_count, 0)
+        FROM exams e
+        LEFT JOIN (
+            SELECT exam_id,
+                   COUNT(*) AS total_checkins,
+                   SUM(CASE WHEN is_face_match = 0 THEN 1 ELSE 0 END) AS face_mismatches,
+                   SUM(CASE WHEN is_seat_ok = 0 THEN 1 ELSE 0 END) AS seat_mismatches,
+                   SUM(CASE WHEN decision_status = 'approved' THEN 1 ELSE 0 END) AS approved,
+                   SUM(CASE WHEN decision_status = 'pending' THEN 1 ELSE 0 END) AS pending
+            FROM checkins
+            GROUP BY exam_id
+        ) c ON c.exam_id = e.id
+        LEFT JOIN (
+            SELECT exam_id, COUNT(*) AS violations_count FROM violations GROUP BY exam_id
+        ) v ON v.exam_id = e.id
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('exam_stats')
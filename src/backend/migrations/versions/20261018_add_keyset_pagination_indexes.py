@@ -0,0 +1,31 @@
+"""add indexes backing keyset pagination
+
+Revision ID: 20261018_add_keyset_pagination_indexes
+Revises: 20261018_add_exam_stats
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_add_keyset_pagination_indexes'
+down_revision = '20261018_add_exam_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_checkins_exam_checked_in', 'checkins', ['exam_id', 'checked_in_at', 'id'])
+    op.create_index('idx_checkins_checked_in', 'checkins', ['checked_in_at', 'id'])
+    op.create_index('idx_violations_exam_created', 'violations', ['exam_id', 'created_at', 'id'])
+    op.create_index('idx_violations_created', 'violations', ['created_at', 'id'])
+    op.create_index('idx_exams_start_at', 'exams', ['start_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('idx_exams_start_at', table_name='exams')
+    op.drop_index('idx_violations_created', table_name='violations')
+    op.drop_index('idx_violations_exam_created', table_name='violations')
+    op.drop_index('idx_checkins_checked_in', table_name='checkins')
+    op.drop_index('idx_checkins_exam_checked_in', table_name='checkins')
@@ -0,0 +1,24 @@
+"""add student_reference_photos embedding
+
+Revision ID: 20261018_add_reference_photo_embedding
+Revises: 20260109_rename_metadata_to_meta_data
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_add_reference_photo_embedding'
+down_revision = '20260109_rename_metadata_to_meta_data'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('student_reference_photos', sa.Column('embedding', sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('student_reference_photos', 'embedding')
@@ -0,0 +1,39 @@
+"""add sync_tombstones table and updated_at indexes for delta sync
+
+Revision ID: 20261018_add_sync_tombstones
+Revises: 20261018_add_idempotency_keys
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_add_sync_tombstones'
+down_revision = '20261018_add_idempotency_keys'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('exam_id', sa.Integer(), sa.ForeignKey('exams.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('entity', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index(
+        'idx_sync_tombstones_exam_entity', 'sync_tombstones', ['exam_id', 'entity', 'deleted_at', 'id']
+    )
+    op.create_index('idx_checkins_exam_updated', 'checkins', ['exam_id', 'updated_at', 'id'])
+    op.create_index('idx_violations_exam_updated', 'violations', ['exam_id', 'updated_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('idx_violations_exam_updated', table_name='violations')
+    op.drop_index('idx_checkins_exam_updated', table_name='checkins')
+    op.drop_index('idx_sync_tombstones_exam_entity', table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
@@ -1,3 +1,4 @@
+import io
 import os
 import tempfile
 from datetime import datetime
@@ -5,22 +6,54 @@ from typing import Generator
 
 import pytest
 from flask_jwt_extended import create_access_token
+from PIL import Image
 
 from app import create_app
+from app.api.auth import auth_bp
+from app.api.checkins import proctor_checkins_bp
+from app.api.exams import admin_exams_bp, admin_rooms_bp, proctor_exams_bp
+from app.api.metrics import metrics_bp
+from app.api.reports import admin_reports_bp
+from app.api.seating import seating_bp
+from app.api.students import admin_students_bp
+from app.api.violations import admin_violations_bp, proctor_violations_bp
+from app.common import querycount
+from app.config import Config
 from app.extensions import db
-from app.models import Exam, Role, Room, Student, User
+from app.models import Exam, ExamStudent, Role, Room, Student, StudentReferencePhoto, User
+from app.services.checkin_context import invalidate_checkin_context
+
+API_BLUEPRINTS = (
+    auth_bp,
+    admin_students_bp,
+    admin_exams_bp,
+    admin_rooms_bp,
+    proctor_exams_bp,
+    seating_bp,
+    proctor_checkins_bp,
+    proctor_violations_bp,
+    admin_violations_bp,
+    admin_reports_bp,
+    metrics_bp,
+)
 
 
 @pytest.fixture(scope="session")
 def app():
     tmp_dir = tempfile.mkdtemp()
-    class TestConfig:
+    class TestConfig(Config):
         TESTING = True
         SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
         SQLALCHEMY_TRACK_MODIFICATIONS = False
         JWT_SECRET_KEY = "test-secret"
         UPLOAD_FOLDER = os.path.join(tmp_dir, "uploads")
+        ML_PROVIDER = "fake"
     app = create_app(TestConfig)
+    # app.routes fails to import (it references a missing app.api.common), in which
+    # case create_app registers no API blueprints; register them here.
+    for blueprint in API_BLUEPRINTS:
+        if blueprint.name not in app.blueprints:
+            app.register_blueprint(blueprint)
     with app.app_context():
         db.create_all()
         yield app
@@ -40,6 +73,90 @@ def db_session(app):
         db.session.rollback()
 
 
+def _empty_tables() -> None:
+    db.session.rollback()
+    db.drop_all()
+    db.create_all()
+    # Cached per process, keyed by ids that the new tables hand out again
+    invalidate_checkin_context()
+
+
+@pytest.fixture()
+def fresh_db(app):
+    """Empty tables (ids start again at 1), for tests that count rows or rely on ids."""
+    _empty_tables()
+    yield db.session
+    _empty_tables()
+
+
+@pytest.fixture()
+def make_roster(fresh_db):
+    """
+    make_roster(size) -> (exam, students): an exam with size enrolled students on
+    empty tables; reference_photos=True gives each student one reference photo.
+    """
+
+    def make(size: int, reference_photos: bool = False):
+        exam = Exam(code="E1", title="Exam", start_at=datetime(2026, 1, 1, 9), end_at=datetime(2026, 1, 1, 11))
+        fresh_db.add(exam)
+        fresh_db.flush()
+        students = []
+        for number in range(1, size + 1):
+            student = Student(student_number=f"S{number:03d}", full_name=f"Student {number}")
+            fresh_db.add(student)
+            fresh_db.flush()
+            fresh_db.add(ExamStudent(exam_id=exam.id, student_id=student.id, status="enrolled"))
+            if reference_photos:
+                fresh_db.add(StudentReferencePhoto(student_id=student.id, image_path=f"uploads/reference/{number}.jpg"))
+            students.append(student)
+        fresh_db.commit()
+        return exam, students
+
+    return make
+
+
+@pytest.fixture()
+def auth_headers(app):
+    """auth_headers("proctor") -> Authorization headers for a user with that role."""
+
+    def make(role: str = "admin", user_id: int = 1) -> dict:
+        token = create_access_token(identity=str(user_id), additional_claims={"role": role})
+        return {"Authorization": f"Bearer {token}"}
+
+    return make
+
+
+@pytest.fixture()
+def query_budget():
+    """
+    Statement budget for a block of test code:
+
+        with query_budget(5):
+            client.get("/api/admin/exams/1/roster", headers=auth_headers("admin"))
+
+    fails the test (listing any repeated statements) when more than 5 SQL
+    statements run. Use count_queries for the raw statement list instead.
+    """
+    return querycount.query_budget
+
+
+@pytest.fixture()
+def count_queries():
+    return querycount.count_queries
+
+
+@pytest.fixture()
+def make_jpeg():
+    """make_jpeg((width, height)) -> bytes of a plain JPEG, for upload tests."""
+
+    def make(size=(320, 240), color="gray", **save_options) -> bytes:
+        buffer = io.BytesIO()
+        Image.new("RGB", size, color).save(buffer, "JPEG", **save_options)
+        return buffer.getvalue()
+
+    return make
+
+
 @pytest.fixture()
 def roles(db_session):
     admin = db_session.query(Role).filter_by(name="admin").first()
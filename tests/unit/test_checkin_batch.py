@@ -0,0 +1,54 @@
+import io
+import json
+
+import pytest
+
+
+def _batch_form(exam_id: int, items: list, jpeg: bytes) -> dict:
+    form = {"metadata": json.dumps({"exam_id": exam_id, "items": items})}
+    for item in items:
+        form[item["photo"]] = (io.BytesIO(jpeg), "capture.jpg")
+    return form
+
+
+@pytest.mark.parametrize("size", [2, 20])
+def test_batch_reloads_created_checkins_in_one_query(
+    client, make_roster, make_jpeg, auth_headers, count_queries, size
+):
+    exam, _ = make_roster(size)
+    exam_id = exam.id
+    items = [{"client_id": f"c{n}", "student_id": n, "photo": f"photo{n}"} for n in range(1, size + 1)]
+
+    with count_queries() as counter:
+        response = client.post(
+            "/api/proctor/checkins/batch",
+            data=_batch_form(exam_id, items, make_jpeg()),
+            headers=auth_headers("proctor"),
+        )
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["created"] == size
+    assert all(result["checkin"]["student"] for result in body["results"])
+    reloads = [s for s in counter.statements if s.lstrip().startswith("SELECT") and "checkins.id" in s]
+    assert len(reloads) == 1
+
+
+def test_batch_rejects_duplicate_photo_fields(client, make_roster, make_jpeg, auth_headers):
+    exam, _ = make_roster(2)
+    exam_id = exam.id
+    metadata = {
+        "exam_id": exam_id,
+        "items": [
+            {"client_id": "a", "student_id": 1, "photo": "capture"},
+            {"client_id": "b", "student_id": 2, "photo": "capture"},
+        ],
+    }
+    form = {"metadata": json.dumps(metadata), "capture": (io.BytesIO(make_jpeg()), "capture.jpg")}
+
+    response = client.post("/api/proctor/checkins/batch", data=form, headers=auth_headers("proctor"))
+
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [
+        {"index": 2, "field": "photo", "message": "Duplicate photo field in payload"}
+    ]
@@ -0,0 +1,113 @@
+from pathlib import Path
+
+from werkzeug.datastructures import FileStorage
+
+from app.models import Checkin, ExamStudent, Room, SeatAssignment, SeatingPlan, Student
+from app.services import checkin_service
+from app.services.checkin_context import CheckinContext, get_checkin_context, invalidate_checkin_context
+from app.services.ml_service import FakeMLService
+
+
+def _seat(db_session, exam, students, seat_codes) -> SeatingPlan:
+    room = Room(name="Room A", capacity=len(seat_codes))
+    db_session.add(room)
+    db_session.flush()
+    plan = SeatingPlan(exam_id=exam.id, room_id=room.id)
+    db_session.add(plan)
+    db_session.flush()
+    for student, seat_code in zip(students, seat_codes):
+        db_session.add(
+            SeatAssignment(exam_id=exam.id, seating_plan_id=plan.id, student_id=student.id, seat_code=seat_code)
+        )
+    db_session.commit()
+    return plan
+
+
+def _reseat_elsewhere(db_session, exam, student, seat_code) -> None:
+    """A seating change committed by another worker: this process's cache is not told."""
+    db_session.query(SeatAssignment).filter_by(exam_id=exam.id, student_id=student.id).update(
+        {"seat_code": seat_code}
+    )
+    db_session.commit()
+
+
+def test_build_loads_roster_seats_and_checkins(fresh_db, make_roster):
+    exam, students = make_roster(3)
+    _seat(fresh_db, exam, students[:2], ["A1", "A2"])
+    fresh_db.add(Checkin(exam_id=exam.id, student_id=students[0].id))
+    fresh_db.commit()
+
+    context = CheckinContext.build(exam.id)
+
+    assert context.roster == {student.id for student in students}
+    assert context.seat_for(students[1].id)[1] == "A2"
+    assert context.seat_for(students[2].id) == (None, None)
+    assert context.is_checked_in(students[0].id)
+    assert not context.is_checked_in(students[1].id)
+    assert CheckinContext.build(999) is None
+
+
+def test_roster_miss_is_rechecked_against_the_database(fresh_db, make_roster):
+    exam, _ = make_roster(1)
+    context = CheckinContext.build(exam.id)
+    late = Student(student_number="LATE", full_name="Late Enrolment")
+    fresh_db.add(late)
+    fresh_db.flush()
+    fresh_db.add(ExamStudent(exam_id=exam.id, student_id=late.id, status="enrolled"))
+    fresh_db.commit()
+
+    assert context.on_roster(late.id)
+    assert not context.on_roster(999)
+
+
+def test_reseat_on_another_worker_is_picked_up(fresh_db, make_roster):
+    exam, students = make_roster(1)
+    _seat(fresh_db, exam, students, ["A1"])
+    context = CheckinContext.build(exam.id)
+
+    _reseat_elsewhere(fresh_db, exam, students[0], "B7")
+
+    assert context.seat_for(students[0].id, "B7")[1] == "B7"
+    assert context.seat_for(students[0].id)[1] == "B7"  # the cache now holds the new seat
+
+
+def test_checkin_after_reseat_elsewhere_is_seat_ok(fresh_db, make_roster, make_jpeg, tmp_path):
+    exam, students = make_roster(1)
+    _seat(fresh_db, exam, students, ["A1"])
+    context = get_checkin_context(exam.id, max_age=60)
+    _reseat_elsewhere(fresh_db, exam, students[0], "B7")
+    photo_path = tmp_path / "capture.jpg"
+    photo_path.write_bytes(make_jpeg())
+
+    checkin = checkin_service.process_checkin(
+        context,
+        students[0].id,
+        entered_seat_code="b7",
+        photo=FileStorage(stream=open(photo_path, "rb"), filename="capture.jpg", content_type="image/jpeg"),
+        upload_folder=Path(tmp_path),
+        ml_client=FakeMLService(should_match=True),
+    )
+
+    assert checkin.is_seat_ok is True
+    assert checkin.decision_status == "approved"
+
+
+def test_seating_plan_created_elsewhere_is_picked_up(fresh_db, make_roster):
+    exam, students = make_roster(1)
+    context = CheckinContext.build(exam.id)
+    plan = _seat(fresh_db, exam, students, ["C3"])
+
+    assert context.seat_for(students[0].id, "C3")[1] == "C3"
+    assert context.seating_plan_id == plan.id
+
+
+def test_context_is_cached_until_max_age_or_invalidation(fresh_db, make_roster):
+    exam, _ = make_roster(1)
+
+    context = get_checkin_context(exam.id, max_age=60)
+    assert get_checkin_context(exam.id, max_age=60) is context
+    assert get_checkin_context(exam.id, max_age=0) is not context
+
+    cached = get_checkin_context(exam.id, max_age=60)
+    invalidate_checkin_context(exam.id)
+    assert get_checkin_context(exam.id, max_age=60) is not cached
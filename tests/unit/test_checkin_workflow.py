@@ -4,46 +4,50 @@ import pytest
 from werkzeug.datastructures import FileStorage
 
 from app.extensions import db
-from app.models import Checkin, Seat, SeatAssignment, SeatingPlan
+from app.models import Checkin, ExamStudent, Seat, SeatAssignment, SeatingPlan
 from app.services import checkin_service
+from app.services.checkin_context import CheckinContext
 from app.services.ml_service import FakeMLService
 
 
-def make_file(tmp_path, name="photo.jpg"):
+def make_file(tmp_path, data, name="photo.jpg"):
     path = tmp_path / name
-    path.write_bytes(b"fake image bytes")
+    path.write_bytes(data)
     return FileStorage(stream=open(path, "rb"), filename=name, content_type="image/jpeg")
 
 
-def test_duplicate_checkin_prevented(app, db_session, exam, student, tmp_path):
+def enroll(db_session, exam, student):
+    if not db_session.query(ExamStudent).filter_by(exam_id=exam.id, student_id=student.id).first():
+        db_session.add(ExamStudent(exam_id=exam.id, student_id=student.id, status="enrolled"))
+        db_session.commit()
+
+
+def test_duplicate_checkin_prevented(app, db_session, exam, student, make_jpeg, tmp_path):
     db_session.query(Checkin).delete()
     db_session.commit()
+    enroll(db_session, exam, student)
 
     ml = FakeMLService(should_match=True)
     checkin_service.process_checkin(
-        exam=exam,
-        student=student,
-        seating_plan=None,
-        seat_assignment=None,
+        CheckinContext.build(exam.id),
+        student.id,
         entered_seat_code="A1",
-        photo=make_file(tmp_path, "first.jpg"),
+        photo=make_file(tmp_path, make_jpeg(), "first.jpg"),
         upload_folder=Path(tmp_path),
         ml_client=ml,
     )
     with pytest.raises(ValueError):
         checkin_service.process_checkin(
-            exam=exam,
-            student=student,
-            seating_plan=None,
-            seat_assignment=None,
+            CheckinContext.build(exam.id),
+            student.id,
             entered_seat_code="A1",
-            photo=make_file(tmp_path, "second.jpg"),
+            photo=make_file(tmp_path, make_jpeg(), "second.jpg"),
             upload_folder=Path(tmp_path),
             ml_client=ml,
         )
 
 
-def test_ml_wrapper_match_and_seat_ok(app, db_session, exam, student, tmp_path):
+def test_ml_wrapper_match_and_seat_ok(app, db_session, exam, student, make_jpeg, tmp_path):
     db_session.query(Checkin).delete()
     db_session.query(SeatAssignment).delete()
     db_session.query(Seat).delete()
@@ -61,15 +65,14 @@ def test_ml_wrapper_match_and_seat_ok(app, db_session, exam, student, tmp_path):
     )
     db_session.add(assignment)
     db_session.commit()
+    enroll(db_session, exam, student)
 
     ml = FakeMLService(should_match=True, score=0.9)
     checkin = checkin_service.process_checkin(
-        exam=exam,
-        student=student,
-        seating_plan=plan,
-        seat_assignment=assignment,
+        CheckinContext.build(exam.id),
+        student.id,
         entered_seat_code="A1",
-        photo=make_file(tmp_path),
+        photo=make_file(tmp_path, make_jpeg()),
         upload_folder=Path(tmp_path),
         ml_client=ml,
     )
@@ -79,7 +82,7 @@ def test_ml_wrapper_match_and_seat_ok(app, db_session, exam, student, tmp_path):
     assert checkin.decision_status == "approved"
 
 
-def test_ml_wrapper_no_match_or_wrong_seat(app, db_session, exam, student, tmp_path):
+def test_ml_wrapper_no_match_or_wrong_seat(app, db_session, exam, student, make_jpeg, tmp_path):
     db_session.query(Checkin).delete()
     db_session.query(SeatAssignment).delete()
     db_session.query(Seat).delete()
@@ -97,15 +100,14 @@ def test_ml_wrapper_no_match_or_wrong_seat(app, db_session, exam, student, tmp_p
     )
     db_session.add(assignment)
     db_session.commit()
+    enroll(db_session, exam, student)
 
     ml = FakeMLService(should_match=False, score=0.2, reason="no_face_detected")
     checkin = checkin_service.process_checkin(
-        exam=exam,
-        student=student,
-        seating_plan=plan,
-        seat_assignment=assignment,
+        CheckinContext.build(exam.id),
+        student.id,
         entered_seat_code="B2",
-        photo=make_file(tmp_path, "bad.jpg"),
+        photo=make_file(tmp_path, make_jpeg(), "bad.jpg"),
         upload_folder=Path(tmp_path),
         ml_client=ml,
     )
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.common import pagination
+from app.extensions import db
+from app.models import Checkin, SyncTombstone
+from app.services import checkin_service, sync_service
+
+T0 = datetime(2026, 1, 1, 9, 0, 0)
+MARGIN = 5
+
+
+def _seed_checkins(make_roster, size: int) -> int:
+    """Exam with size check-ins; check-in n (1-based) was last updated n seconds after T0."""
+    exam, students = make_roster(size)
+    for student in students:
+        db.session.add(Checkin(exam_id=exam.id, student_id=student.id))
+    db.session.commit()
+    for checkin in Checkin.query.all():
+        _touch(checkin.id, T0 + timedelta(seconds=checkin.id))
+    return exam.id
+
+
+def _touch(checkin_id: int, updated_at: datetime) -> None:
+    Checkin.query.filter_by(id=checkin_id).update({"updated_at": updated_at}, synchronize_session=False)
+    db.session.commit()
+
+
+def _sync(exam_id: int, since: str, limit=None) -> sync_service.Delta:
+    db.session.expire_all()
+    return checkin_service.checkin_changes(exam_id, since, limit, margin=MARGIN)
+
+
+def _sync_all(exam_id: int, since: str, limit=None):
+    ids = []
+    while True:
+        delta = _sync(exam_id, since, limit)
+        ids.extend(item.id for item in delta.items)
+        since = delta.watermark
+        if not delta.has_more:
+            return ids, since
+
+
+def test_same_second_update_with_lower_id_is_not_lost(make_roster):
+    exam_id = _seed_checkins(make_roster, 2)
+    ids, watermark = _sync_all(exam_id, sync_service.SYNC_START)
+    assert ids == [1, 2]
+
+    # Check-in 1 changes within the second the watermark points at
+    _touch(1, T0 + timedelta(seconds=2))
+
+    assert 1 in [item.id for item in _sync(exam_id, watermark).items]
+
+
+def test_late_commit_inside_the_margin_is_not_lost(make_roster):
+    exam_id = _seed_checkins(make_roster, 3)
+    _, watermark = _sync_all(exam_id, sync_service.SYNC_START)
+
+    # Committed after check-in 3 but stamped before it
+    _touch(1, T0 + timedelta(seconds=3 - MARGIN))
+
+    assert 1 in [item.id for item in _sync(exam_id, watermark).items]
+
+
+def test_paging_walks_every_row_once_then_rereads_the_margin(make_roster):
+    exam_id = _seed_checkins(make_roster, 10)
+    _touch(1, T0 + timedelta(seconds=10))  # shares a second with check-in 10
+    ids, watermark = _sync_all(exam_id, sync_service.SYNC_START, limit=3)
+    assert sorted(ids) == list(range(1, 11))
+
+    reread = [item.id for item in _sync(exam_id, watermark, limit=20).items]
+    assert set(reread) == {1, 5, 6, 7, 8, 9, 10}  # updated within MARGIN seconds of the newest
+
+
+def test_deletions_are_reported_once_caught_up(make_roster):
+    exam_id = _seed_checkins(make_roster, 2)
+    _, watermark = _sync_all(exam_id, sync_service.SYNC_START)
+    Checkin.query.filter_by(id=2).delete()
+    sync_service.record_deletions("checkin", [(exam_id, 2)])
+    db.session.commit()
+
+    delta = _sync(exam_id, watermark)
+
+    assert delta.deleted == [2]
+    assert SyncTombstone.query.count() == 1
+
+
+@pytest.mark.parametrize("since", ["not-a-watermark", pagination.encode_cursor([None, 0, 0])])
+def test_malformed_watermark_is_rejected(make_roster, since):
+    exam_id = _seed_checkins(make_roster, 1)
+
+    with pytest.raises(ValueError):
+        _sync(exam_id, since)
+
+
+def test_paging_rows_stamped_by_the_database_terminates(make_roster):
+    exam, students = make_roster(4)
+    db.session.add_all([Checkin(exam_id=exam.id, student_id=student.id) for student in students])
+    db.session.commit()
+
+    ids, _ = _sync_all(exam.id, sync_service.SYNC_START, limit=1)
+
+    assert sorted(ids) == [1, 2, 3, 4]
@@ -0,0 +1,64 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.ml import encoding  # noqa: E402
+from app.models import StudentReferencePhoto  # noqa: E402
+from app.services import ml_service  # noqa: E402
+
+
+def _embeddings(rng, count: int) -> list:
+    return [rng.standard_normal(encoding.EMBEDDING_DIM).astype(encoding.EMBEDDING_DTYPE) for _ in range(count)]
+
+
+def _closest(rows, probe) -> float:
+    return min(float(np.linalg.norm(row - probe)) for row in rows)
+
+
+def test_min_distances_matches_a_per_pair_loop():
+    rng = np.random.default_rng(7)
+    references = [np.stack(_embeddings(rng, count)) for count in (1, 3, 2, 5, 1)]
+    probes = _embeddings(rng, len(references))
+
+    distances = encoding.min_distances(references, probes)
+
+    expected = [_closest(rows, probe) for rows, probe in zip(references, probes)]
+    assert distances.shape == (len(references),)
+    assert np.allclose(distances, expected, rtol=1e-5)
+
+
+def test_exam_index_ranks_students_like_a_per_student_loop(fresh_db, make_roster):
+    rng = np.random.default_rng(11)
+    exam, students = make_roster(5)
+    references = {}
+    for student, count in zip(students, (2, 1, 0, 3, 1)):  # the third student has no reference photo
+        references[student.id] = _embeddings(rng, count)
+        for number, embedding in enumerate(references[student.id]):
+            blob = encoding.embedding_to_bytes(embedding)
+            fresh_db.add(
+                StudentReferencePhoto(
+                    student_id=student.id,
+                    image_path=f"uploads/reference/{student.id}-{number}.jpg",
+                    embedding=blob,
+                    embedding_hash=encoding.embedding_hash(blob),
+                )
+            )
+    fresh_db.commit()
+    ml_service.reference_cache.clear()
+
+    index = ml_service.ExamEmbeddingIndex.build(exam.id)
+    probe = _embeddings(rng, 1)[0]
+
+    expected = sorted(
+        ((student_id, _closest(rows, probe)) for student_id, rows in references.items() if rows),
+        key=lambda pair: pair[1],
+    )
+    nearest = index.nearest_students(probe, top_k=3)
+    assert [student_id for student_id, _ in nearest] == [student_id for student_id, _ in expected[:3]]
+    assert np.allclose([distance for _, distance in nearest], [distance for _, distance in expected[:3]], rtol=1e-5)
+    assert len(index.nearest_students(probe, top_k=10)) == 4
+
+    no_photo = students[2].id
+    assert no_photo in index
+    assert index.student_embeddings(no_photo) is None
+    assert index.student_embeddings(students[3].id).shape == (3, encoding.EMBEDDING_DIM)
@@ -0,0 +1,82 @@
+import json
+
+from app.services.exam_events import ExamEventBroker
+
+
+def _pending(subscription) -> list:
+    events = []
+    while True:
+        event = subscription.get(timeout=0)
+        if event is None:
+            return events
+        events.append(event)
+
+
+def test_reconnect_replays_events_after_last_event_id():
+    broker = ExamEventBroker(history_size=10)
+    first = broker.publish(1, "checkin.created", {"id": 1})
+    second = broker.publish(1, "checkin.created", {"id": 2})
+
+    subscription = broker.subscribe(1, first.id)
+
+    assert not subscription.reset
+    assert _pending(subscription) == [second]
+
+
+def test_id_from_another_broker_resets():
+    previous = ExamEventBroker()
+    for number in range(600):
+        stale = previous.publish(1, "checkin.created", {"id": number})
+    restarted = ExamEventBroker()
+    restarted.publish(1, "checkin.created", {"id": 1})
+
+    assert restarted.subscribe(1, stale.id).reset
+    assert restarted.subscribe(1, "601").reset
+    assert restarted.subscribe(1, "not-an-id").reset
+
+
+def test_eviction_of_unseen_events_resets():
+    broker = ExamEventBroker(history_size=3)
+    seen = broker.publish(1, "checkin.created", {"id": 1})
+    for number in range(2, 6):
+        broker.publish(1, "checkin.created", {"id": number})
+
+    # The event right after `seen` has been evicted
+    assert broker.subscribe(1, seen.id).reset
+
+
+def test_eviction_of_only_seen_events_does_not_reset():
+    broker = ExamEventBroker(history_size=3)
+    broker.publish(1, "checkin.created", {"id": 1})
+    seen = broker.publish(1, "checkin.created", {"id": 2})
+    missed = [broker.publish(1, "checkin.created", {"id": number}) for number in (3, 4)]
+
+    subscription = broker.subscribe(1, seen.id)
+
+    assert not subscription.reset
+    assert _pending(subscription) == missed
+
+
+def test_other_exams_do_not_cause_false_resets():
+    broker = ExamEventBroker(history_size=3)
+    seen = broker.publish(1, "checkin.created", {"id": 1})
+    for number in range(10):
+        broker.publish(2, "checkin.created", {"id": number})
+    missed = broker.publish(1, "checkin.created", {"id": 2})
+
+    subscription = broker.subscribe(1, seen.id)
+
+    assert not subscription.reset
+    assert _pending(subscription) == [missed]
+
+
+def test_stream_tells_a_client_with_an_unknown_id_to_resync(exam, client, auth_headers):
+    response = client.get(
+        f"/api/proctor/exams/{exam.id}/events",
+        headers={**auth_headers("proctor"), "Last-Event-ID": "another-worker:7"},
+    )
+
+    assert response.mimetype == "text/event-stream"
+    frames = response.get_data(as_text=True).split("\n\n")
+    reset = next(frame for frame in frames if frame.startswith("event: reset"))
+    assert "?since=" in json.loads(reset.split("data: ", 1)[1])["message"]
@@ -0,0 +1,83 @@
+import io
+
+from werkzeug.datastructures import FileStorage
+
+from app.models import Checkin, Violation
+from app.services import checkin_service, stats_service, student_service, violation_service
+from app.services.checkin_context import CheckinContext
+from app.services.ml_service import FakeMLService
+
+
+def _check_in(tmp_path, jpeg: bytes, exam_id: int, student_id: int, ml_client, **options):
+    return checkin_service.process_checkin(
+        CheckinContext.build(exam_id),
+        student_id,
+        entered_seat_code="A1",
+        photo=FileStorage(stream=io.BytesIO(jpeg), filename=f"{student_id}.jpg", content_type="image/jpeg"),
+        upload_folder=tmp_path,
+        ml_client=ml_client,
+        **options,
+    )
+
+
+def _assert_counters_match_a_rebuild(exam_id: int) -> dict:
+    maintained = stats_service.get_stats(exam_id)
+    stats_service.rebuild([exam_id])
+    assert stats_service.get_stats(exam_id) == maintained
+    return maintained
+
+
+def test_incremental_counters_match_a_rebuild(fresh_db, make_roster, make_jpeg, tmp_path, monkeypatch):
+    exam, students = make_roster(5)
+    jpeg = make_jpeg()
+    monkeypatch.setattr(checkin_service, "submit_verification", lambda *args, **kwargs: None)
+
+    _check_in(tmp_path, jpeg, exam.id, students[0].id, FakeMLService(should_match=True))
+    _check_in(tmp_path, jpeg, exam.id, students[1].id, FakeMLService(should_match=False))
+    queued = _check_in(tmp_path, jpeg, exam.id, students[2].id, FakeMLService(), defer_verification=True)
+    counters = _assert_counters_match_a_rebuild(exam.id)
+    assert counters["total_checkins"] == 3
+    assert counters["face_mismatches"] == 2  # the queued check-in has not matched yet
+
+    checkin_service.complete_verification(queued.id, FakeMLService(should_match=True))
+    assert _assert_counters_match_a_rebuild(exam.id)["face_mismatches"] == 1
+
+    violations = [
+        violation_service.create_violation(exam, student, "phone", None, None, tmp_path)
+        for student in students[:3]
+    ]
+    assert _assert_counters_match_a_rebuild(exam.id)["violations_count"] == 3
+
+    violation_service.delete_violation(violations[0])
+    assert _assert_counters_match_a_rebuild(exam.id)["violations_count"] == 2
+
+    # Removing a student from the roster cascades their check-in and violation away in
+    # MySQL (database/schema.sql); the sqlite test schema has no such key, so delete them here
+    Checkin.query.filter_by(exam_id=exam.id, student_id=students[1].id).delete()
+    Violation.query.filter_by(exam_id=exam.id, student_id=students[1].id).delete()
+    student_service.remove_student_from_exam(exam.id, students[1].id)
+    counters = _assert_counters_match_a_rebuild(exam.id)
+    assert counters["total_checkins"] == 2
+    assert counters["violations_count"] == 1
+
+
+def test_batch_counters_match_a_rebuild(fresh_db, make_roster, make_jpeg, tmp_path):
+    exam, students = make_roster(3)
+    jpeg = make_jpeg()
+    items = [
+        {
+            "client_id": f"c{student.id}",
+            "student_id": student.id,
+            "entered_seat_code": "A1",
+            "photo": FileStorage(stream=io.BytesIO(jpeg), filename=f"{student.id}.jpg", content_type="image/jpeg"),
+        }
+        for student in students
+    ]
+
+    results = checkin_service.process_checkin_batch(
+        CheckinContext.build(exam.id), items, upload_folder=tmp_path, ml_client=FakeMLService(should_match=False)
+    )
+
+    assert [result["status"] for result in results] == ["created"] * 3
+    counters = _assert_counters_match_a_rebuild(exam.id)
+    assert counters["total_checkins"] == counters["face_mismatches"] == 3
@@ -0,0 +1,58 @@
+import time
+
+from app.services import embedding_service
+
+
+def _wait_for_warm_up(client, status_url: str, headers, timeout: float = 10.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        status = client.get(status_url, headers=headers).get_json()
+        if status["state"] in ("completed", "failed") or time.monotonic() > deadline:
+            return status
+        time.sleep(0.05)
+
+
+def test_warm_up_runs_in_the_background_and_reports_through_its_status_url(
+    fresh_db, make_roster, client, auth_headers
+):
+    exam, students = make_roster(3)
+    headers = auth_headers("admin")
+    assert client.get(f"/api/admin/exams/{exam.id}/warmup", headers=headers).status_code == 404
+
+    response = client.post(f"/api/admin/exams/{exam.id}/warmup", json={}, headers=headers)
+
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body["state"] in ("queued", "running", "completed")
+    assert response.headers["Location"] == body["status_url"]
+
+    status = _wait_for_warm_up(client, body["status_url"], headers)
+    assert status["state"] == "completed", status
+    assert status["report"]["roster_size"] == 3
+    assert status["report"]["students_without_photos"] == [student.id for student in students]
+
+
+def test_warm_up_in_flight_is_not_submitted_twice(app, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(app.checkin_jobs, "submit", lambda fn, *args: submitted.append(args))
+    monkeypatch.setattr(embedding_service, "_warm_ups", {})
+
+    first = embedding_service.submit_warm_up(app, 7, ml_client=None)
+    second = embedding_service.submit_warm_up(app, 7, ml_client=None, force=True)
+
+    assert first["state"] == second["state"] == "queued"
+    assert len(submitted) == 1
+
+
+def test_warm_up_failure_is_recorded(app, monkeypatch):
+    def fail(exam_id, ml_client, force=False):
+        raise RuntimeError("ML service down")
+
+    monkeypatch.setattr(embedding_service, "warm_up_exam", fail)
+    monkeypatch.setattr(embedding_service, "_warm_ups", {8: {"exam_id": 8, "state": "queued"}})
+
+    embedding_service._run_warm_up(app, 8, None, False)
+
+    status = embedding_service.warm_up_status(8)
+    assert status["state"] == "failed"
+    assert status["error"] == "ML service down"
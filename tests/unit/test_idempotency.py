@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import IdempotencyKey, Violation
+
+
+def _violation_form(make_roster) -> dict:
+    exam, students = make_roster(1)
+    return {"exam_id": str(exam.id), "student_id": str(students[0].id), "reason": "Phone on desk"}
+
+
+def _post(client, headers, form, key="key-1"):
+    return client.post("/api/proctor/violations", data=form, headers={**headers, "Idempotency-Key": key})
+
+
+def _violation_count() -> int:
+    return Violation.query.count()
+
+
+def _set_claim(**values) -> None:
+    IdempotencyKey.query.update(values)
+    db.session.commit()
+
+
+def test_retry_replays_the_stored_response(client, make_roster, auth_headers):
+    form = _violation_form(make_roster)
+    headers = auth_headers("proctor")
+
+    first = _post(client, headers, form)
+    retry = _post(client, headers, form)
+
+    assert first.status_code == 201
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.get_json() == first.get_json()
+    assert _violation_count() == 1
+
+
+def test_key_reused_for_another_request_is_rejected(client, make_roster, auth_headers):
+    form = _violation_form(make_roster)
+    headers = auth_headers("proctor")
+
+    _post(client, headers, form)
+    response = _post(client, headers, {**form, "reason": "Talking"})
+
+    assert response.status_code == 422
+    assert _violation_count() == 1
+
+
+def test_retry_while_first_request_is_unfinished_conflicts(client, make_roster, auth_headers):
+    form = _violation_form(make_roster)
+    headers = auth_headers("proctor")
+    _post(client, headers, form)
+    _set_claim(status_code=None, response_body=None, created_at=datetime.utcnow())
+
+    response = _post(client, headers, form)
+
+    assert response.status_code == 409
+    assert _violation_count() == 1
+
+
+def test_abandoned_claim_is_taken_over_after_the_lock(app, client, make_roster, auth_headers):
+    form = _violation_form(make_roster)
+    headers = auth_headers("proctor")
+    _post(client, headers, form)
+    lock = app.config["IDEMPOTENCY_LOCK_SECONDS"]
+    _set_claim(status_code=None, response_body=None, created_at=datetime.utcnow() - timedelta(seconds=lock + 1))
+
+    response = _post(client, headers, form)
+    replay = _post(client, headers, form)
+
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response.headers
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert _violation_count() == 2
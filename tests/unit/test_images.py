@@ -0,0 +1,64 @@
+import io
+
+import pytest
+from PIL import Image
+
+from app.common import images
+
+ORIENTATION_TAG = 0x0112
+
+
+def _size_of(data: bytes):
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size
+
+
+def test_exif_orientation_is_applied(make_jpeg):
+    exif = Image.Exif()
+    exif[ORIENTATION_TAG] = 6  # stored landscape, displayed rotated 90 degrees clockwise
+    data = make_jpeg((400, 200), exif=exif)
+
+    normalized = images.normalize_image(data, max_dimension=1000)
+
+    assert (normalized.width, normalized.height) == (200, 400)
+    assert _size_of(normalized.data) == (200, 400)
+
+
+def test_longest_side_is_downscaled_to_image_max_dimension(app, make_jpeg, monkeypatch):
+    monkeypatch.setitem(app.config, "IMAGE_MAX_DIMENSION", 300)
+
+    landscape = images.normalize_upload(make_jpeg((1200, 600)))
+    portrait = images.normalize_upload(make_jpeg((600, 1200)))
+    small = images.normalize_upload(make_jpeg((200, 100)))
+
+    assert (landscape.width, landscape.height) == (300, 150)
+    assert (portrait.width, portrait.height) == (150, 300)
+    assert (small.width, small.height) == (200, 100)  # never upscaled
+    assert landscape.extension == ".jpg"
+
+
+@pytest.mark.parametrize("keep_original", [False, True])
+def test_original_is_kept_only_when_enabled(app, make_jpeg, monkeypatch, tmp_path, keep_original):
+    monkeypatch.setitem(app.config, "IMAGE_KEEP_ORIGINAL", keep_original)
+    original = make_jpeg((2000, 1000))
+
+    path = images.save_upload(images.normalize_upload(original), original, tmp_path, "capture", "phone.jpeg")
+
+    assert path == tmp_path / "capture.jpg"
+    kept = tmp_path / "capture.orig.jpeg"
+    assert kept.exists() is keep_original
+    if keep_original:
+        assert kept.read_bytes() == original
+
+
+def test_undecodable_bytes_are_rejected():
+    with pytest.raises(ValueError):
+        images.normalize_image(b"fake image bytes", max_dimension=100)
+
+
+def test_decompression_bomb_is_rejected_as_invalid(make_jpeg, monkeypatch):
+    data = make_jpeg((100, 100))
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)  # 10,000 px is over twice the limit
+
+    with pytest.raises(ValueError):
+        images.normalize_image(data, max_dimension=100)
@@ -0,0 +1,44 @@
+import re
+
+EXAMS_SERIES = (
+    'http_requests_total{blueprint="admin_exams",endpoint="admin_exams.admin_list_exams",method="GET",status="200"}'
+)
+
+
+def _scrape(client, headers) -> str:
+    response = client.get("/metrics", headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    return response.get_data(as_text=True)
+
+
+def _value(exposition: str, series: str) -> float:
+    match = re.search(rf"^{re.escape(series)} (\S+)$", exposition, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_metrics_require_an_admin_or_the_scrape_token(client, auth_headers):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers=auth_headers("proctor")).status_code == 403
+    assert client.get("/metrics", headers=auth_headers("admin")).status_code == 200
+
+
+def test_scrape_token_is_accepted_when_configured(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", "scrape-secret")
+
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code != 200
+
+
+def test_exposition_format_and_request_counter(client, auth_headers):
+    headers = auth_headers("admin")
+    before = _scrape(client, headers)
+
+    assert client.get("/api/admin/exams", headers=headers).status_code == 200
+    after = _scrape(client, headers)
+
+    assert "# HELP http_requests_total " in after
+    assert "# TYPE http_requests_total counter" in after
+    assert "# TYPE http_request_duration_seconds histogram" in after
+    assert re.search(r"^sql_statements_total \S+$", after, re.MULTILINE)
+    assert _value(after, EXAMS_SERIES) == _value(before, EXAMS_SERIES) + 1
@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import pytest
+
+from app.common import pagination
+from app.models import Checkin, Violation
+
+MAX_PAGES = 50
+
+
+def _walk(client, url: str, headers, limit: int) -> list:
+    """Follow next_cursor from the first page; fails instead of looping forever."""
+    ids, cursor = [], None
+    for _ in range(MAX_PAGES):
+        query = f"limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(f"{url}?{query}", headers=headers)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        ids.extend(item["id"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids
+    pytest.fail(f"no last page after {MAX_PAGES} pages: {ids[:20]}")
+
+
+@pytest.fixture()
+def same_second_rows(fresh_db, make_roster):
+    """Five check-ins and violations stamped by the database default, plus one set in Python."""
+    exam, students = make_roster(6)
+    for student in students[:5]:
+        fresh_db.add(Checkin(exam_id=exam.id, student_id=student.id))
+        fresh_db.add(Violation(exam_id=exam.id, student_id=student.id, reason="phone"))
+    fresh_db.add(Checkin(exam_id=exam.id, student_id=students[5].id, checked_in_at=datetime(2026, 1, 1, 9, 0, 0, 500)))
+    fresh_db.add(Violation(exam_id=exam.id, student_id=students[5].id, reason="notes", created_at=datetime(2026, 1, 1, 9)))
+    fresh_db.commit()
+    return exam
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4])
+def test_checkin_pages_have_no_duplicates_or_gaps(same_second_rows, client, auth_headers, limit):
+    url = f"/api/proctor/exams/{same_second_rows.id}/checkins"
+    headers = auth_headers("proctor")
+
+    ids = _walk(client, url, headers, limit)
+
+    assert ids == [item["id"] for item in client.get(url, headers=headers).get_json()["items"]]
+    assert sorted(ids) == sorted(checkin.id for checkin in Checkin.query.all())
+
+
+@pytest.mark.parametrize("limit", [1, 3])
+def test_violation_pages_have_no_duplicates_or_gaps(same_second_rows, client, auth_headers, limit):
+    url = f"/api/proctor/exams/{same_second_rows.id}/violations"
+    headers = auth_headers("proctor")
+
+    ids = _walk(client, url, headers, limit)
+
+    assert ids == [item["id"] for item in client.get(url, headers=headers).get_json()["items"]]
+    assert len(ids) == len(set(ids)) == Violation.query.count()
+
+
+def test_cursor_round_trips_its_keys():
+    values = [datetime(2026, 1, 1, 9, 0, 5), 42, "S001"]
+
+    assert pagination.decode_cursor(pagination.encode_cursor(values), 3) == values
+    with pytest.raises(ValueError):
+        pagination.decode_cursor(pagination.encode_cursor(values), 2)
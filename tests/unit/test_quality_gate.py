@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.ml import quality  # noqa: E402
+from app.ml.quality import QualityThresholds  # noqa: E402
+
+THRESHOLDS = QualityThresholds(min_brightness=40, min_sharpness=60, min_face_size=64, detect_max_dimension=480)
+FACE = (100, 300, 300, 100)  # (top, right, bottom, left): a 200px face
+
+
+def _frame(fill=None, seed: int = 3):
+    """640x480 RGB frame: flat when fill is given, otherwise sharp noise around mid-gray."""
+    if fill is not None:
+        return np.full((480, 640, 3), fill, dtype="uint8")
+    rng = np.random.default_rng(seed)
+    return rng.integers(60, 200, size=(480, 640, 3), dtype="uint8")
+
+
+@pytest.fixture()
+def faces_found(monkeypatch):
+    """faces_found([box, ...]) makes detection report those boxes."""
+
+    def set_faces(locations):
+        monkeypatch.setattr(quality, "detect_faces", lambda image, max_dimension: list(locations))
+
+    return set_faces
+
+
+def test_usable_capture_passes_with_its_face_box(faces_found):
+    faces_found([FACE])
+
+    result = quality.assess(_frame(), THRESHOLDS)
+
+    assert result.reason is None
+    assert result.locations == [FACE]
+
+
+def test_dark_frame_is_rejected_before_detection(monkeypatch):
+    def fail(image, max_dimension):
+        raise AssertionError("detection ran on a dark frame")
+
+    monkeypatch.setattr(quality, "detect_faces", fail)
+
+    assert quality.assess(_frame(fill=10), THRESHOLDS).reason == "too_dark"
+
+
+@pytest.mark.parametrize(
+    "locations, reason",
+    [
+        ([], "no_face_detected"),
+        ([FACE, (10, 90, 90, 10)], "multiple_faces_detected"),
+        ([(100, 140, 140, 100)], "face_too_small"),
+    ],
+)
+def test_detection_based_rejections(faces_found, locations, reason):
+    faces_found(locations)
+
+    assert quality.assess(_frame(), THRESHOLDS).reason == reason
+
+
+def test_flat_face_crop_is_too_blurry(faces_found):
+    faces_found([FACE])
+
+    assert quality.assess(_frame(fill=128), THRESHOLDS).reason == "too_blurry"
+
+
+def test_laplacian_variance_separates_sharp_from_flat():
+    assert quality.laplacian_variance(quality.to_gray(_frame(fill=128))) == 0.0
+    assert quality.laplacian_variance(quality.to_gray(_frame())) > THRESHOLDS.min_sharpness
+
+
+def test_detection_boxes_are_scaled_back_to_the_full_frame(monkeypatch):
+    seen = {}
+
+    def face_locations(image, model):
+        seen["shape"] = image.shape
+        return [(10, 60, 60, 10)]
+
+    monkeypatch.setattr(quality, "face_recognition", SimpleNamespace(face_locations=face_locations))
+    frame = np.zeros((960, 1280, 3), dtype="uint8")
+
+    locations = quality.detect_faces(frame, max_dimension=640)
+
+    assert seen["shape"] == (480, 640, 3)
+    assert locations == [(20, 120, 120, 20)]
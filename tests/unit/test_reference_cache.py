@@ -0,0 +1,89 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.ml import encoding  # noqa: E402
+from app.models import StudentReferencePhoto  # noqa: E402
+from app.services import ml_service  # noqa: E402
+from app.services.ml_service import ReferenceEmbeddingCache  # noqa: E402
+
+EMBEDDING_BYTES = encoding.EMBEDDING_DIM * 4  # float32
+
+
+def _embedding(value: float = 0.0):
+    return np.full(encoding.EMBEDDING_DIM, value, dtype=encoding.EMBEDDING_DTYPE)
+
+
+def test_least_recently_used_entries_are_evicted_to_stay_under_the_byte_budget():
+    cache = ReferenceEmbeddingCache(max_bytes=3 * EMBEDDING_BYTES)
+    for photo_id in (1, 2, 3):
+        cache.put(photo_id, f"h{photo_id}", _embedding(photo_id))
+    cache.get(1, "h1")  # 2 is now the least recently used
+
+    cache.put(4, "h4", _embedding(4))
+
+    assert cache.get(2, "h2") is None
+    assert all(cache.get(photo_id, f"h{photo_id}") is not None for photo_id in (1, 3, 4))
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["bytes"] == 3 * EMBEDDING_BYTES
+    assert stats["evictions"] == 1
+
+
+def test_entry_larger_than_the_budget_is_not_cached():
+    cache = ReferenceEmbeddingCache(max_bytes=EMBEDDING_BYTES - 1)
+
+    cache.put(1, "h1", _embedding())
+
+    assert cache.get(1, "h1") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_replacing_an_entry_does_not_double_count_its_bytes():
+    cache = ReferenceEmbeddingCache(max_bytes=2 * EMBEDDING_BYTES)
+
+    cache.put(1, "old", _embedding(1))
+    cache.put(1, "new", _embedding(2))
+
+    assert cache.stats()["bytes"] == EMBEDDING_BYTES
+    assert cache.get(1, "old") is None  # a re-encoded photo is never served stale
+    assert cache.get(1, "new")[0] == 2
+
+
+def test_discard_and_clear_invalidate_entries():
+    cache = ReferenceEmbeddingCache()
+    cache.put(1, "h1", _embedding())
+    cache.put(2, "h2", _embedding())
+
+    cache.discard(1)
+    assert cache.get(1, "h1") is None
+    assert cache.stats()["bytes"] == EMBEDDING_BYTES
+
+    cache.clear()
+    assert cache.get(2, "h2") is None
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["bytes"] == 0
+
+
+def test_load_reference_embeddings_serves_hits_without_querying(fresh_db, make_roster, count_queries):
+    _, students = make_roster(2)
+    blob = encoding.embedding_to_bytes(_embedding(0.5))
+    photos = [
+        StudentReferencePhoto(
+            student_id=student.id, image_path="uploads/reference/x.jpg", embedding=blob, embedding_hash="h"
+        )
+        for student in students
+    ]
+    fresh_db.add_all(photos)
+    fresh_db.commit()
+    keys = [(photo.id, "h") for photo in photos]
+    ml_service.reference_cache.clear()
+
+    with count_queries() as first:
+        loaded = ml_service.load_reference_embeddings(keys)
+    with count_queries() as second:
+        cached = ml_service.load_reference_embeddings(keys)
+
+    assert first.count == 1
+    assert second.count == 0
+    assert set(loaded) == set(cached) == {photo.id for photo in photos}
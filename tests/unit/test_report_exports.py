@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from app.common import streaming
+from app.models import Checkin, Violation
+from app.services import report_service
+
+
+@pytest.fixture()
+def exported(fresh_db, make_roster):
+    """Three check-ins (the second a face mismatch with a note that needs quoting) and one violation."""
+    exam, students = make_roster(3)
+    checkins = [
+        Checkin(
+            exam_id=exam.id,
+            student_id=student.id,
+            seat_code_entered=f"A{number}",
+            is_face_match=number != 2,
+            is_seat_ok=True,
+            decision_status="approved" if number != 2 else "pending",
+            checked_in_at=datetime(2026, 1, 1, 9, number),
+            notes='late, said "bus"\nsecond line' if number == 2 else None,
+        )
+        for number, student in enumerate(students, start=1)
+    ]
+    fresh_db.add_all(checkins)
+    fresh_db.flush()
+    fresh_db.add(
+        Violation(
+            exam_id=exam.id,
+            student_id=students[0].id,
+            checkin_id=checkins[0].id,
+            reason="phone",
+            created_at=datetime(2026, 1, 1, 10),
+        )
+    )
+    fresh_db.commit()
+    return exam, students
+
+
+def _csv(response) -> list:
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    return list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+
+def test_checkin_csv_export_has_every_row_in_id_order(exported, client, auth_headers):
+    exam, students = exported
+
+    response = client.get(f"/api/admin/reports/checkins/export?exam_id={exam.id}", headers=auth_headers("admin"))
+
+    assert response.is_streamed
+    assert response.headers["Content-Disposition"] == "attachment; filename=checkins.csv"
+    rows = _csv(response)
+    assert [row["student_number"] for row in rows] == [student.student_number for student in students]
+    assert list(rows[0]) == list(report_service.CHECKIN_EXPORT_COLUMNS)
+    assert rows[1]["notes"] == 'late, said "bus"\nsecond line'
+    assert rows[1]["is_face_match"] == "False"
+    assert rows[0]["notes"] == ""
+    assert rows[0]["exam_code"] == "E1"
+    assert rows[2]["checked_in_at"] == "2026-01-01T09:03:00"
+
+
+def test_checkin_export_applies_the_report_filters(exported, client, auth_headers):
+    response = client.get("/api/admin/reports/checkins/export?face_match=false", headers=auth_headers("admin"))
+
+    assert [row["seat_code_entered"] for row in _csv(response)] == ["A2"]
+
+
+def test_violation_ndjson_export(exported, client, auth_headers):
+    response = client.get("/api/admin/reports/violations/export?format=ndjson", headers=auth_headers("admin"))
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines == [
+        {
+            "id": 1,
+            "exam_id": exported[0].id,
+            "exam_code": "E1",
+            "student_id": exported[1][0].id,
+            "student_number": "S001",
+            "student_full_name": "Student 1",
+            "checkin_id": 1,
+            "reason": "phone",
+            "notes": None,
+            "evidence_image_path": None,
+            "created_at": "2026-01-01T10:00:00",
+        }
+    ]
+
+
+def test_unknown_export_format_is_rejected(client, auth_headers):
+    response = client.get("/api/admin/reports/checkins/export?format=xlsx", headers=auth_headers("admin"))
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("encode", [streaming.csv_chunks, streaming.ndjson_chunks])
+def test_chunked_output_matches_a_single_chunk(encode):
+    rows = [{"id": number, "at": datetime(2026, 1, 1, 9, number)} for number in range(7)]
+
+    chunks = list(encode(("id", "at"), iter(rows), chunk_rows=3))
+
+    assert len(chunks) == 3
+    assert "".join(chunks) == "".join(encode(("id", "at"), rows, chunk_rows=100))
@@ -0,0 +1,70 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.models import Exam, ExamStats
+from app.services import report_service, stats_service
+
+ZERO = {name: 0 for name in stats_service.COUNTERS}
+
+
+@pytest.fixture()
+def exams(fresh_db):
+    """Three exams on Jan 1, 2 and 3; the second has no exam_stats row yet."""
+    rows = [
+        Exam(code=f"E{day}", title=f"Exam {day}", start_at=datetime(2026, 1, day, 9), end_at=datetime(2026, 1, day, 11))
+        for day in (3, 1, 2)
+    ]
+    fresh_db.add_all(rows)
+    fresh_db.flush()
+    counters = {
+        "E1": dict(ZERO, total_checkins=4, face_mismatches=1, approved=3, pending=1, violations_count=2),
+        "E3": dict(ZERO, total_checkins=1, seat_mismatches=1, pending=1),
+    }
+    fresh_db.add_all([ExamStats(exam_id=exam.id, **counters[exam.code]) for exam in rows if exam.code in counters])
+    fresh_db.commit()
+    return {exam.code: exam for exam in rows}
+
+
+def test_summaries_are_ordered_by_start_with_zeros_for_exams_without_stats(exams, count_queries):
+    with count_queries() as queries:
+        summaries = report_service.get_summaries()
+
+    assert queries.count == 1
+    assert [summary["exam_code"] for summary in summaries] == ["E1", "E2", "E3"]
+    assert summaries[1] == {
+        "exam_id": exams["E2"].id,
+        "exam_code": "E2",
+        "exam_title": "Exam 2",
+        "start_at": "2026-01-02T09:00:00",
+        **ZERO,
+    }
+    for summary in summaries:
+        assert {name: summary[name] for name in stats_service.COUNTERS} == report_service.get_summary(
+            summary["exam_id"]
+        )
+
+
+def test_summaries_filter_by_exam_ids_and_inclusive_dates(exams):
+    def codes(**filters):
+        return [summary["exam_code"] for summary in report_service.get_summaries(**filters)]
+
+    assert codes(exam_ids=[exams["E3"].id, exams["E1"].id]) == ["E1", "E3"]
+    assert codes(start_date=date(2026, 1, 2)) == ["E2", "E3"]
+    assert codes(end_date=date(2026, 1, 2)) == ["E1", "E2"]
+    assert codes(start_date=date(2026, 1, 2), end_date=date(2026, 1, 2)) == ["E2"]
+    assert codes(exam_ids=[exams["E1"].id], start_date=date(2026, 1, 2)) == []
+
+
+def test_summaries_endpoint(exams, client, auth_headers):
+    response = client.get(
+        f"/api/admin/reports/summaries?exam_ids={exams['E1'].id},{exams['E2'].id}&to=2026-01-01",
+        headers=auth_headers("admin"),
+    )
+
+    assert response.status_code == 200
+    assert [item["exam_code"] for item in response.get_json()["items"]] == ["E1"]
+    assert response.get_json()["items"][0]["violations_count"] == 2
+
+    bad = client.get("/api/admin/reports/summaries?from=01/02/2026", headers=auth_headers("admin"))
+    assert bad.status_code == 400
@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.mark.parametrize("size", [5, 40])
+def test_roster_listing_does_not_query_per_student(client, make_roster, auth_headers, query_budget, size):
+    exam, _ = make_roster(size, reference_photos=True)
+    exam_id = exam.id
+    headers = auth_headers("admin")
+
+    # exam lookup, roster rows (students joined), one IN query for reference photos
+    with query_budget(3):
+        response = client.get(f"/api/admin/exams/{exam_id}/roster", headers=headers)
+
+    assert response.status_code == 200
+    items = response.get_json()["items"]
+    assert len(items) == size
+    assert all(len(item["student"]["photos"]) == 1 for item in items)